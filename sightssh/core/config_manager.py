@@ -12,6 +12,7 @@ class ConfigManager:
         self.config_dir = platformdirs.user_data_dir(self.APP_NAME, self.APP_AUTHOR, roaming=True)
         self.profiles_file = os.path.join(self.config_dir, "profiles.json")
         self.settings_file = os.path.join(self.config_dir, "settings.json")
+        self.tuning_file = os.path.join(self.config_dir, "transfer_tuning.json")
         self.logs_dir = os.path.join(self.config_dir, "logs")
         self._ensure_config_dir()
         self._ensure_log_dir()
@@ -38,7 +39,18 @@ class ConfigManager:
             "verbosity": ["size", "type", "modified", "permissions", "owner", "group"],
             "check_updates_on_startup": True,
             "timeout": 10,
-            "confirm_disconnect": False
+            "confirm_disconnect": False,
+            "allow_server_commands": False,
+            "delete_to_trash": False,
+            "revalidate_listings": True,
+            "prefetch_listings": True,
+            "listing_cache_ttl": 30,
+            "local_dir_sizes": False,
+            "remote_dir_sizes": False,
+            "catalog_enabled": False,
+            "catalog_max_entries": 1000000,
+            "catalog_refresh_hours": 24,
+            "catalog_root": ""
         }
         
         current = self.get_settings()
@@ -113,11 +125,12 @@ class ConfigManager:
             except: pass
             return {}
 
-    def save_profile(self, name, host, port, username, auth_type, secret, key_path, profile_password):
+    def save_profile(self, name, host, port, username, auth_type, secret, key_path, profile_password, transfer_engine="sftp"):
         """
         Saves a profile.
         secret: Password or Key Passphrase (plaintext).
         profile_password: The password to lock this profile.
+        transfer_engine: 'sftp', 'exec' or 'auto' (see core.transfer_engine).
         """
         profiles = self.get_profiles()
         
@@ -140,7 +153,8 @@ class ConfigManager:
             "secret": encrypted_secret,
             "key_path": key_path, # We don't encrypt path usually, but we could if needed. Leaving plaintext for now.
             "salt": salt_b64,
-            "verification_token": verification_token
+            "verification_token": verification_token,
+            "transfer_engine": transfer_engine
         }
 
         self._atomic_write(self.profiles_file, profiles)
@@ -186,7 +200,8 @@ class ConfigManager:
             "secret": decrypted_secret,
             "key_path": profile['key_path'],
             "last_local_path": profile.get("last_local_path"),
-            "last_remote_path": profile.get("last_remote_path")
+            "last_remote_path": profile.get("last_remote_path"),
+            "transfer_engine": profile.get("transfer_engine", "sftp")
         }
 
     def update_profile_paths(self, name, local_path, remote_path):
@@ -202,3 +217,25 @@ class ConfigManager:
         if name in profiles:
             del profiles[name]
             self._atomic_write(self.profiles_file, profiles)
+
+    def get_transfer_tuning(self, host_key):
+        """Returns the saved transfer parameters for a host ('host:port'), or {}."""
+        if not os.path.exists(self.tuning_file):
+            return {}
+        try:
+            with open(self.tuning_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get(host_key, {})
+        except (json.JSONDecodeError, IOError, AttributeError):
+            return {}
+
+    def save_transfer_tuning(self, host_key, tuning):
+        """Stores the transfer parameters measured for a host."""
+        data = {}
+        if os.path.exists(self.tuning_file):
+            try:
+                with open(self.tuning_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                data = {}
+        data[host_key] = tuning
+        self._atomic_write(self.tuning_file, data)
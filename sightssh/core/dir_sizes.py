@@ -0,0 +1,144 @@
+import os
+import shlex
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from sightssh.core.remote_ops import _ParallelTreeOp, OperationCancelled, DELETE_WORKERS, stream_records
+
+SIZE_CACHE_ENTRIES = 20000
+LOCAL_SIZE_WORKERS = 4
+
+
+class DirSizeCache:
+    """
+    Computed folder sizes keyed by path and remembered together with the
+    folder's mtime; a size is reused only while the mtime is unchanged.
+    A folder's mtime only changes when its own entries do, so a size can
+    lag behind changes deep inside it until the folder is calculated again.
+    """
+    def __init__(self, max_entries=SIZE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict() # path -> (mtime, size)
+        self._lock = threading.Lock()
+
+    def get(self, path, mtime):
+        with self._lock:
+            item = self._data.get(path)
+            if item is None or item[0] != mtime: return None
+            self._data.move_to_end(path)
+            return item[1]
+
+    def put(self, path, mtime, size):
+        with self._lock:
+            self._data[path] = (mtime, size)
+            self._data.move_to_end(path)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def apply(self, folder, entries, join):
+        """Sets dir_size on the folder entries whose size is known for their current mtime."""
+        for entry in entries:
+            if entry.is_dir and entry.name != "..":
+                size = self.get(join(folder, entry.name), entry.mtime)
+                if size is not None: entry.dir_size = size
+
+
+class RemoteSizer(_ParallelTreeOp):
+    """
+    Total size (apparent bytes, like 'du -sb') of remote folders.
+    One 'du -sb' exec reports every folder as soon as it is summed; without
+    exec or GNU du, each folder is walked over SFTP with parallel channels.
+    """
+    def __init__(self, ssh_client, workers=DELETE_WORKERS):
+        super().__init__(ssh_client, workers, window=1)
+
+    def sizes(self, paths, on_size, is_cancelled=None):
+        """Calls on_size(path, size) per folder from a worker thread; raises OperationCancelled."""
+        self._start(None, is_cancelled)
+        remaining = self._sizes_exec(paths, on_size)
+        for path in remaining:
+            total = self._walk_size(path)
+            if self._is_cancelled(): break
+            if total is not None: on_size(path, total)
+        if self._is_cancelled(): raise OperationCancelled()
+
+    def _sizes_exec(self, paths, on_size):
+        """Returns the paths du did not report (all of them if du is unusable)."""
+        pending = set(paths)
+
+        def on_record(record):
+            size, sep, path = record.decode("utf-8", errors="replace").partition("\t")
+            if sep and path in pending and size.isdigit():
+                pending.discard(path)
+                on_size(path, int(size))
+        try:
+            channel = self.ssh_client.open_exec("du -sb -- " + " ".join(shlex.quote(p) for p in paths))
+        except Exception as e:
+            logging.info(f"Folder sizes: exec unavailable ({e}), walking over SFTP")
+            return list(paths)
+        status, err = stream_records(channel, b"\n", on_record, self._is_cancelled)
+        if pending and status:
+            logging.info(f"Folder sizes: du exited with {status} ({err[-200:]!r}), walking the rest over SFTP")
+        return [p for p in paths if p in pending]
+
+    def _walk_size(self, root):
+        """Bytes of root and everything below it, folders included as du counts them; None if root is unreadable."""
+        total = 0
+        def _add(attr):
+            nonlocal total
+            with self._lock:
+                total += attr.st_size or 0
+        def _on_dir(pipe, path, attr, depth):
+            # Nothing is pipelined on this channel, so a plain lstat of the root is safe here.
+            _add(attr if attr is not None else pipe.sftp.lstat(path))
+        errors = len(self.errors)
+        try:
+            self._walk([root], _on_dir, lambda pipe, path, attr: _add(attr))
+        except OperationCancelled:
+            pass
+        if any(path == root for path, _ in self.errors[errors:]): return None
+        return total
+
+
+def _scan_dir(path):
+    """(bytes of the entries directly in path, its subfolders); symlinks are not followed."""
+    total, subdirs = 0, []
+    try:
+        with os.scandir(path) as it:
+            for de in it:
+                try:
+                    if de.is_dir(follow_symlinks=False): subdirs.append(de.path)
+                    total += de.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return total, subdirs
+
+
+def local_dir_sizes(paths, on_size, is_cancelled=None, workers=LOCAL_SIZE_WORKERS):
+    """
+    Totals local folders with a pool of threads, each scanning one directory
+    at a time (os.scandir releases the GIL while it waits on the disk).
+    Calls on_size(path, size) per folder; raises OperationCancelled.
+    """
+    is_cancelled = is_cancelled or (lambda: False)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for root in paths:
+            try:
+                total = os.lstat(root).st_size
+            except OSError:
+                continue
+            running = {pool.submit(_scan_dir, root)}
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                if is_cancelled():
+                    for future in running: future.cancel()
+                    raise OperationCancelled()
+                for future in done:
+                    size, subdirs = future.result()
+                    total += size
+                    running.update(pool.submit(_scan_dir, d) for d in subdirs)
+            on_size(root, total)
@@ -0,0 +1,213 @@
+import time
+import shlex
+import logging
+from array import array
+
+from sightssh.core.remote_ops import _ParallelTreeOp, OperationCancelled, stream_records
+
+USAGE_WORKERS = 4 # Channels used by the SFTP fallback walk
+USAGE_PROGRESS_INTERVAL = 0.5 # Seconds between progress reports
+# Type, apparent size, path relative to the root; NUL-terminated because names may contain newlines
+USAGE_FORMAT = r"%y %s %P\0"
+
+
+class UsageTree:
+    """
+    Sizes of everything under one folder, kept in flat arrays instead of an
+    object per entry so that millions of entries fit in memory. Entry i has
+    a name (a slice of one byte buffer), a parent index, its own size and a
+    folder flag; index 0 is the root, and parents always come before their
+    children. rollup() adds sizes up into folder totals and groups children,
+    after which browsing the tree needs no further requests.
+    """
+    def __init__(self, root):
+        self.root = root.rstrip("/") or "/"
+        self.complete = False # False if the scan was stopped early
+        self._names = bytearray()
+        self._offsets = array("q", [0, 0]) # name i is _names[_offsets[i]:_offsets[i + 1]]
+        self._parents = array("i", [-1])
+        self._sizes = array("q", [0])
+        self._dir_flags = bytearray(b"\1")
+        self._dirs = {b"": 0} # Relative path -> index, folders only
+        self._totals = None
+        self._items = None
+        self._children = None
+        self._sorted = set()
+
+    def __len__(self):
+        return len(self._parents)
+
+    def add(self, path, is_dir, size):
+        """Records one entry; path is its bytes path relative to the root (b'' is the root)."""
+        if is_dir:
+            idx = self._dirs.get(path)
+            if idx is not None: # Created earlier as the parent of an entry seen first
+                self._sizes[idx] = size
+                return idx
+        parent_path, _, name = path.rpartition(b"/")
+        parent = self._dirs.get(parent_path)
+        if parent is None: parent = self.add(parent_path, True, 0)
+        idx = len(self._parents)
+        self._names += name
+        self._offsets.append(len(self._names))
+        self._parents.append(parent)
+        self._sizes.append(size)
+        self._dir_flags.append(1 if is_dir else 0)
+        if is_dir: self._dirs[path] = idx
+        return idx
+
+    def rollup(self):
+        """Computes folder totals and item counts; call once all entries are added."""
+        count = len(self._parents)
+        totals = array("q", self._sizes)
+        items = array("i", bytes(4 * count))
+        parents = self._parents
+        children = {}
+        # Children have higher indices than their parents, so one backward pass sums every level
+        for i in range(count - 1, 0, -1):
+            p = parents[i]
+            totals[p] += totals[i]
+            items[p] += items[i] + 1
+        for i in range(1, count):
+            p = parents[i]
+            group = children.get(p)
+            if group is None: children[p] = group = array("i")
+            group.append(i)
+        self._totals, self._items, self._children = totals, items, children
+        self._sorted = set()
+        self._dirs = None # Only needed while adding
+
+    def children(self, idx):
+        """Indices of the entries directly in folder idx, largest first."""
+        group = self._children.get(idx)
+        if group is None: return []
+        if idx not in self._sorted:
+            totals = self._totals
+            group = array("i", sorted(group, key=lambda i: -totals[i]))
+            self._children[idx] = group
+            self._sorted.add(idx)
+        return group
+
+    def name(self, idx):
+        return self._names[self._offsets[idx]:self._offsets[idx + 1]].decode("utf-8", errors="replace")
+
+    def parent(self, idx):
+        return self._parents[idx]
+
+    def is_dir(self, idx):
+        return bool(self._dir_flags[idx])
+
+    def size(self, idx):
+        """Total size: the entry's own size plus, for folders, everything below it."""
+        return self._totals[idx]
+
+    def items(self, idx):
+        """Number of entries below a folder, at any depth."""
+        return self._items[idx]
+
+    def percent(self, idx):
+        """Share of the parent folder's total, 0-100."""
+        parent = self._parents[idx]
+        if parent < 0: return 100.0
+        total = self._totals[parent]
+        return self._totals[idx] * 100.0 / total if total else 0.0
+
+    def path(self, idx):
+        """Absolute remote path of entry idx."""
+        parts = []
+        while idx > 0:
+            parts.append(self.name(idx))
+            idx = self._parents[idx]
+        if not parts: return self.root
+        prefix = "" if self.root == "/" else self.root
+        return prefix + "/" + "/".join(reversed(parts))
+
+
+class DiskUsageScan(_ParallelTreeOp):
+    """
+    Reads the sizes of everything under a remote folder into a UsageTree.
+    One 'find' on an exec channel streams every entry, so the whole scan is
+    a single round trip; servers without exec or GNU find are walked over
+    SFTP with parallel channels instead. one_filesystem keeps find from
+    crossing into other mounts (like du -x).
+    """
+    def __init__(self, ssh_client, root, one_filesystem=True, workers=USAGE_WORKERS):
+        super().__init__(ssh_client, workers, window=1)
+        self.tree = UsageTree(root)
+        self.root = self.tree.root
+        self.one_filesystem = one_filesystem
+        self.method = None # "find" or "sftp", once known
+        self.bytes = 0
+        self._on_progress = None
+        self._last_progress = 0
+
+    def run(self, on_progress=None, is_cancelled=None):
+        """
+        Blocks until the scan ends and returns the rolled-up tree.
+        on_progress(entries, bytes) is called from worker threads now and then.
+        If is_cancelled() becomes true the entries read so far are still
+        rolled up into self.tree (with complete False) before
+        OperationCancelled is raised.
+        """
+        self._start(None, is_cancelled)
+        self._on_progress = on_progress
+        if not self._run_find():
+            self.method = "sftp"
+            try:
+                self._run_walk()
+            except OperationCancelled:
+                pass
+        self.tree.complete = not self._is_cancelled()
+        self.tree.rollup()
+        if on_progress: on_progress(len(self.tree), self.bytes)
+        if self._is_cancelled(): raise OperationCancelled()
+        return self.tree
+
+    def _add(self, path, is_dir, size):
+        with self._lock:
+            self.tree.add(path, is_dir, size)
+            self.bytes += size
+            self.done += 1
+            if self.done & 1023 or not self._on_progress: return
+            now = time.monotonic()
+            if now - self._last_progress < USAGE_PROGRESS_INTERVAL: return
+            self._last_progress = now
+        self._on_progress(self.done, self.bytes)
+
+    # find over exec
+
+    def _run_find(self):
+        """Returns False if find is unusable here, so the caller falls back to SFTP."""
+        xdev = " -xdev" if self.one_filesystem else ""
+        command = f"LC_ALL=C find {shlex.quote(self.root)}{xdev} -printf {shlex.quote(USAGE_FORMAT)}"
+        try:
+            channel = self.ssh_client.open_exec(command)
+        except Exception as e:
+            logging.info(f"Disk usage: exec unavailable ({e}), walking over SFTP")
+            return False
+        self.method = "find"
+
+        def on_record(record):
+            try:
+                kind, size, path = record.split(b" ", 2)
+                self._add(path, kind == b"d", int(size))
+            except ValueError:
+                pass
+        status, err = stream_records(channel, b"\0", on_record, self._is_cancelled)
+        if status is None or status == 0 or self.done: return True
+        lines = [l for l in err.decode("utf-8", errors="replace").splitlines() if l.strip()]
+        logging.info(f"Disk usage: find failed with status {status} ({' '.join(lines)[:200]}), walking over SFTP")
+        return False
+
+    # SFTP fallback
+
+    def _run_walk(self):
+        def relative(path):
+            return path[len(self.root):].lstrip("/").encode("utf-8", errors="replace")
+
+        def _on_dir(pipe, path, attr, depth):
+            # Nothing is pipelined on this channel, so a plain lstat of the root is safe here.
+            if attr is None: attr = pipe.sftp.lstat(path)
+            self._add(relative(path), True, attr.st_size or 0)
+
+        self._walk([self.root], _on_dir, lambda pipe, path, attr: self._add(relative(path), False, attr.st_size or 0))
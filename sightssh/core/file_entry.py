@@ -0,0 +1,180 @@
+import os
+import re
+import stat
+import math
+import fnmatch
+import datetime
+
+_DIGITS = re.compile(r"\d+")
+SORT_COLUMNS = ("name", "size", "type", "modified", "permissions", "owner", "group")
+
+
+def format_size(size):
+    if size == 0: return "0 B"
+    size_name = ("B", "KB", "MB", "GB", "TB")
+    i = int(math.floor(math.log(size, 1024)))
+    p = math.pow(1024, i)
+    s = round(size / p, 2)
+    return "%s %s" % (s, size_name[i])
+
+
+def format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
+
+
+def format_perms(mode):
+    return stat.filemode(mode)
+
+
+def _number_key(match):
+    digits = match.group().lstrip("0") or "0"
+    # A longer number is a bigger number: prefix the digit count, then the digits compare as text
+    return "\x01" + chr(len(digits)) + digits
+
+
+def natural_key(name):
+    """
+    Case-insensitive key that orders embedded numbers by value (file2 < file10).
+    It is a plain string, so sorting compares keys in C.
+    """
+    return _DIGITS.sub(_number_key, name.casefold())
+
+
+class FileEntry:
+    """
+    One row of a file pane. Only raw values are kept; column text is built
+    when a row is drawn, so large directories cost one small record per entry.
+    """
+    __slots__ = ("name", "is_dir", "size", "mtime", "mode", "uid", "gid", "dir_size", "_name_key")
+
+    def __init__(self, name, is_dir, size=None, mtime=None, mode=None, uid=None, gid=None):
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        self.mode = mode
+        self.uid = uid
+        self.gid = gid
+        self.dir_size = None # Total size of a folder's contents, once calculated
+        self._name_key = None
+
+    @classmethod
+    def parent(cls):
+        return cls("..", True)
+
+    @classmethod
+    def from_sftp(cls, attr):
+        return cls(attr.filename, stat.S_ISDIR(attr.st_mode or 0), attr.st_size, attr.st_mtime,
+                   attr.st_mode, attr.st_uid, attr.st_gid)
+
+    @classmethod
+    def from_stat(cls, name, st):
+        return cls(name, stat.S_ISDIR(st.st_mode), st.st_size, st.st_mtime, st.st_mode)
+
+    @property
+    def name_key(self):
+        """natural_key(name), computed once so re-sorting a pane costs no string work."""
+        if self._name_key is None: self._name_key = natural_key(self.name)
+        return self._name_key
+
+    @property
+    def display_name(self):
+        """Name as shown in the list; folders are bracketed."""
+        return f"[{self.name}]" if self.is_dir else self.name
+
+    def column_text(self, key, id_names=None):
+        """Text of one cell; owner and group names come from id_names (an IdNameMap) if given."""
+        if key == "name": return self.display_name
+        if self.name == "..":
+            return "DIR" if key == "type" else ""
+        if key == "size":
+            if self.is_dir: return format_size(self.dir_size) if self.dir_size is not None else ""
+            return format_size(self.size) if self.size is not None else ""
+        if key == "type":
+            if self.is_dir: return "DIR"
+            return "FILE" if self.mode is not None else ""
+        if key == "modified":
+            return format_time(self.mtime) if self.mtime is not None else ""
+        if key == "permissions":
+            return format_perms(self.mode) if self.mode is not None else ""
+        if key == "owner":
+            if id_names: return id_names.user(self.uid)
+            return str(self.uid) if self.uid is not None else ""
+        if key == "group":
+            if id_names: return id_names.group(self.gid)
+            return str(self.gid) if self.gid is not None else ""
+        return ""
+
+
+def make_name_filter(pattern):
+    """
+    Name predicate for a pane filter, or None for an empty pattern. Plain text
+    matches anywhere in the name, a pattern with * ? or [ is a glob over the
+    whole name, and "re:" starts a regular expression. Case is ignored.
+    Raises re.error for a bad regular expression.
+    """
+    if not pattern: return None
+    if pattern.startswith("re:"):
+        regex = re.compile(pattern[3:], re.IGNORECASE)
+        return lambda name: regex.search(name) is not None
+    if any(c in pattern for c in "*?["):
+        regex = re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+        return lambda name: regex.match(name) is not None
+    text = pattern.casefold()
+    return lambda name: text in name.casefold()
+
+
+# Raw values only; entries missing a value sort as 0 / ""
+_SORT_VALUES = {
+    "size": lambda e: e.size or 0,
+    "type": lambda e: e.is_dir, # The column shows DIR / FILE
+    "modified": lambda e: e.mtime or 0,
+    "permissions": lambda e: e.mode or 0,
+    "owner": lambda e: e.uid if e.uid is not None else -1,
+    "group": lambda e: e.gid if e.gid is not None else -1,
+}
+
+
+def sort_entries(entries, column="name", descending=False, id_names=None):
+    """
+    Sorts in place and returns entries: folders first, then files, each
+    group by `column` (one of SORT_COLUMNS) with the natural name order
+    breaking ties. Folders sort by their calculated size, if any. With
+    id_names (an IdNameMap), owner and group sort by the names shown.
+    """
+    value = _SORT_VALUES.get(column)
+    if id_names and column == "owner":
+        value = lambda e: natural_key(id_names.user(e.uid))
+    elif id_names and column == "group":
+        value = lambda e: natural_key(id_names.group(e.gid))
+    folders = [e for e in entries if e.is_dir]
+    files = [e for e in entries if not e.is_dir]
+    for group in (folders, files):
+        # Two stable passes are cheaper than building a (value, name) tuple per entry
+        group.sort(key=lambda e: e.name_key, reverse=descending)
+        if column == "size" and group is folders:
+            group.sort(key=lambda e: -1 if e.dir_size is None else e.dir_size, reverse=descending)
+        elif value:
+            group.sort(key=value, reverse=descending)
+    entries[:] = folders + files
+    return entries
+
+
+def scan_local(path, show_hidden=True):
+    """
+    Yields FileEntry records for a local folder. With os.scandir each entry
+    costs at most one stat (none on Windows, where DirEntry caches the stat
+    data from the directory read).
+    """
+    with os.scandir(path) as it:
+        for de in it:
+            if not show_hidden and de.name.startswith("."): continue
+            try:
+                yield FileEntry.from_stat(de.name, de.stat())
+            except OSError:
+                # e.g. a broken symlink; the type from the directory read is still cached
+                yield FileEntry(de.name, de.is_dir())
+
+
+def list_local(path, show_hidden=True):
+    return sort_entries(list(scan_local(path, show_hidden)))
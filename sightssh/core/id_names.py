@@ -0,0 +1,68 @@
+import logging
+
+# One exec for both tables; a blank line separates them (entries always contain ':').
+# Falls back to the files for systems without getent.
+LOAD_COMMAND = "getent passwd || cat /etc/passwd; echo; getent group || cat /etc/group"
+
+
+def parse_id_table(text):
+    """{id: name} from passwd/group format lines (name:x:id:...)."""
+    names = {}
+    for line in text.splitlines():
+        fields = line.split(":")
+        if len(fields) < 3 or line.startswith("#"): continue
+        try:
+            names.setdefault(int(fields[2]), fields[0])
+        except ValueError:
+            pass
+    return names
+
+
+class IdNameMap:
+    """
+    uid/gid to name tables for one connection, so listings keep numeric IDs
+    and owner/group names are looked up only when a row is drawn. Unknown IDs
+    (or tables not loaded yet) show as numbers. load() replaces both tables
+    at once, so readers on the UI thread never see a half-filled map.
+    """
+    def __init__(self):
+        self.users = {}
+        self.groups = {}
+
+    def user(self, uid):
+        if uid is None: return ""
+        return self.users.get(uid) or str(uid)
+
+    def group(self, gid):
+        if gid is None: return ""
+        return self.groups.get(gid) or str(gid)
+
+    def load(self, ssh_client):
+        """Reads the server's user and group tables with one exec; returns True if anything was loaded."""
+        try:
+            _, out, _ = ssh_client.run_command(LOAD_COMMAND)
+        except Exception as e:
+            logging.debug(f"getent failed: {e}")
+            return False
+        passwd, _, group = out.partition("\n\n")
+        return self._set(parse_id_table(passwd), parse_id_table(group))
+
+    def load_files(self, sftp):
+        """Fallback for accounts without exec (SFTP-only): reads /etc/passwd and /etc/group."""
+        try:
+            users = parse_id_table(self._read(sftp, "/etc/passwd"))
+            groups = parse_id_table(self._read(sftp, "/etc/group"))
+        except IOError as e:
+            logging.debug(f"Reading user and group tables failed: {e}")
+            return False
+        return self._set(users, groups)
+
+    def _set(self, users, groups):
+        if not users and not groups: return False
+        self.users, self.groups = users, groups
+        return True
+
+    @staticmethod
+    def _read(sftp, path):
+        with sftp.open(path, "r") as f:
+            return f.read().decode("utf-8", errors="replace")
@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import select
+import struct
+import logging
+import threading
+
+DEBOUNCE = 0.3 # Quiet time before changes are reported
+MAX_DELAY = 1.0 # Report at least this often during a continuous event storm
+MAX_NAMES = 500 # More changed names than this are reported as "rescan everything"
+POLL_INTERVAL = 2.0
+POLL_MAX_ENTRIES = 10000 # Bigger folders are polled by their own mtime only
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+RESCAN_MASK = IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+
+def _inotify_libc():
+    global _libc
+    if _libc is None and sys.platform.startswith("linux"):
+        try:
+            import ctypes, ctypes.util
+            _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            _libc.inotify_init1 # Make sure the symbols exist
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+class EventBatcher:
+    """
+    Debounces change events from a watcher thread. start() runs the watch
+    loop run() on that thread; the loop calls _note(name) per event (None
+    means "list everything again") and _flush() once _flush_due() says the
+    burst is over. on_changes receives a set of names or None.
+    """
+    def __init__(self, on_changes, run, debounce=DEBOUNCE):
+        self.on_changes = on_changes
+        self.run = run
+        self.debounce = debounce
+        self._stop = threading.Event()
+        self._pending = set()
+        self._rescan = False
+        self._first_event = None
+        self._last_event = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _note(self, name):
+        now = time.monotonic()
+        if self._first_event is None: self._first_event = now
+        self._last_event = now
+        if name is None or len(self._pending) >= MAX_NAMES:
+            self._rescan = True
+        else:
+            self._pending.add(name)
+
+    def _flush_due(self):
+        if self._first_event is None: return False
+        now = time.monotonic()
+        return now - self._last_event >= self.debounce or now - self._first_event >= MAX_DELAY
+
+    def _flush(self):
+        names = None if self._rescan else self._pending
+        self._pending, self._rescan = set(), False
+        self._first_event = self._last_event = None
+        if not self._stop.is_set(): self.on_changes(names)
+
+
+class LocalWatcher(EventBatcher):
+    """
+    Watches one local folder (not its subfolders) and reports changed entry
+    names in debounced batches: on_changes(names) with a set of names that
+    were created, deleted, renamed or modified, or on_changes(None) when the
+    whole folder should be listed again (event overflow, very large batches,
+    the folder itself moved away). Uses inotify on Linux and polling elsewhere.
+    Callbacks run on the watcher thread.
+    """
+    def __init__(self, path, on_changes, debounce=DEBOUNCE, poll_interval=POLL_INTERVAL):
+        super().__init__(on_changes, self._run, debounce)
+        self.path = path
+        self.poll_interval = poll_interval
+
+    def _run(self):
+        try:
+            libc = _inotify_libc()
+            if libc and self._run_inotify(libc): return
+            self._run_polling()
+        except Exception as e:
+            logging.debug(f"Watching {self.path} stopped: {e}")
+
+    # inotify
+
+    def _run_inotify(self, libc):
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0: return False
+        try:
+            if libc.inotify_add_watch(fd, os.fsencode(self.path), WATCH_MASK) < 0:
+                return False # e.g. out of watches; polling still works
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], self.debounce if self._first_event else 0.5)
+                if ready:
+                    try:
+                        self._parse(os.read(fd, 65536))
+                    except BlockingIOError:
+                        pass
+                if self._flush_due(): self._flush()
+            return True
+        finally:
+            os.close(fd)
+
+    def _parse(self, data):
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & RESCAN_MASK:
+                self._note(None)
+            elif name:
+                self._note(os.fsdecode(name))
+
+    # Polling fallback
+
+    def _snapshot(self):
+        """{name: (mtime_ns, size, is_dir)}, or None if the folder is too big to compare entry by entry."""
+        entries = {}
+        with os.scandir(self.path) as it:
+            for de in it:
+                if len(entries) >= POLL_MAX_ENTRIES: return None
+                try:
+                    st = de.stat()
+                    entries[de.name] = (st.st_mtime_ns, st.st_size, de.is_dir())
+                except OSError:
+                    entries[de.name] = None
+        return entries
+
+    def _run_polling(self):
+        dir_mtime = os.stat(self.path).st_mtime_ns
+        before = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if before is None:
+                    # Too big to diff: only creates/deletes/renames (folder mtime) are noticed
+                    if mtime != dir_mtime: self._note(None)
+                else:
+                    after = self._snapshot()
+                    if after is None:
+                        self._note(None)
+                    else:
+                        for name in set(before) | set(after):
+                            if before.get(name) != after.get(name): self._note(name)
+                    before = after
+                dir_mtime = mtime
+            except OSError:
+                self._note(None)
+            if self._first_event is not None: self._flush()
@@ -0,0 +1,129 @@
+import stat
+import queue
+import logging
+import threading
+
+from sightssh.core.remote_ops import OperationCancelled
+from sightssh.core.sftp_pipeline import PipelinedReader
+
+RELAY_CHUNK_SIZE = 32768
+RELAY_BUFFERS = 256 # At most RELAY_CHUNK_SIZE * RELAY_BUFFERS bytes queued (8 MB), and as much in flight
+
+_EOF = object()
+
+
+class HostRelay:
+    """
+    Streams files from one SFTP session straight into another.
+    A reader thread pulls chunks from the source host into a bounded queue
+    while the calling thread writes them to the destination host, so reading
+    and writing overlap and nothing touches the local disk. Throughput is
+    limited by the slower of the two links.
+    """
+    def __init__(self, src_sftp, dst_sftp, chunk_size=RELAY_CHUNK_SIZE, max_buffers=RELAY_BUFFERS):
+        self.src = src_sftp
+        self.dst = dst_sftp
+        self.chunk_size = chunk_size
+        self.max_buffers = max_buffers
+
+    def copy_file(self, src_path, dst_path, callback=None, is_cancelled=None):
+        """
+        Copies one file. callback(transferred, total); is_cancelled() aborts
+        both sides and raises OperationCancelled. A cancelled or failed copy
+        removes the partial destination file.
+        """
+        pipe = queue.Queue(maxsize=self.max_buffers)
+        abort = threading.Event()
+        reader_error = []
+
+        with self.src.open(src_path, 'rb') as fr:
+            total = fr.stat().st_size
+            # At most max_buffers reads in flight, so the source can never be ahead
+            # by more than the queue holds again.
+            source = PipelinedReader(fr, total, self.max_buffers, self.chunk_size)
+
+            def _reader():
+                try:
+                    while not abort.is_set():
+                        data = source.read()
+                        if not data: break
+                        # Block while the writer is behind, but wake up regularly to notice an abort.
+                        while not abort.is_set():
+                            try:
+                                pipe.put(data, timeout=0.2)
+                                break
+                            except queue.Full:
+                                continue
+                except Exception as e:
+                    reader_error.append(e)
+                finally:
+                    pipe.put(_EOF)
+
+            reader = threading.Thread(target=_reader, daemon=True)
+            reader.start()
+
+            created = False
+            try:
+                with self.dst.open(dst_path, 'wb') as fw:
+                    created = True
+                    fw.set_pipelined(True)
+                    done = 0
+                    while True:
+                        if is_cancelled and is_cancelled():
+                            raise OperationCancelled()
+                        data = pipe.get()
+                        if data is _EOF: break
+                        fw.write(data)
+                        done += len(data)
+                        if callback: callback(done, total)
+                if reader_error:
+                    raise reader_error[0]
+            except BaseException:
+                if created: self._discard(dst_path)
+                raise
+            finally:
+                abort.set()
+                # Drain so a reader blocked on put() can finish.
+                while reader.is_alive():
+                    try: pipe.get(timeout=0.2)
+                    except queue.Empty: pass
+                reader.join()
+
+        try:
+            self.dst.chmod(dst_path, self.src.stat(src_path).st_mode & 0o7777)
+        except Exception as e:
+            logging.debug(f"Relay: could not copy mode of {src_path}: {e}")
+
+    def _discard(self, dst_path):
+        try:
+            self.dst.remove(dst_path)
+        except Exception as e:
+            logging.debug(f"Relay: could not remove partial {dst_path}: {e}")
+
+    def copy_tree(self, src_path, dst_path, on_file=None, callback=None, is_cancelled=None):
+        """
+        Copies a file or directory tree. Returns the number of files copied.
+        on_file(name) is called before each file starts.
+        """
+        attr = self.src.stat(src_path)
+        if not stat.S_ISDIR(attr.st_mode):
+            if on_file: on_file(src_path.rsplit("/", 1)[-1])
+            self.copy_file(src_path, dst_path, callback, is_cancelled)
+            return 1
+
+        count = 0
+        try:
+            self.dst.mkdir(dst_path)
+        except IOError:
+            pass # Already exists: merge into it
+        for child in self.src.listdir_attr(src_path):
+            if is_cancelled and is_cancelled(): raise OperationCancelled()
+            s_path = src_path + "/" + child.filename
+            d_path = dst_path + "/" + child.filename
+            if stat.S_ISDIR(child.st_mode):
+                count += self.copy_tree(s_path, d_path, on_file, callback, is_cancelled)
+            else:
+                if on_file: on_file(child.filename)
+                self.copy_file(s_path, d_path, callback, is_cancelled)
+                count += 1
+        return count
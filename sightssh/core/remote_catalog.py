@@ -0,0 +1,220 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import posixpath
+import threading
+
+from sightssh.core.file_entry import FileEntry
+from sightssh.core.remote_ops import TreeEnumerator
+
+CATALOG_MAX_ENTRIES = 1000000
+CATALOG_REFRESH_HOURS = 24 # Full rescan interval; 0 rescans only on request
+CATALOG_SEARCH_LIMIT = 500
+CATALOG_START_DELAY = 30 # Seconds after connecting before a due rescan starts
+_TRIGRAM = 3 # Shortest query the trigram index can answer
+_PRUNE_EXCLUDES = 100 # More unreadable folders than this and a scan does not prune at all
+
+
+def catalog_path(config_dir, details):
+    """Database file for one profile, named by a hash so any profile or host name makes a valid file name."""
+    key = f"{details.get('name')}|{details.get('username')}@{details.get('host')}:{details.get('port')}"
+    return os.path.join(config_dir, "catalogs", hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".sqlite")
+
+
+def _subtree_range(path):
+    """(low, high) bounds such that low <= p < high holds exactly for paths below `path`."""
+    prefix = path.rstrip("/") + "/"
+    return prefix, prefix[:-1] + "0" # '0' sorts right after '/'
+
+
+class CatalogHit:
+    """One catalogued entry: absolute path, folder flag, size, mtime and when it was last seen on the server."""
+    __slots__ = ("path", "is_dir", "size", "mtime", "seen")
+
+    def __init__(self, path, is_dir, size, mtime, seen):
+        self.path = path
+        self.is_dir = bool(is_dir)
+        self.size = size
+        self.mtime = mtime
+        self.seen = seen
+
+    @property
+    def name(self):
+        return posixpath.basename(self.path) or self.path
+
+
+class RemoteCatalog:
+    """
+    Local SQLite catalog of one server's file names, so files can be found
+    without walking or searching the server again. It is filled by full
+    scans (one streamed tree listing, see refresh) and kept current from
+    the folders the user browses (update_folder). Every row remembers when
+    it was last seen on the server, which is how stale entries are shown.
+    Names are indexed with an FTS5 trigram table, so any part of a name
+    matches; SQLite builds without it fall back to a LIKE scan.
+    One connection is shared between threads behind a lock.
+    """
+    def __init__(self, path, max_entries=CATALOG_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.truncated = False # The last scan stopped at max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, name TEXT NOT NULL,
+                is_dir INTEGER NOT NULL, size INTEGER, mtime INTEGER, seen REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.fts = self._create_fts()
+        self.count = self._conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+
+    def _create_fts(self):
+        try:
+            self._conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(
+                    name, content='entries', content_rowid='id', tokenize='trigram');
+                CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+                    INSERT INTO names(rowid, name) VALUES (new.id, new.name); END;
+                CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+                    INSERT INTO names(names, rowid, name) VALUES ('delete', old.id, old.name); END;
+            """)
+            return True
+        except sqlite3.OperationalError as e: # No FTS5, or SQLite older than 3.34 (trigram)
+            logging.info(f"Catalog: full-text index unavailable ({e}), searching with LIKE")
+            return False
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Reading
+
+    def search(self, text, limit=CATALOG_SEARCH_LIMIT):
+        """Entries whose name contains text (case-insensitive), folders first."""
+        text = text.strip()
+        if not text: return []
+        columns = "e.path, e.is_dir, e.size, e.mtime, e.seen"
+        if self.fts and len(text) >= _TRIGRAM:
+            query = f"SELECT {columns} FROM names JOIN entries e ON e.id = names.rowid WHERE names MATCH ? " \
+                    f"ORDER BY e.is_dir DESC, e.path LIMIT ?"
+            args = ('"' + text.replace('"', '""') + '"', limit)
+        else:
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query = f"SELECT {columns} FROM entries e WHERE e.name LIKE ? ESCAPE '\\' ORDER BY e.is_dir DESC, e.path LIMIT ?"
+            args = (f"%{escaped}%", limit)
+        with self._lock:
+            return [CatalogHit(*row) for row in self._conn.execute(query, args)]
+
+    def complete(self, prefix, limit=CATALOG_SEARCH_LIMIT):
+        """Entries whose path starts with prefix (for typing a path to jump to), in path order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, is_dir, size, mtime, seen FROM entries WHERE path >= ? AND path < ? ORDER BY path LIMIT ?",
+                (prefix, prefix + "\U0010ffff", limit))
+            return [CatalogHit(*row) for row in rows]
+
+    def lookup(self, path):
+        with self._lock:
+            row = self._conn.execute("SELECT path, is_dir, size, mtime, seen FROM entries WHERE path = ?", (path,)).fetchone()
+        return CatalogHit(*row) if row else None
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    @property
+    def last_scan(self):
+        """Start time of the last finished full scan, or None."""
+        value = self.get_meta("last_scan")
+        return float(value) if value else None
+
+    def needs_refresh(self, hours):
+        if hours <= 0: return self.last_scan is None
+        last = self.last_scan
+        return last is None or time.time() - last >= hours * 3600
+
+    # Writing
+
+    def add_entries(self, entries, seen=None):
+        """
+        Inserts or updates FileEntry records named by absolute path. The
+        catalog never holds more than max_entries rows; once it is full, only
+        rows it already has are updated.
+        self.count follows the rows each statement changed, rather than being
+        counted again after every batch.
+        """
+        seen = seen or time.time()
+        rows = [(e.name, posixpath.basename(e.name), int(e.is_dir), e.size, e.mtime, seen) for e in entries]
+        with self._lock, self._conn:
+            # Never more rows than there is room for: rowcount counts the new rows
+            # only, so rows already there leave their room to the next slice.
+            done = inserted = 0
+            while done < len(rows) and self.count < self.max_entries:
+                batch = rows[done:done + self.max_entries - self.count]
+                added = self._conn.executemany(
+                    "INSERT OR IGNORE INTO entries (path, name, is_dir, size, mtime, seen) VALUES (?, ?, ?, ?, ?, ?)",
+                    batch).rowcount
+                self.count += added
+                inserted += added
+                done += len(batch)
+            if inserted == len(rows): return # All new, as in a first scan
+            if done < len(rows): self.truncated = True
+            # Rows just inserted already hold these values and are not written again
+            self._conn.executemany(
+                "UPDATE entries SET is_dir = ?, size = ?, mtime = ?, seen = ? "
+                "WHERE path = ? AND (is_dir, size, mtime, seen) IS NOT (?, ?, ?, ?)",
+                [(d, s, m, t, p, d, s, m, t) for p, _, d, s, m, t in rows])
+
+    def update_folder(self, folder, entries):
+        """
+        Replaces what the catalog knows about one folder's direct contents
+        with a fresh listing (FileEntry records named by name). Entries that
+        are gone are dropped together with everything catalogued below them.
+        """
+        folder = posixpath.normpath(folder)
+        low, high = _subtree_range(folder)
+        names = {e.name for e in entries}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM entries WHERE path >= ? AND path < ? AND instr(substr(path, ?), '/') = 0",
+                (low, high, len(low) + 1)).fetchall()
+        gone = [path for (path,) in rows if path[len(low):] not in names]
+        if gone:
+            with self._lock, self._conn:
+                for path in gone:
+                    cursor = self._conn.execute("DELETE FROM entries WHERE path = ? OR (path >= ? AND path < ?)",
+                                                (path, *_subtree_range(path)))
+                    self.count -= cursor.rowcount
+        self.add_entries([FileEntry(low + e.name, e.is_dir, e.size, e.mtime) for e in entries if e.name not in (".", "..")])
+
+    def refresh(self, ssh_client, root, progress=None, is_cancelled=None):
+        """
+        Rescans everything below root with one streamed tree listing (see
+        TreeEnumerator) and drops catalogued entries that were not seen again.
+        progress(count) is called as entries arrive. Raises OperationCancelled.
+        """
+        root = posixpath.normpath(root)
+        started = time.time()
+        self.truncated = False
+        lister = TreeEnumerator(ssh_client, one_filesystem=True)
+        lister.scan([root], progress, is_cancelled, on_batch=lambda batch: self.add_entries(batch, started))
+        if lister.errors: logging.info(f"Catalog: {len(lister.errors)} folders unreadable, first: {lister.errors[0]}")
+        with self._lock, self._conn:
+            # Whatever under root was not seen again is gone from the server, except below
+            # folders that could not be read this time; a truncated scan proves nothing.
+            if not self.truncated and len(lister.errors) <= _PRUNE_EXCLUDES:
+                query = "DELETE FROM entries WHERE path >= ? AND path < ? AND seen < ?"
+                args = [*_subtree_range(root), started]
+                for path, _ in lister.errors:
+                    query += " AND NOT (path >= ? AND path < ?)"
+                    args.extend(_subtree_range(path))
+                self.count -= self._conn.execute(query, args).rowcount
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_scan', ?)", (str(started),))
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('scan_root', ?)", (root,))
@@ -0,0 +1,174 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from sightssh.core.file_entry import FileEntry, sort_entries
+
+LISTING_TTL = 30 # Seconds a cached listing is shown without asking the server
+LISTING_CACHE_ENTRIES = 200000 # Total entries kept across all cached folders
+LISTING_FIRST_BATCH = 64 # Entries shown before the rest of a streamed listing arrives
+LISTING_BATCH = 2000
+PREFETCH_WORKERS = 2 # Folders read ahead at the same time
+PREFETCH_MAX_ENTRIES = 5000 # Bigger folders are not kept by the prefetcher
+PREFETCH_CACHE_ENTRIES = 20000
+
+
+def fetch_listing(sftp, path):
+    """Lists a remote folder as sorted FileEntry records (hidden files included)."""
+    return sort_entries([FileEntry.from_sftp(attr) for attr in sftp.listdir_attr(path)
+                         if attr.filename not in ('.', '..')])
+
+
+def listing_signature(entries):
+    """What a revalidation compares: a changed name, size, time or mode means a changed folder."""
+    return frozenset((e.name, e.size, e.mtime, e.mode) for e in entries)
+
+
+def parent_path(path):
+    if path in ("", "/"): return "/"
+    return path.rstrip("/").rsplit("/", 1)[0] or "/"
+
+
+class ListingCache:
+    """
+    Remote folder listings for one session, keyed by absolute path.
+    Listings expire after `ttl` seconds; the least recently used ones are
+    dropped once the cache holds more than `max_entries` entries in total.
+    Thread-safe: background revalidation and prefetch fill it too.
+    """
+    def __init__(self, ttl=LISTING_TTL, max_entries=LISTING_CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict() # path -> (fetched_at, entries)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.version = 0 # Bumped by every invalidation; see put()
+
+    def get(self, path):
+        """The cached entries for path, or None if missing or expired."""
+        with self._lock:
+            item = self._data.get(path)
+            if item is None: return None
+            fetched_at, entries = item
+            if time.monotonic() - fetched_at > self.ttl:
+                self._drop(path)
+                return None
+            self._data.move_to_end(path)
+            return entries
+
+    def put(self, path, entries, version=None):
+        """
+        Stores a listing. Pass the `version` read before the listing started so
+        a result that raced with an invalidation is not kept.
+        """
+        with self._lock:
+            if version is not None and version != self.version: return
+            self._drop(path)
+            self._data[path] = (time.monotonic(), entries)
+            self._size += len(entries)
+            while self._size > self.max_entries and len(self._data) > 1:
+                self._drop(next(iter(self._data)))
+
+    def invalidate(self, path, recursive=False):
+        with self._lock:
+            self.version += 1
+            self._drop(path)
+            if recursive:
+                prefix = path.rstrip("/") + "/"
+                for key in [k for k in self._data if k.startswith(prefix)]:
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._data.clear()
+            self._size = 0
+
+    def __contains__(self, path):
+        return self.get(path) is not None
+
+    def _drop(self, path):
+        item = self._data.pop(path, None)
+        if item: self._size -= len(item[1])
+
+
+class ListingPrefetcher:
+    """
+    Reads folders the user is likely to open next (the focused folder and its
+    neighbours) on SFTP channels of its own, into a small cache of its own,
+    so user-triggered requests never wait behind it. At most `workers`
+    folders are read at once; a new request replaces queued paths that have
+    not started yet.
+    """
+    def __init__(self, ssh_client, main_cache, workers=PREFETCH_WORKERS, max_entries=PREFETCH_MAX_ENTRIES):
+        self.ssh_client = ssh_client
+        self.main_cache = main_cache
+        self.workers = workers
+        self.max_entries = max_entries
+        self.cache = ListingCache(max_entries=PREFETCH_CACHE_ENTRIES)
+        self._pending = []
+        self._in_flight = set()
+        self._threads = []
+        self._stopped = False
+        self._cond = threading.Condition()
+
+    def request(self, paths):
+        """Queues paths, most wanted first, dropping those already known."""
+        paths = [p for p in paths if p not in self.main_cache and p not in self.cache]
+        with self._cond:
+            if self._stopped: return
+            self._pending = [p for p in paths if p not in self._in_flight]
+            if self._pending and len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._worker, daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify_all()
+
+    def take(self, path):
+        """A prefetched listing for path (removed from this cache), or None."""
+        entries = self.cache.get(path)
+        if entries is not None: self.cache.invalidate(path)
+        return entries
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending = []
+            self._cond.notify_all()
+
+    def _worker(self):
+        sftp = None
+        try:
+            while True:
+                with self._cond:
+                    while not self._pending and not self._stopped:
+                        self._cond.wait()
+                    if self._stopped: return
+                    path = self._pending.pop(0)
+                    self._in_flight.add(path)
+                try:
+                    if sftp is None: sftp = self.ssh_client.open_sftp()
+                    if not self._fetch(sftp, path):
+                        # Abandoned mid-listing: read-aheads are still in flight on this channel
+                        sftp.close()
+                        sftp = None
+                except Exception as e:
+                    logging.debug(f"Prefetch of {path} failed: {e}")
+                finally:
+                    with self._cond:
+                        self._in_flight.discard(path)
+        finally:
+            if sftp:
+                try: sftp.close()
+                except: pass
+
+    def _fetch(self, sftp, path):
+        version = self.cache.version
+        entries = []
+        for attr in sftp.listdir_iter(path):
+            if self._stopped or len(entries) >= self.max_entries: return False
+            if attr.filename not in ('.', '..'):
+                entries.append(FileEntry.from_sftp(attr))
+        self.cache.put(path, sort_entries(entries), version)
+        return True
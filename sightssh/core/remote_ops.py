@@ -0,0 +1,595 @@
+import stat
+import time
+import shlex
+import logging
+import threading
+import re
+import queue
+import socket
+
+from paramiko import SFTPAttributes
+from paramiko.sftp import CMD_EXTENDED, CMD_REMOVE, CMD_RMDIR, CMD_SETSTAT, SFTP_OP_UNSUPPORTED, int64
+
+from sightssh.core.sftp_pipeline import SFTPPipeline, request_status
+from sightssh.core.file_entry import FileEntry
+
+POLL_INTERVAL = 0.5
+DELETE_WORKERS = 4
+DELETE_WINDOW = 64
+RECORD_LIMIT = 1 << 20 # Longer exec output records are cut, so one huge line cannot exhaust memory
+# Type, size, mtime, permission bits (octal), absolute path; NUL-terminated because names may contain newlines
+TREE_FORMAT = r"%y %s %T@ %m %p\0"
+_FIND_TYPES = {"d": stat.S_IFDIR, "f": stat.S_IFREG, "l": stat.S_IFLNK, "p": stat.S_IFIFO,
+               "s": stat.S_IFSOCK, "c": stat.S_IFCHR, "b": stat.S_IFBLK}
+_FIND_ERROR = re.compile(r"^find: '(.*)': (.*)$")
+TREE_BATCH = 1000 # Entries per on_batch call of a streamed tree listing
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+class _CopyDataUnsupported(IOError):
+    """The server answered copy-data with SSH_FX_OP_UNSUPPORTED."""
+
+
+class RemoteCopier:
+    """
+    Copies remote files/directories without moving data through the client.
+    Uses the SFTP 'copy-data' extension when the server supports it, and
+    otherwise one 'cp -a' exec on the same transport. Progress is reported
+    by polling the size of the target from a separate channel.
+    """
+    def __init__(self, ssh_client, sftp):
+        self.ssh_client = ssh_client
+        self.sftp = sftp
+        self.copy_data_supported = None # Unknown until the first attempt
+
+    def copy(self, src, dst, progress=None, is_cancelled=None):
+        """
+        Copies src to dst (dst must not exist).
+        progress: callback(copied_bytes, total_bytes), called from a poller thread.
+        is_cancelled: callable returning True to stop (checked between files).
+        """
+        is_dir = stat.S_ISDIR(self.sftp.stat(src).st_mode)
+        try:
+            self.sftp.stat(dst)
+            raise IOError(f"{dst} already exists")
+        except FileNotFoundError:
+            pass
+
+        total = self._measure(src, is_dir)
+        stop = threading.Event()
+        poller = None
+        if progress:
+            poller = threading.Thread(target=self._poll, args=(dst, is_dir, total, progress, stop), daemon=True)
+            poller.start()
+
+        try:
+            if self.copy_data_supported is not False:
+                try:
+                    self._copy_data_tree(src, dst, is_dir, is_cancelled)
+                    self.copy_data_supported = True
+                    return
+                except _CopyDataUnsupported as e:
+                    # Only a missing extension falls back; real errors (no space, no permission) are raised.
+                    logging.info(f"copy-data unavailable, falling back to cp: {e}")
+                    self.copy_data_supported = False
+                    self._discard(dst, is_dir)
+            self._copy_exec(src, dst, is_cancelled)
+        except OperationCancelled:
+            self._discard(dst, is_dir) # No half-copied target is left behind
+            raise
+        finally:
+            stop.set()
+            if poller: poller.join()
+            if progress: progress(total, total)
+
+    # copy-data extension
+
+    def _copy_data_tree(self, src, dst, is_dir, is_cancelled):
+        if not is_dir:
+            self._copy_data_file(src, dst)
+            return
+        self.sftp.mkdir(dst)
+        for attr in self.sftp.listdir_attr(src):
+            if is_cancelled and is_cancelled(): raise OperationCancelled()
+            s_path = src + "/" + attr.filename
+            d_path = dst + "/" + attr.filename
+            if stat.S_ISDIR(attr.st_mode):
+                self._copy_data_tree(s_path, d_path, True, is_cancelled)
+            elif stat.S_ISLNK(attr.st_mode):
+                self.sftp.symlink(self.sftp.readlink(s_path), d_path)
+            else:
+                self._copy_data_file(s_path, d_path, attr.st_mode)
+        self.sftp.chmod(dst, self.sftp.stat(src).st_mode & 0o7777)
+
+    def _copy_data_file(self, src, dst, mode=None):
+        with self.sftp.open(src, 'rb') as fr, self.sftp.open(dst, 'wb') as fw:
+            # paramiko has no public API for extensions; send the raw request.
+            # Arguments: read handle, read offset, length (0 = to EOF), write handle, write offset.
+            code, msg = request_status(self.sftp, CMD_EXTENDED, "copy-data",
+                                       fr.handle, int64(0), int64(0), fw.handle, int64(0))
+            if code == SFTP_OP_UNSUPPORTED: raise _CopyDataUnsupported("copy-data is not supported")
+            self.sftp._convert_status(msg)
+        if mode is not None:
+            self.sftp.chmod(dst, mode & 0o7777)
+
+    def _discard(self, path, is_dir):
+        try:
+            if is_dir:
+                self.ssh_client.run_command(f"rm -rf -- {shlex.quote(path)}")
+            else:
+                self.sftp.remove(path)
+        except Exception: pass
+
+    # exec fallback
+
+    def _copy_exec(self, src, dst, is_cancelled):
+        # The shell reports its PID and becomes cp, so a cancel can kill the copy itself;
+        # closing the channel alone leaves cp running on the server.
+        channel = self.ssh_client.open_exec(f"echo $$; exec cp -a -- {shlex.quote(src)} {shlex.quote(dst)}")
+        try:
+            pid = channel.makefile('rb').readline().strip().decode('ascii', errors='replace')
+            while not channel.exit_status_ready():
+                if is_cancelled and is_cancelled():
+                    self._kill(pid, channel)
+                    raise OperationCancelled()
+                time.sleep(0.1)
+            status = channel.recv_exit_status()
+            if status != 0:
+                err = channel.makefile_stderr('rb').read().decode('utf-8', errors='replace').strip()
+                raise IOError(err or f"cp failed with status {status}")
+        finally:
+            channel.close()
+
+    def _kill(self, pid, channel):
+        """Stops the cp started by _copy_exec and waits a little for it to exit."""
+        if not pid.isdigit(): return
+        try:
+            self.ssh_client.run_command(f"kill {pid}")
+        except Exception as e:
+            logging.warning(f"Could not stop cp (pid {pid}): {e}")
+            return
+        deadline = time.monotonic() + 5
+        while not channel.exit_status_ready() and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+    # progress
+
+    def _measure(self, path, is_dir, sftp=None):
+        """Bytes used by path: stat for files, 'du' for directories (0 if unknown)."""
+        try:
+            if not is_dir:
+                return (sftp or self.sftp).stat(path).st_size
+            status, out, _ = self.ssh_client.run_command(f"du -sb -- {shlex.quote(path)}")
+            if status == 0 and out:
+                return int(out.split()[0])
+        except Exception: pass
+        return 0
+
+    def _poll(self, dst, is_dir, total, progress, stop):
+        poll_sftp = None
+        try:
+            if not is_dir: poll_sftp = self.ssh_client.open_sftp()
+            while not stop.wait(POLL_INTERVAL):
+                progress(min(self._measure(dst, is_dir, poll_sftp), total), total)
+        except Exception as e:
+            logging.debug(f"Copy progress polling stopped: {e}")
+        finally:
+            if poll_sftp:
+                try: poll_sftp.close()
+                except: pass
+
+
+def stream_records(channel, separator, on_record, should_stop, on_idle=None, limit=RECORD_LIMIT):
+    """
+    Reads an exec channel's output as `separator`-terminated records, calling
+    on_record(bytes) for each as it arrives and on_idle() whenever the
+    command is quiet for half a second. Records longer than `limit` are cut
+    to that length. Stops early once should_stop() is true; closing the
+    channel then ends the command on the server. Returns (exit status, or
+    None if stopped early; the last 4 KB of stderr) and closes the channel.
+    """
+    buffer = err = b""
+    clipping = False
+    try:
+        channel.settimeout(0.5)
+        while not should_stop():
+            # Unread stderr would fill the channel window and stall the command; keep only the tail
+            while channel.recv_stderr_ready():
+                err = (err + channel.recv_stderr(65536))[-4096:]
+            try:
+                data = channel.recv(65536)
+            except socket.timeout:
+                if on_idle: on_idle()
+                continue
+            if not data: break
+            if clipping:
+                cut = data.find(separator)
+                if cut < 0: continue
+                data, clipping = data[cut:], False
+            buffer += data
+            *records, buffer = buffer.split(separator)
+            for record in records:
+                on_record(record)
+            if len(buffer) > limit:
+                buffer, clipping = buffer[:limit], True
+        if should_stop(): return None, err
+        if buffer: on_record(buffer) # Output without a final separator
+        status = channel.recv_exit_status()
+        while channel.recv_stderr_ready():
+            err = (err + channel.recv_stderr(65536))[-4096:]
+        return status, err
+    finally:
+        try: channel.close()
+        except: pass
+
+
+class _ParallelTreeOp:
+    """
+    Shared machinery for bulk operations on remote trees. Several workers,
+    each on its own SFTP channel, take directories from a shared queue, list
+    them, and pipeline up to `window` requests per channel instead of waiting
+    for each reply. Failures are collected in self.errors as (path, exception).
+    """
+    def __init__(self, ssh_client, workers, window):
+        self.ssh_client = ssh_client
+        self.workers = workers
+        self.window = window
+        self.errors = []
+        self.done = 0
+        self.total = None # Entries planned, once known
+        self._progress = None
+        self._is_cancelled = lambda: False
+        self._lock = threading.Lock()
+
+    def _start(self, progress, is_cancelled):
+        self._progress = progress
+        self._is_cancelled = is_cancelled or (lambda: False)
+
+    def _run_requests(self, submit):
+        """Runs submit(pipe) on one fresh channel and waits for every reply."""
+        sftp = self.ssh_client.open_sftp()
+        try:
+            pipe = SFTPPipeline(sftp, self.window, on_done=self._on_done)
+            submit(pipe)
+            pipe.drain()
+            with self._lock:
+                self.errors.extend(pipe.errors)
+        finally:
+            try: sftp.close()
+            except: pass
+
+    def _plan(self, roots):
+        """Everything below roots, listed before anything is changed; unreadable folders go to self.errors."""
+        lister = TreeEnumerator(self.ssh_client, self.workers)
+        below = lister.scan(roots, is_cancelled=self._is_cancelled)
+        self.errors.extend(lister.errors)
+        return below
+
+    def _run_spread(self, items, submit):
+        """Runs submit(pipe, item) for every item, split over `workers` channels."""
+        chunks = [items[i::self.workers] for i in range(self.workers) if items[i::self.workers]]
+        def _run(chunk):
+            def _submit_all(pipe):
+                for item in chunk:
+                    if self._is_cancelled(): return
+                    submit(pipe, item)
+            try:
+                self._run_requests(_submit_all)
+            except Exception as e: # No channel: nothing in this share was done
+                with self._lock:
+                    self.errors.append(("", e))
+        threads = [threading.Thread(target=_run, args=(chunk,), daemon=True) for chunk in chunks]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        if self._is_cancelled(): raise OperationCancelled()
+
+    def _walk(self, roots, on_dir, on_entry):
+        """
+        Walks the directory trees under roots.
+        on_dir(pipe, path, attr, depth) runs when a directory is taken from the
+        queue, before it is listed (attr is None for the roots, depth 0).
+        on_entry(pipe, path, attr) runs for every child that is not a directory.
+        """
+        if not roots: return
+        work = queue.Queue()
+        for path in roots:
+            work.put((0, path, None))
+
+        def _worker():
+            try:
+                sftp = self.ssh_client.open_sftp()
+            except Exception as e: # No channel: the other workers take the whole queue
+                with self._lock:
+                    self.errors.append(("", e))
+                return
+            pipe = SFTPPipeline(sftp, self.window, on_done=self._on_done)
+            try:
+                while True:
+                    try:
+                        depth, path, attr = work.get(timeout=0.1)
+                    except queue.Empty:
+                        # Queue.join() semantics without blocking: no queued or in-progress directories left.
+                        if work.unfinished_tasks == 0: break
+                        continue
+                    try:
+                        if self._is_cancelled(): continue
+                        on_dir(pipe, path, attr, depth)
+                        # listdir_attr, not listdir_iter: the latter reads raw packets and
+                        # would swallow replies to requests still in flight.
+                        for child_attr in sftp.listdir_attr(path):
+                            if child_attr.filename in ('.', '..'): continue
+                            child = path + "/" + child_attr.filename
+                            if stat.S_ISDIR(child_attr.st_mode):
+                                work.put((depth + 1, child, child_attr))
+                            else:
+                                on_entry(pipe, child, child_attr)
+                    except Exception as e:
+                        with self._lock:
+                            self.errors.append((path, e))
+                    finally:
+                        work.task_done()
+                pipe.drain()
+                with self._lock:
+                    self.errors.extend(pipe.errors)
+            finally:
+                try: sftp.close()
+                except: pass
+
+        threads = [threading.Thread(target=_worker, daemon=True) for _ in range(self.workers)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        if self._is_cancelled(): raise OperationCancelled()
+
+    def _on_done(self, tag, error):
+        if not error: self._count()
+
+    def _count(self, n=1):
+        with self._lock:
+            self.done += n
+            count = self.done
+        if self._progress: self._progress(count)
+
+
+class TreeEnumerator(_ParallelTreeOp):
+    """
+    Lists everything below remote folders, so recursive operations can plan
+    their work (order, totals) before they change anything. One 'find' on
+    an exec channel streams the metadata of whole subtrees in a single round
+    trip; without exec or GNU find, the trees are walked with listdir_attr
+    on `workers` parallel channels. Entries are FileEntry records named by
+    absolute path, the roots themselves excluded; folders that could not be
+    read are in self.errors. find lists a folder before its contents, the
+    walk does not promise any order.
+    """
+    def __init__(self, ssh_client, workers=DELETE_WORKERS, one_filesystem=False):
+        super().__init__(ssh_client, workers, window=1)
+        self.one_filesystem = one_filesystem # find only: do not descend into other mounts
+        self.method = None # "find" or "sftp", once known
+        self._entries = []
+        self._on_batch = None
+        self._delivered = set() # Paths find already handed to on_batch
+
+    def scan(self, roots, progress=None, is_cancelled=None, on_batch=None):
+        """
+        Returns the entries below roots; progress(count) is called as they
+        arrive. With on_batch, entries are handed to on_batch(list) in chunks
+        instead and nothing is kept, for trees too big to hold in memory.
+        Raises OperationCancelled.
+        """
+        self._start(progress, is_cancelled)
+        self._on_batch = on_batch
+        self.errors, self.done, self._entries, self._delivered = [], 0, [], set()
+        if roots and not self._scan_find(roots):
+            # Batches find streamed before it failed are not handed over again
+            self.method = "sftp"
+            self.errors, self.done, self._entries = [], 0, []
+            self._scan_walk(roots)
+        self._delivered = set()
+        if on_batch and self._entries: on_batch(self._entries)
+        if self._is_cancelled(): raise OperationCancelled()
+        return None if on_batch else self._entries
+
+    def _add(self, entry):
+        batch = None
+        with self._lock:
+            if entry.name not in self._delivered:
+                self._entries.append(entry)
+            if self._on_batch and len(self._entries) >= TREE_BATCH:
+                batch, self._entries = self._entries, []
+                if self.method == "find": self._delivered.update(e.name for e in batch)
+        if batch: self._on_batch(batch)
+        self._count()
+
+    def _scan_find(self, roots):
+        """Returns False if find is unusable here, so the caller falls back to SFTP."""
+        paths = " ".join(shlex.quote(p) for p in roots)
+        xdev = " -xdev" if self.one_filesystem else ""
+        command = f"LC_ALL=C find {paths}{xdev} -mindepth 1 -printf {shlex.quote(TREE_FORMAT)}"
+        try:
+            channel = self.ssh_client.open_exec(command)
+        except Exception as e:
+            logging.info(f"Tree listing: exec unavailable ({e}), walking over SFTP")
+            return False
+        self.method = "find"
+
+        def on_record(record):
+            entry = parse_tree_record(record.decode("utf-8", errors="replace"))
+            if entry: self._add(entry)
+        status, err = stream_records(channel, b"\0", on_record, self._is_cancelled)
+        if status is None: return True # Cancelled
+        lines = [l for l in err.decode("utf-8", errors="replace").splitlines() if l.strip()]
+        # Unreadable folders make find exit 1; they are errors of those folders, not a reason to fall back
+        failed = [_FIND_ERROR.match(l) for l in lines]
+        if status == 0 or (status == 1 and lines and all(failed)):
+            self.errors.extend((m.group(1), IOError(m.group(2))) for m in failed if m)
+            return True
+        logging.info(f"Tree listing: find failed with status {status} ({' '.join(lines)[:200]}), walking over SFTP")
+        return False
+
+    def _scan_walk(self, roots):
+        def _add(path, attr):
+            entry = FileEntry.from_sftp(attr)
+            entry.name = path
+            self._add(entry)
+        def _on_dir(pipe, path, attr, depth):
+            if attr is not None: _add(path, attr)
+        self._walk(roots, _on_dir, lambda pipe, path, attr: _add(path, attr))
+
+
+def parse_tree_record(record):
+    """FileEntry (named by path) from one TREE_FORMAT record, or None if it is malformed."""
+    try:
+        kind, size, mtime, mode, path = record.split(" ", 4)
+        file_type = _FIND_TYPES.get(kind, 0)
+        return FileEntry(path, file_type == stat.S_IFDIR, int(size), int(float(mtime)), file_type | int(mode, 8))
+    except ValueError:
+        return None
+
+
+class RemoteDeleter(_ParallelTreeOp):
+    """
+    Deletes remote files and directory trees.
+    The trees are listed first (see TreeEnumerator), then remove requests
+    are pipelined over parallel channels; directories are removed
+    afterwards, deepest level first.
+    With use_exec, a single 'rm -rf' runs on the server instead.
+    """
+    def __init__(self, ssh_client, workers=DELETE_WORKERS, window=DELETE_WINDOW, use_exec=False):
+        super().__init__(ssh_client, workers, window)
+        self.use_exec = use_exec
+
+    @property
+    def deleted(self):
+        return self.done
+
+    def delete(self, targets, progress=None, is_cancelled=None):
+        """
+        targets: list of (path, is_dir).
+        progress: callback(deleted_count), called from worker threads.
+        Returns the number of entries deleted; failures are in self.errors.
+        """
+        self._start(progress, is_cancelled)
+        if self.use_exec:
+            self._delete_exec([path for path, _ in targets])
+            return self.done
+
+        roots = [path for path, is_dir in targets if is_dir]
+        below = self._plan(roots)
+        self.total = len(targets) + len(below)
+        files = [path for path, is_dir in targets if not is_dir] + [e.name for e in below if not e.is_dir]
+        self._run_spread(files, lambda pipe, path: pipe.submit(CMD_REMOVE, path))
+
+        # A path below another always has more separators, so this orders by depth
+        found_dirs = [(p.count("/"), p) for p in roots] + [(e.name.count("/"), e.name) for e in below if e.is_dir]
+        self._remove_dirs(found_dirs)
+        return self.done
+
+    def _remove_dirs(self, found_dirs):
+        # Children must be gone before their parent, so drain between depth levels.
+        blocked = set()
+        def _block(path):
+            # A failed entry keeps itself and every ancestor; its error is already reported.
+            while path and path not in blocked:
+                blocked.add(path)
+                path = path.rsplit("/", 1)[0]
+        for path, _ in self.errors: _block(path)
+
+        sftp = self.ssh_client.open_sftp()
+        try:
+            pipe = SFTPPipeline(sftp, self.window, on_done=self._on_done)
+            for depth in sorted(set(d for d, _ in found_dirs), reverse=True):
+                if self._is_cancelled(): raise OperationCancelled()
+                for d, path in found_dirs:
+                    if d == depth and path not in blocked:
+                        pipe.submit(CMD_RMDIR, path)
+                pipe.drain()
+                for path, _ in pipe.errors: _block(path)
+            self.errors.extend(pipe.errors)
+        finally:
+            try: sftp.close()
+            except: pass
+
+    def _delete_exec(self, paths):
+        # -v prints each removed entry: it gives progress, and once the channel
+        # is closed on cancel, rm is stopped by its next write.
+        command = "rm -rfv -- " + " ".join(shlex.quote(p) for p in paths)
+        channel = self.ssh_client.open_exec(command)
+        status, err = stream_records(channel, b"\n", lambda record: self._count(), self._is_cancelled)
+        if status is None: raise OperationCancelled()
+        if status != 0:
+            err = err.decode("utf-8", errors="replace").strip()
+            self.errors.append((", ".join(paths), IOError(err or f"rm failed with status {status}")))
+
+
+class RemoteChmodder(_ParallelTreeOp):
+    """
+    Changes permissions of remote files and directory trees.
+    Each directory gets its new mode before it is listed, as 'chmod -R'
+    does, so folders that were unreadable (e.g. 000) are changed too; the
+    trees are walked rather than listed up front for that reason. The
+    st_mode returned by each listing is reused, so entries that already
+    have the wanted mode cost no request and nothing is stat'ed separately.
+    Directories and files inside them can get different modes (e.g. 755/644).
+    Symbolic links are skipped, as 'chmod -R' does.
+    With use_exec, trees are handled by one 'find' on the server.
+    """
+    def __init__(self, ssh_client, workers=DELETE_WORKERS, window=DELETE_WINDOW, use_exec=False):
+        super().__init__(ssh_client, workers, window)
+        self.use_exec = use_exec
+
+    def chmod(self, targets, mode, file_mode=None, progress=None, is_cancelled=None):
+        """
+        targets: list of (path, is_dir). The targets themselves get `mode`;
+        directories below them get `mode` and files below them `file_mode`
+        (defaults to `mode`).
+        progress: callback(count), called from worker threads.
+        Returns the number of entries processed; failures are in self.errors.
+        """
+        self._start(progress, is_cancelled)
+        if file_mode is None: file_mode = mode
+        mode, file_mode = mode & 0o7777, file_mode & 0o7777 # Drop file type bits from stat modes
+        dirs = [path for path, is_dir in targets if is_dir]
+
+        # The selected items first, so a directory is readable before it is walked.
+        def _set_targets(pipe):
+            for path, _ in targets:
+                self._set(pipe, path, None, mode)
+        self._run_requests(_set_targets)
+
+        if self.use_exec and dirs:
+            self._chmod_exec(dirs, mode, file_mode)
+            return self.done
+
+        # The setstat goes out before the listing on the same channel, and the server answers in order
+        def _on_dir(pipe, path, attr, depth):
+            if depth > 0: self._set(pipe, path, attr, mode)
+        def _on_entry(pipe, path, attr):
+            if not stat.S_ISLNK(attr.st_mode or 0): self._set(pipe, path, attr, file_mode)
+        self._walk(dirs, _on_dir, _on_entry)
+        return self.done
+
+    def _set(self, pipe, path, attr, mode):
+        if attr is not None and attr.st_mode is not None and (attr.st_mode & 0o7777) == mode:
+            self._count() # Already right
+            return
+        new_attr = SFTPAttributes()
+        new_attr.st_mode = mode
+        pipe.submit(CMD_SETSTAT, path, new_attr)
+
+    def _chmod_exec(self, dirs, mode, file_mode):
+        # A folder is changed with '\;' when find reaches it, before find reads it, so
+        # folders that could not be listed (e.g. 000) are changed too; '+' would batch
+        # the chmod until after find had tried. Entries already right run nothing.
+        # Every entry handled is printed: progress, and a closed channel stops find.
+        paths = " ".join(shlex.quote(p) for p in dirs)
+        command = (f"find {paths} -mindepth 1 \\( -type d \\( -perm {mode:o} -o -exec chmod {mode:o} {{}} \\; \\) "
+                   f"-o -type f \\( -perm {file_mode:o} -o -exec chmod {file_mode:o} {{}} + \\) \\) -print0")
+        channel = self.ssh_client.open_exec(command)
+        status, err = stream_records(channel, b"\0", lambda record: self._count(), self._is_cancelled)
+        if status is None: raise OperationCancelled()
+        if status != 0:
+            err = err.decode("utf-8", errors="replace").strip()
+            self.errors.append((", ".join(dirs), IOError(err or f"chmod failed with status {status}")))
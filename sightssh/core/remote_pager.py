@@ -0,0 +1,258 @@
+import bisect
+from array import array
+from collections import OrderedDict
+
+from sightssh.core.remote_ops import OperationCancelled
+
+PAGE_SIZE = 64 * 1024
+PAGE_CACHE_PAGES = 64 # Pages kept per open file (4 MB)
+INDEX_BLOCK_PAGES = 4 # The line index keeps one count per this many pages
+INDEX_BATCH_PAGES = 32 # Pages requested at once while counting lines ahead of the view
+MAX_LINE = 4096 # Longer lines are shown in pieces of this many bytes
+BACK_LIMIT = 1024 * 1024 # Furthest back a line start is looked for
+
+
+class PageCache:
+    """The most recently used pages of one file, by page number."""
+    def __init__(self, max_pages=PAGE_CACHE_PAGES):
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+
+    def __contains__(self, no):
+        return no in self._pages
+
+    def __len__(self):
+        return len(self._pages)
+
+    def get(self, no):
+        data = self._pages.get(no)
+        if data is not None: self._pages.move_to_end(no)
+        return data
+
+    def put(self, no, data):
+        self._pages[no] = data
+        self._pages.move_to_end(no)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+    def drop(self, no):
+        self._pages.pop(no, None)
+
+    def clear(self):
+        self._pages.clear()
+
+
+class Line:
+    """One displayed line: bytes [offset, end) of the file. newline: it ends a real line rather than a piece of a long one."""
+    __slots__ = ("offset", "end", "text", "newline")
+
+    def __init__(self, offset, end, data):
+        self.offset = offset
+        self.end = end
+        self.newline = data.endswith(b"\n")
+        if self.newline: data = data[:-1].rstrip(b"\r")
+        self.text = data.decode("utf-8", errors="replace")
+
+
+class RemotePager:
+    """
+    Reads a remote file a page at a time, for viewing files far too big to
+    download. Only the pages a view needs are requested (several at once,
+    pipelined), and the most recent ones are kept in a small LRU cache, so
+    memory stays the same whatever the file size.
+
+    Line numbers come from a sparse index: the number of newlines before
+    every INDEX_BLOCK_PAGES-th page, filled in as pages are read from the
+    start of the file onwards. Positions past the indexed part have no line
+    number until index_to() has counted up to them.
+
+    Lines longer than MAX_LINE bytes are shown in MAX_LINE pieces. The file
+    is assumed to only grow while it is open (see refresh_size).
+    Not thread-safe: use one pager from one thread, like its SFTP session.
+    """
+    def __init__(self, sftp, path, page_size=PAGE_SIZE, cache_pages=PAGE_CACHE_PAGES):
+        self.path = path
+        self.page_size = page_size
+        self.cache = PageCache(cache_pages)
+        self.bytes_read = 0
+        self._file = sftp.open(path, "rb")
+        self.size = self._file.stat().st_size
+        self._block = page_size * INDEX_BLOCK_PAGES
+        self._reset_index()
+
+    def _reset_index(self):
+        self._block_lines = array("q", [0]) # Newlines before offset i * _block
+        self._indexed = 0 # Newlines are counted in [0, _indexed)
+        self._indexed_lines = 0
+
+    def close(self):
+        self.cache.clear()
+        self._file.close()
+
+    def refresh_size(self):
+        """Re-reads the file size, for files written to while viewed (logs). Returns True if it changed."""
+        size = self._file.stat().st_size
+        if size == self.size: return False
+        if size < self.size:
+            # Truncated or rewritten: nothing read so far can be trusted
+            self.cache.clear()
+            self._reset_index()
+        else:
+            self.cache.drop(self.size // self.page_size) # The old last page may have been partial
+        self.size = size
+        return True
+
+    @property
+    def indexed(self):
+        """Bytes from the start of the file whose lines have been counted."""
+        return self._indexed
+
+    @property
+    def line_count(self):
+        """Number of lines in the file, or None until the whole file has been counted."""
+        if self._indexed < self.size: return None
+        if not self.size: return 0
+        return self._indexed_lines + (0 if self.read(self.size - 1, 1) == b"\n" else 1)
+
+    # Pages
+
+    def _fetch(self, numbers):
+        """Reads pages from the server with all their requests in flight together; returns {number: data}."""
+        chunks = []
+        for no in numbers:
+            start = no * self.page_size
+            length = min(self.page_size, self.size - start)
+            if length > 0: chunks.append((start, length))
+        pages = {}
+        for (start, _), data in zip(chunks, self._file.readv(chunks)):
+            pages[start // self.page_size] = data
+            self.bytes_read += len(data)
+        return pages
+
+    def _pages(self, first, last, keep=True):
+        """Pages first..last, from the cache where possible; keep: cache the ones that had to be read."""
+        pages = {no: self.cache.get(no) for no in range(first, last + 1)}
+        missing = [no for no, data in pages.items() if data is None]
+        if missing:
+            fetched = self._fetch(missing)
+            for no in missing:
+                data = fetched.get(no, b"")
+                pages[no] = data
+                if keep: self.cache.put(no, data)
+        for no in range(first, last + 1):
+            self._index_page(no, pages[no])
+        return pages
+
+    def read(self, offset, length):
+        """Bytes [offset, offset + length), cut short at the end of the file."""
+        end = min(self.size, offset + length)
+        if offset >= end: return b""
+        ps = self.page_size
+        first, last = offset // ps, (end - 1) // ps
+        pages = self._pages(first, last)
+        data = b"".join(pages[no] for no in range(first, last + 1))
+        return data[offset - first * ps:end - first * ps]
+
+    # Line index
+
+    def _index_page(self, no, data):
+        """Counts the newlines of a page if it continues the indexed part of the file."""
+        start = no * self.page_size
+        if not start <= self._indexed < start + len(data): return
+        if len(data) < self.page_size and start + len(data) < self.size: return # Short read
+        self._indexed_lines += data.count(b"\n", self._indexed - start)
+        self._indexed = start + len(data)
+        # Pages end on block boundaries, except the last one of the file
+        while len(self._block_lines) <= self._indexed // self._block:
+            self._block_lines.append(self._indexed_lines)
+
+    def index_to(self, offset=None, line=None, progress=None, is_cancelled=None):
+        """
+        Counts lines from the end of the indexed part until offset or line
+        (0-based) is covered, or to the end of the file if neither is given.
+        Pages read only for counting are not cached. progress(indexed, size)
+        is called after each batch. Raises OperationCancelled.
+        """
+        ps = self.page_size
+        while self._indexed < self.size:
+            if offset is not None and self._indexed >= offset: break
+            if line is not None and self._indexed_lines > line: break
+            if is_cancelled and is_cancelled(): raise OperationCancelled()
+            first = self._indexed // ps
+            last = min(first + INDEX_BATCH_PAGES, (self.size - 1) // ps + 1) - 1
+            self._pages(first, last, keep=False)
+            if progress: progress(self._indexed, self.size)
+
+    def line_number(self, offset):
+        """0-based number of the line holding offset, or None if the index does not reach it yet."""
+        if offset > self._indexed: return None
+        block = offset // self._block
+        start = block * self._block
+        return self._block_lines[block] + self.read(start, offset - start).count(b"\n")
+
+    def line_offset(self, line, progress=None, is_cancelled=None):
+        """Start offset of 0-based line (the last line if the file is shorter); counts lines up to it first."""
+        if line <= 0: return 0
+        self.index_to(line=line, progress=progress, is_cancelled=is_cancelled)
+        if line > self._indexed_lines:
+            return self.line_start(self.size - 1)
+        # The block holding the line-th newline, then that newline within it
+        block = bisect.bisect_left(self._block_lines, line) - 1
+        start = block * self._block
+        data = self.read(start, self._block)
+        pos = -1
+        for _ in range(line - self._block_lines[block]):
+            pos = data.find(b"\n", pos + 1)
+        return start + pos + 1
+
+    # Lines
+
+    def line_start(self, pos):
+        """Start of the displayed line holding byte pos."""
+        if pos <= 0 or not self.size: return 0
+        pos = min(pos, self.size - 1)
+        low = max(0, pos - BACK_LIMIT)
+        start, end = low, pos
+        while end > low:
+            begin = max(low, end - self.page_size)
+            nl = self.read(begin, end - begin).rfind(b"\n")
+            if nl >= 0:
+                start = begin + nl + 1
+                break
+            end = begin
+        # Which MAX_LINE piece of the line pos falls in; a line's newline belongs to its last piece
+        i = pos - start
+        piece = max(0, i - 1) // MAX_LINE if self.read(pos, 1) == b"\n" else i // MAX_LINE
+        return start + piece * MAX_LINE
+
+    def lines(self, offset, count):
+        """Up to count displayed lines from offset, which must be a line start."""
+        lines = []
+        while len(lines) < count and offset < self.size:
+            chunk = self.read(offset, max(self.page_size, MAX_LINE + 1))
+            at_end = offset + len(chunk) >= self.size
+            pos = 0
+            while len(lines) < count and pos < len(chunk):
+                nl = chunk.find(b"\n", pos, pos + MAX_LINE + 1)
+                if nl >= 0:
+                    end = nl + 1
+                elif len(chunk) - pos > MAX_LINE:
+                    end = pos + MAX_LINE
+                elif at_end:
+                    end = len(chunk)
+                else:
+                    break # The line goes on past this chunk: read again from its start
+                lines.append(Line(offset + pos, offset + end, chunk[pos:end]))
+                pos = end
+            offset += pos
+        return lines
+
+    def lines_before(self, offset, count):
+        """Up to count displayed lines ending at offset, in file order."""
+        lines = []
+        while len(lines) < count and offset > 0:
+            start = self.line_start(offset - 1)
+            lines.append(Line(start, offset, self.read(start, offset - start)))
+            offset = start
+        lines.reverse()
+        return lines
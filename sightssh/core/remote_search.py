@@ -0,0 +1,299 @@
+import re
+import stat
+import time
+import shlex
+import fnmatch
+import logging
+import threading
+
+from sightssh.core.file_entry import FileEntry
+from sightssh.core.remote_ops import _ParallelTreeOp, OperationCancelled, stream_records
+
+SEARCH_WORKERS = 4 # Channels used by the SFTP fallback walk
+SEARCH_MAX_RESULTS = 50000 # Results kept before a search stops by itself
+SEARCH_BATCH = 200
+SEARCH_PUSH_INTERVAL = 0.25 # Seconds between result batches while hits trickle in
+CONTENT_MAX_RESULTS = 20000 # Matching lines kept by a content search
+EXCERPT_CHARS = 300
+PREVIEW_LINE_CHARS = 2000 # Preview lines are cut on the server, so minified files stay small
+# Type, size, mtime, path; NUL-terminated because names may contain newlines
+FIND_FORMAT = r"%y %s %T@ %p\0"
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(text):
+    """'1500', '10K', '2.5 MB' -> bytes; '' -> None. Raises ValueError otherwise."""
+    if not text or not text.strip(): return None
+    match = _SIZE.match(text)
+    if not match: raise ValueError(text)
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+class SearchCriteria:
+    """
+    What a remote file search looks for. `name` is a glob (with * ? or [) or
+    otherwise a substring, both case-insensitive; sizes are bytes, inclusive;
+    `modified_days` keeps entries changed in the last N days; `kind` is
+    "any", "file" or "dir". Empty fields do not restrict anything.
+    """
+    def __init__(self, name="", min_size=None, max_size=None, modified_days=None, kind="any"):
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_days = modified_days
+        self.kind = kind
+
+    @property
+    def glob(self):
+        if not self.name: return None
+        return self.name if any(c in self.name for c in "*?[") else f"*{self.name}*"
+
+    def find_expression(self):
+        """The predicates as 'find' arguments, shell-quoted."""
+        args = []
+        if self.kind == "file": args.append("-type f")
+        elif self.kind == "dir": args.append("-type d")
+        if self.glob: args.append(f"-iname {shlex.quote(self.glob)}")
+        # find rounds -size up to whole units; with the 'c' suffix it counts bytes exactly
+        if self.min_size is not None: args.append(f"-size +{max(self.min_size - 1, 0)}c")
+        if self.max_size is not None: args.append(f"-size -{self.max_size + 1}c")
+        if self.modified_days: args.append(f"-mmin -{int(self.modified_days * 1440)}")
+        return " ".join(args)
+
+    def matches(self, name, attr, now=None):
+        """The same test for the SFTP fallback."""
+        is_dir = stat.S_ISDIR(attr.st_mode or 0)
+        if self.kind == "file" and not stat.S_ISREG(attr.st_mode or 0): return False
+        if self.kind == "dir" and not is_dir: return False
+        if self.glob and not _glob_regex(self.glob).match(name): return False
+        size = attr.st_size or 0
+        if self.min_size is not None and size < self.min_size: return False
+        if self.max_size is not None and size > self.max_size: return False
+        if self.modified_days:
+            if (attr.st_mtime or 0) < (now or time.time()) - self.modified_days * 86400: return False
+        return True
+
+
+class _HitBatches:
+    """Collects hits from worker threads and hands them over in batches, up to max_results."""
+    def _init_hits(self, on_hits, max_results):
+        self._on_hits = on_hits
+        self.max_results = max_results
+        self.truncated = False
+        self._batch = []
+        self._last_push = 0
+
+    def _hit(self, hit):
+        with self._lock:
+            if self.done >= self.max_results:
+                self.truncated = True
+                return
+            self.done += 1
+            self._batch.append(hit)
+        self._push()
+
+    def _push(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not self._batch or not (force or len(self._batch) >= SEARCH_BATCH or now - self._last_push >= SEARCH_PUSH_INTERVAL):
+                return
+            batch, self._batch, self._last_push = self._batch, [], now
+        self._on_hits(batch)
+
+
+_glob_cache = {}
+
+
+def _glob_regex(pattern):
+    regex = _glob_cache.get(pattern)
+    if regex is None:
+        regex = _glob_cache[pattern] = re.compile(fnmatch.translate(pattern), re.IGNORECASE | re.DOTALL)
+    return regex
+
+
+class RemoteSearch(_HitBatches, _ParallelTreeOp):
+    """
+    Searches a remote tree by name, size and modification time.
+    Runs one 'find' on an exec channel and parses its output as it streams,
+    so hits show up while the server is still searching; the whole search
+    costs one round trip. Servers without exec or GNU find are searched by a
+    parallel SFTP walk instead. Hits are FileEntry records whose name is the
+    path relative to the root.
+    """
+    def __init__(self, ssh_client, root, criteria, workers=SEARCH_WORKERS, max_results=SEARCH_MAX_RESULTS):
+        super().__init__(ssh_client, workers, window=1)
+        self.root = root.rstrip("/") or "/"
+        self.criteria = criteria
+        self.method = None # "find" or "sftp", once known
+        self._init_hits(None, max_results)
+
+    def run(self, on_hits, is_cancelled=None):
+        """
+        Blocks until the search ends. on_hits(list of FileEntry) is called
+        from worker threads in batches. Returns the number of hits; raises
+        OperationCancelled if is_cancelled() became true.
+        """
+        self._start(None, is_cancelled)
+        self._init_hits(on_hits, self.max_results)
+        try:
+            if not self._run_find():
+                self.method = "sftp"
+                self._run_walk()
+        finally:
+            self._push(force=True)
+        if self._is_cancelled(): raise OperationCancelled()
+        return self.done
+
+    def _stopping(self):
+        return self._is_cancelled() or self.truncated
+
+    def _relative(self, path):
+        prefix = self.root if self.root == "/" else self.root + "/"
+        return path[len(prefix):] if path.startswith(prefix) else path
+
+    # find over exec
+
+    def _run_find(self):
+        """Returns False if find is unusable here, so the caller falls back to SFTP."""
+        command = (f"LC_ALL=C find {shlex.quote(self.root)} -mindepth 1 {self.criteria.find_expression()} "
+                   f"-printf {shlex.quote(FIND_FORMAT)}")
+        try:
+            channel = self.ssh_client.open_exec(command)
+        except Exception as e:
+            logging.info(f"Search: exec unavailable ({e}), walking over SFTP")
+            return False
+        self.method = "find"
+        parsed = 0
+
+        def on_record(record):
+            nonlocal parsed
+            entry = self._parse(record.decode("utf-8", errors="replace"))
+            if entry:
+                parsed += 1
+                self._hit(entry)
+        status, err = stream_records(channel, b"\0", on_record, self._stopping, self._push)
+        if status is None: return True # Stopped
+        if status == 0 or parsed: return True
+        # Unreadable folders make find exit 1 but are not a reason to fall back
+        lines = [l for l in err.decode("utf-8", errors="replace").splitlines() if l.strip()]
+        if status == 1 and lines and all("Permission denied" in l for l in lines): return True
+        logging.info(f"Search: find failed with status {status} ({' '.join(lines)[:200]}), walking over SFTP")
+        return False
+
+    def _parse(self, record):
+        try:
+            kind, size, mtime, path = record.split(" ", 3)
+            return FileEntry(self._relative(path), kind == "d", int(size), int(float(mtime)))
+        except ValueError:
+            return None
+
+    # SFTP fallback
+
+    def _run_walk(self):
+        now = time.time()
+
+        def _check(path, attr):
+            if self._stopping(): return
+            if self.criteria.matches(attr.filename, attr, now):
+                entry = FileEntry.from_sftp(attr)
+                entry.name = self._relative(path)
+                self._hit(entry)
+
+        def _on_dir(pipe, path, attr, depth):
+            if attr is not None: _check(path, attr)
+
+        user_cancelled = self._is_cancelled
+        # The walk also stops once the result cap is reached
+        self._is_cancelled = lambda: user_cancelled() or self.truncated
+        try:
+            self._walk([self.root], _on_dir, lambda pipe, path, attr: _check(path, attr))
+        except OperationCancelled:
+            pass
+        finally:
+            self._is_cancelled = user_cancelled
+
+
+class ContentHit:
+    """One matching line: absolute path, 1-based line number, and the line (shortened)."""
+    __slots__ = ("path", "line", "text")
+
+    def __init__(self, path, line, text):
+        self.path = path
+        self.line = line
+        self.text = text
+
+
+class ContentSearch(_HitBatches):
+    """
+    Searches file contents under a remote folder with one 'rg' (when the
+    server has it) or 'grep -rnI' on an exec channel; binary files are
+    skipped. Output lines are parsed as they stream in. Memory stays bounded:
+    at most max_results hits are kept and excerpts are cut to EXCERPT_CHARS.
+    """
+    def __init__(self, ssh_client, root, text, regex=False, ignore_case=True, max_results=CONTENT_MAX_RESULTS):
+        self.ssh_client = ssh_client
+        self.root = root.rstrip("/") or "/"
+        self.text = text
+        self.regex = regex
+        self.ignore_case = ignore_case
+        self.done = 0
+        self._lock = threading.Lock()
+        self._init_hits(None, max_results)
+
+    def command(self):
+        case = " -i" if self.ignore_case else ""
+        pattern, root = shlex.quote(self.text), shlex.quote(self.root)
+        # -uu: like grep -r, include hidden and .gitignore'd files. -Z/--null: NUL after the file name.
+        rg = f"rg -uu --line-number --null --no-heading --color never{'' if self.regex else ' -F'}{case} -e {pattern} -- {root}"
+        grep = f"grep -rnIZ --color=never{' -E' if self.regex else ' -F'}{case} -e {pattern} -- {root}"
+        return f"if command -v rg >/dev/null 2>&1; then exec {rg}; else exec {grep}; fi"
+
+    def run(self, on_hits, is_cancelled=None):
+        """
+        Blocks until the search ends; on_hits(list of ContentHit) is called in
+        batches. Returns the number of hits; raises OperationCancelled if
+        is_cancelled() became true, IOError if the search could not run.
+        """
+        is_cancelled = is_cancelled or (lambda: False)
+        self._init_hits(on_hits, self.max_results)
+        channel = self.ssh_client.open_exec(self.command())
+        try:
+            status, err = stream_records(channel, b"\n", self._on_record,
+                                         lambda: is_cancelled() or self.truncated, self._push)
+        finally:
+            self._push(force=True)
+        if is_cancelled(): raise OperationCancelled()
+        # Exit status 1 means no match; 2 is an error, possibly after some hits (unreadable files)
+        if status is not None and status > 1 and not self.done:
+            raise IOError(err.decode("utf-8", errors="replace").strip() or f"search failed with status {status}")
+        return self.done
+
+    def _on_record(self, record):
+        path, sep, rest = record.partition(b"\0")
+        if not sep: return
+        line, _, text = rest.partition(b":")
+        try:
+            line = int(line)
+        except ValueError:
+            return
+        text = text.decode("utf-8", errors="replace").rstrip("\r")
+        if len(text) > EXCERPT_CHARS: text = text[:EXCERPT_CHARS] + "…"
+        self._hit(ContentHit(path.decode("utf-8", errors="replace"), line, text))
+
+
+def read_lines(ssh_client, path, first, last):
+    """
+    Lines first..last (1-based) of a remote file as [(number, text)], fetched
+    with one 'sed'; each is cut to PREVIEW_LINE_CHARS on the server.
+    """
+    first = max(first, 1)
+    status, out, err = ssh_client.run_command(
+        f"sed -n '{first},{last}p;{last}q' {shlex.quote(path)} | cut -c1-{PREVIEW_LINE_CHARS}")
+    # The pipeline's status is cut's, so a sed failure only shows on stderr
+    if status != 0 or err.strip(): raise IOError(err.strip() or f"sed failed with status {status}")
+    # Only newlines end lines; splitlines() would also split on form feeds and the like
+    lines = out.split("\n")
+    if lines[-1] == "": lines.pop()
+    return [(first + i, text) for i, text in enumerate(lines)]
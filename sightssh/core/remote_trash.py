@@ -0,0 +1,130 @@
+import re
+import stat
+import errno
+import time
+import logging
+import threading
+
+from sightssh.core.remote_ops import RemoteDeleter
+
+TRASH_DIR_NAME = ".sightssh-trash"
+PURGE_DELAY = 60 # Seconds after the last move before the trash is emptied
+PURGE_WORKERS = 1 # Purging is throttled so it does not compete with browsing
+PURGE_WINDOW = 8
+
+
+def trash_dir_for(home, profile_name):
+    """Per-profile trash directory under the remote home directory."""
+    safe = re.sub(r'[^A-Za-z0-9._-]', '_', profile_name or "default")
+    return f"{home.rstrip('/')}/{TRASH_DIR_NAME}/{safe}"
+
+
+def is_cross_device(error):
+    """
+    True if a failed move into the trash means the item is on another
+    filesystem: EXDEV, or the bare SSH_FX_FAILURE that servers such as
+    OpenSSH report for it (missing files and denied access have their own codes).
+    """
+    if getattr(error, "errno", None) == errno.EXDEV: return True
+    return type(error) is IOError and error.errno is None
+
+
+class RemoteTrash:
+    """
+    Makes remote deletes instant: items are renamed into a trash directory
+    (one round trip, no matter how large the tree) and removed for real
+    later by purge(). The last delete can be undone until then.
+    A rename across filesystems fails (see is_cross_device); callers may
+    delete those items directly.
+    """
+    def __init__(self, ssh_client, sftp, trash_dir):
+        self.ssh_client = ssh_client
+        self.sftp = sftp
+        self.trash_dir = trash_dir
+        self.batches = [] # Undo stack: each delete is a list of (trash_path, original_path)
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def ensure(self):
+        path = ""
+        for part in self.trash_dir.strip("/").split("/"):
+            path += "/" + part
+            try:
+                self.sftp.stat(path)
+            except FileNotFoundError:
+                self.sftp.mkdir(path, 0o700)
+
+    def move(self, paths):
+        """
+        Moves paths into the trash as one undoable batch.
+        Returns a list of (path, exception) for items that could not be moved.
+        """
+        self.ensure()
+        batch, failed = [], []
+        for path in paths:
+            self._counter += 1
+            name = path.rstrip("/").rsplit("/", 1)[-1]
+            trash_path = f"{self.trash_dir}/{int(time.time() * 1000)}-{self._counter}-{name}"
+            try:
+                self.sftp.rename(path, trash_path)
+                batch.append((trash_path, path))
+            except IOError as e:
+                failed.append((path, e))
+        if batch:
+            with self._lock:
+                self.batches.append(batch)
+        return failed
+
+    def can_undo(self):
+        with self._lock:
+            return bool(self.batches)
+
+    def undo(self):
+        """
+        Restores the most recent batch. Returns (restored_count, errors).
+        Items whose original path has been reused stay in the trash.
+        """
+        with self._lock:
+            batch = self.batches.pop() if self.batches else []
+        restored, errors = 0, []
+        for trash_path, original in batch:
+            try:
+                try:
+                    self.sftp.stat(original)
+                    raise IOError(f"{original} already exists")
+                except FileNotFoundError:
+                    pass
+                self.sftp.rename(trash_path, original)
+                restored += 1
+            except IOError as e:
+                errors.append((original, e))
+        return restored, errors
+
+    def has_contents(self):
+        try:
+            return bool(self.sftp.listdir(self.trash_dir))
+        except IOError:
+            return False
+
+    def purge(self, progress=None, is_cancelled=None):
+        """
+        Permanently deletes everything in the trash, including leftovers from
+        earlier sessions. Runs on its own SFTP channel; call from a worker thread.
+        Returns the RemoteDeleter so callers can inspect deleted/errors.
+        """
+        with self._lock:
+            self.batches = [] # Nothing can be undone once the purge starts
+        sftp = self.ssh_client.open_sftp()
+        try:
+            targets = [(self.trash_dir + "/" + attr.filename, stat.S_ISDIR(attr.st_mode or 0))
+                       for attr in sftp.listdir_attr(self.trash_dir)]
+        finally:
+            try: sftp.close()
+            except: pass
+
+        deleter = RemoteDeleter(self.ssh_client, workers=PURGE_WORKERS, window=PURGE_WINDOW)
+        if targets:
+            deleter.delete(targets, progress=progress, is_cancelled=is_cancelled)
+            logging.info(f"Remote trash purged: {deleter.deleted} entries, {len(deleter.errors)} errors")
+        return deleter
+
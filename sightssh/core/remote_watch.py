@@ -0,0 +1,88 @@
+import shlex
+import socket
+import logging
+
+from sightssh.core.local_watch import EventBatcher, DEBOUNCE
+
+REMOTE_POLL_INTERVAL = 5.0
+NO_INOTIFYWAIT = 127
+INOTIFY_EVENTS = "create,delete,moved_from,moved_to,close_write,attrib,modify,delete_self,move_self"
+
+
+class RemoteWatcher(EventBatcher):
+    """
+    Watches one remote folder over a single long-lived exec channel running
+    'inotifywait -m'; each event is one short line, so an idle watch costs
+    nothing. The '%e/%f' format is safe to split: '/' cannot occur in a name.
+    Without inotify-tools it falls back to polling the folder's mtime over
+    SFTP, which notices creates, deletes and renames (reported as a rescan)
+    but not files growing in place.
+    """
+    def __init__(self, ssh_client, path, on_changes, debounce=DEBOUNCE, poll_interval=REMOTE_POLL_INTERVAL):
+        super().__init__(on_changes, self._run, debounce)
+        self.ssh_client = ssh_client
+        self.path = path
+        self.poll_interval = poll_interval
+        self.channel = None
+
+    def stop(self):
+        super().stop()
+        # Unblocks the reader and ends inotifywait on the server
+        if self.channel:
+            try: self.channel.close()
+            except: pass
+
+    def _run(self):
+        try:
+            if self._run_inotifywait(): return
+            if not self._stop.is_set(): self._run_polling()
+        except Exception as e:
+            logging.debug(f"Watching remote {self.path} stopped: {e}")
+
+    def _run_inotifywait(self):
+        """Returns False if inotifywait is unavailable or failed, so polling takes over."""
+        quoted = shlex.quote(self.path)
+        command = (f"command -v inotifywait >/dev/null 2>&1 || exit {NO_INOTIFYWAIT}; "
+                   f"exec inotifywait -m -q --format '%e/%f' -e {INOTIFY_EVENTS} -- {quoted}")
+        self.channel = self.ssh_client.open_exec(command)
+        self.channel.settimeout(self.debounce / 2)
+        buffer = b""
+        while not self._stop.is_set():
+            try:
+                data = self.channel.recv(32768)
+                if not data: break
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    self._parse(line.decode("utf-8", errors="replace"))
+            except socket.timeout:
+                pass
+            if self._flush_due(): self._flush()
+        if self._stop.is_set(): return True
+        status = self.channel.recv_exit_status()
+        logging.info(f"inotifywait on {self.path} ended with status {status}; falling back to polling")
+        return False
+
+    def _parse(self, line):
+        events, _, name = line.partition("/")
+        if "DELETE_SELF" in events or "MOVE_SELF" in events or "UNMOUNT" in events or not name:
+            self._note(None)
+        else:
+            self._note(name)
+
+    def _run_polling(self):
+        sftp = self.ssh_client.open_sftp()
+        try:
+            mtime = sftp.stat(self.path).st_mtime
+            while not self._stop.wait(self.poll_interval):
+                try:
+                    current = sftp.stat(self.path).st_mtime
+                except IOError:
+                    current = None
+                if current != mtime:
+                    mtime = current
+                    self._note(None)
+                    self._flush()
+        finally:
+            try: sftp.close()
+            except: pass
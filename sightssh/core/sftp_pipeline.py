@@ -0,0 +1,169 @@
+import collections
+
+from paramiko.sftp import CMD_STATUS, CMD_DATA, CMD_READ, CMD_WRITE, int64
+
+
+class _ResponseSink:
+    """
+    Stand-in for a file object: paramiko routes async responses for requests
+    registered with it to _async_response, whatever order they arrive in.
+    """
+    def __init__(self):
+        self.responses = {}
+
+    def _async_response(self, t, msg, num):
+        self.responses[num] = (t, msg)
+
+
+def _wait_response(sftp, sink, num):
+    """Reads packets until the reply to request `num` is in the sink; returns (t, msg)."""
+    while num not in sink.responses:
+        sftp._read_response()
+    return sink.responses.pop(num)
+
+
+def request_status(sftp, cmd, *args):
+    """
+    Sends one request and waits for its status reply. Returns (code, msg)
+    instead of raising, so callers can tell an unsupported request from a
+    failed one; sftp._convert_status(msg) raises the usual error.
+    """
+    sink = _ResponseSink()
+    t, msg = _wait_response(sftp, sink, sftp._async_request(sink, cmd, *args))
+    if t != CMD_STATUS:
+        raise IOError(f"Unexpected SFTP response {t}")
+    code = msg.get_int()
+    msg.rewind()
+    return code, msg
+
+
+class SFTPPipeline:
+    """
+    Keeps up to `window` SFTP requests in flight on one session instead of
+    waiting a full round trip for each one. Failures are collected per tag
+    in self.errors as (tag, exception) rather than raised.
+
+    paramiko has no public API for this; it relies on SFTPClient's async
+    request internals (the same ones its prefetch/pipelined files use).
+    A session must only be used by one thread at a time.
+    """
+    def __init__(self, sftp, window=64, on_done=None):
+        self.sftp = sftp
+        self.window = window
+        self.on_done = on_done # callback(tag, error_or_None) per completed request
+        self.sink = _ResponseSink()
+        self.pending = {} # request number -> tag
+        self.errors = []
+
+    def submit(self, cmd, path, *args, tag=None):
+        """Sends a path request (e.g. CMD_REMOVE, CMD_RMDIR, CMD_SETSTAT) without waiting."""
+        while len(self.pending) >= self.window:
+            self._reap()
+        num = self.sftp._async_request(self.sink, cmd, self.sftp._adjust_cwd(path), *args)
+        self.pending[num] = tag if tag is not None else path
+
+    def drain(self):
+        """Waits for every outstanding request."""
+        while self.pending:
+            self._reap()
+
+    def _reap(self):
+        # Reads one packet; the sink receives it if it is one of ours.
+        while not self.sink.responses:
+            self.sftp._read_response()
+        for num, (t, msg) in list(self.sink.responses.items()):
+            del self.sink.responses[num]
+            tag = self.pending.pop(num, None)
+            error = None
+            try:
+                if t != CMD_STATUS:
+                    raise IOError(f"Unexpected SFTP response {t}")
+                self.sftp._convert_status(msg)
+            except (IOError, EOFError) as e:
+                error = e
+                self.errors.append((tag, e))
+            if self.on_done: self.on_done(tag, error)
+
+
+class PipelinedReader:
+    """
+    Reads an open SFTP file front to back, `request_size` bytes per request,
+    with up to `depth` read requests in flight: a new request goes out as each
+    reply comes in, so the pipeline never runs dry. depth may be changed
+    between reads. (paramiko's prefetch with max_concurrent_requests stops
+    prefetching whenever every reply has been read before its thread sends
+    more, and then falls back to one round trip per read.)
+    """
+    def __init__(self, fr, total, depth, request_size):
+        self.fr = fr
+        self.sftp = fr.sftp
+        self.total = total
+        self.depth = depth
+        self.request_size = request_size
+        self.sink = _ResponseSink()
+        self.pending = collections.deque() # (request number, offset, length) in file order
+        self.offset = 0 # Next offset to request
+
+    def read(self):
+        """Returns the next piece of the file, or b"" once `total` bytes were read."""
+        while self.offset < self.total and len(self.pending) < max(1, self.depth):
+            self._request(self.offset, min(self.request_size, self.total - self.offset))
+            self.offset += self.pending[-1][2]
+        if not self.pending:
+            return b""
+
+        num, offset, length = self.pending.popleft()
+        t, msg = _wait_response(self.sftp, self.sink, num)
+        if t == CMD_STATUS:
+            try:
+                self.sftp._convert_status(msg)
+            except EOFError:
+                pass
+            raise IOError(f"Unexpected end of file at offset {offset}")
+        if t != CMD_DATA:
+            raise IOError(f"Unexpected SFTP response {t}")
+        data = msg.get_string()
+        if not data:
+            raise IOError(f"Unexpected end of file at offset {offset}")
+        if len(data) < length:
+            # Servers may answer with less than asked for: ask for the rest next
+            self._request(offset + len(data), length - len(data), first=True)
+        return data
+
+    def _request(self, offset, length, first=False):
+        num = self.sftp._async_request(self.sink, CMD_READ, self.fr.handle, int64(offset), int(length))
+        if first: self.pending.appendleft((num, offset, length))
+        else: self.pending.append((num, offset, length))
+
+
+class PipelinedWriter:
+    """
+    Writes an open SFTP file front to back with up to `depth` write requests
+    in flight (paramiko's pipelined mode has no limit to tune). depth may be
+    changed between writes; flush() waits for every reply and raises the
+    first failure.
+    """
+    def __init__(self, fw, depth):
+        self.fw = fw
+        self.sftp = fw.sftp
+        self.depth = depth
+        self.sink = _ResponseSink()
+        self.pending = collections.deque() # Request numbers in file order
+        self.offset = 0
+
+    def write(self, data):
+        while len(self.pending) >= max(1, self.depth):
+            self._reap()
+        num = self.sftp._async_request(self.sink, CMD_WRITE, self.fw.handle, int64(self.offset), data)
+        self.pending.append(num)
+        self.offset += len(data)
+
+    def flush(self):
+        while self.pending:
+            self._reap()
+
+    def _reap(self):
+        t, msg = _wait_response(self.sftp, self.sink, self.pending.popleft())
+        if t != CMD_STATUS:
+            raise IOError(f"Unexpected SFTP response {t}")
+        self.sftp._convert_status(msg)
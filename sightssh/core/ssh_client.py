@@ -112,6 +112,45 @@ class SightSSHClient:
             return self.transport.open_sftp_client()
         return None
 
+    def open_exec(self, command, window_size=None):
+        """
+        Opens a new channel on the existing transport and runs command on it.
+        Returns the Channel; the caller reads/writes it and must close it.
+        window_size: receive window for the channel (None = paramiko default).
+        """
+        if not self._connected or not self.transport:
+            raise Exception("Not connected")
+        channel = self.transport.open_session(window_size=window_size)
+        channel.exec_command(command)
+        return channel
+
+    def run_command(self, command, timeout=30):
+        """
+        Runs a short non-interactive command.
+        Returns (exit_status, stdout, stderr) with output decoded as text.
+        """
+        channel = self.open_exec(command)
+        err_chunks = []
+
+        def read_stderr():
+            # Both streams share the channel window: stderr must be read while stdout is,
+            # or a command writing a lot of errors stalls with nothing on stdout.
+            try:
+                for chunk in iter(lambda: channel.recv_stderr(32768), b""):
+                    err_chunks.append(chunk)
+            except Exception: pass
+        try:
+            channel.settimeout(timeout)
+            err_reader = threading.Thread(target=read_stderr, daemon=True)
+            err_reader.start()
+            out = channel.makefile('rb').read()
+            err_reader.join(timeout)
+            status = channel.recv_exit_status()
+        finally:
+            channel.close()
+        err = b"".join(err_chunks)
+        return status, out.decode('utf-8', errors='replace'), err.decode('utf-8', errors='replace')
+
     def disconnect(self):
         """Disconnects the SSH session and cleans up resources."""
         self._reading = False
@@ -0,0 +1,173 @@
+import os
+import time
+import shlex
+import logging
+import tempfile
+
+from sightssh.core.sftp_pipeline import PipelinedReader, PipelinedWriter
+from sightssh.core.transfer_tuning import TransferTuner, REQUEST_SIZE
+
+# Engine identifiers stored in profiles ("transfer_engine")
+ENGINE_SFTP = "sftp"
+ENGINE_EXEC = "exec"
+ENGINE_AUTO = "auto"
+ENGINE_CHOICES = [ENGINE_SFTP, ENGINE_EXEC, ENGINE_AUTO]
+
+EXEC_CHUNK_SIZE = 256 * 1024
+PROBE_SIZE = 2 * 1024 * 1024
+
+
+class SFTPTransferEngine:
+    """
+    Default engine: SFTP.
+    Uploads and downloads keep a rolling window of tuner.depth requests in
+    flight and follow the tuner as it moves.
+    """
+    name = ENGINE_SFTP
+
+    def __init__(self, sftp, tuner=None):
+        self.sftp = sftp
+        self.tuner = tuner or TransferTuner()
+
+    def put(self, local_path, remote_path, callback=None):
+        total = os.path.getsize(local_path)
+        meter = self.tuner.meter()
+        with open(local_path, 'rb') as fl, self.sftp.open(remote_path, 'wb') as fw:
+            writer = PipelinedWriter(fw, self.tuner.depth)
+            done = 0
+            while True:
+                writer.depth = self.tuner.depth
+                data = fl.read(REQUEST_SIZE)
+                if not data: break
+                writer.write(data)
+                done += len(data)
+                meter.update(done)
+                if callback: callback(done, total)
+            writer.flush()
+        size = self.sftp.stat(remote_path).st_size
+        if size != done:
+            raise IOError(f"Size mismatch after upload: {size} != {done}")
+
+    def get(self, remote_path, local_path, callback=None):
+        meter = self.tuner.meter()
+        with self.sftp.open(remote_path, 'rb') as fr:
+            total = fr.stat().st_size
+            reader = PipelinedReader(fr, total, self.tuner.depth, REQUEST_SIZE)
+            with open(local_path, 'wb') as fl:
+                done = 0
+                while True:
+                    reader.depth = self.tuner.depth # The tuner may have moved it since the last reply
+                    data = reader.read()
+                    if not data: break
+                    fl.write(data)
+                    done += len(data)
+                    meter.update(done)
+                    if callback: callback(done, total)
+
+
+class ExecStreamEngine:
+    """
+    Streams file contents through 'cat' on an exec channel.
+    The data is one continuous stream instead of individual SFTP read/write
+    requests, so slow or rate-limited sftp-server subsystems are bypassed.
+    Metadata (stat) still goes through the SFTP session.
+    """
+    name = ENGINE_EXEC
+
+    def __init__(self, ssh_client, sftp, tuner=None, chunk_size=EXEC_CHUNK_SIZE):
+        self.ssh_client = ssh_client
+        self.sftp = sftp
+        self.tuner = tuner or TransferTuner()
+        self.chunk_size = chunk_size
+
+    def put(self, local_path, remote_path, callback=None):
+        total = os.path.getsize(local_path)
+        meter = self.tuner.meter()
+        channel = self.ssh_client.open_exec(f"cat > {shlex.quote(remote_path)}")
+        try:
+            sent = 0
+            with open(local_path, 'rb') as f:
+                while True:
+                    data = f.read(self.chunk_size)
+                    if not data: break
+                    channel.sendall(data)
+                    sent += len(data)
+                    meter.update(sent)
+                    if callback: callback(sent, total)
+            channel.shutdown_write()
+            self._check_exit(channel)
+        finally:
+            channel.close()
+
+    def get(self, remote_path, local_path, callback=None):
+        total = self.sftp.stat(remote_path).st_size
+        meter = self.tuner.meter()
+        # The receive window is ours to choose: size it from the host's bandwidth-delay product.
+        channel = self.ssh_client.open_exec(f"cat -- {shlex.quote(remote_path)}", window_size=self.tuner.window)
+        try:
+            received = 0
+            with open(local_path, 'wb') as f:
+                while True:
+                    data = channel.recv(self.chunk_size)
+                    if not data: break
+                    f.write(data)
+                    received += len(data)
+                    meter.update(received)
+                    if callback: callback(received, total)
+            self._check_exit(channel)
+        finally:
+            channel.close()
+
+    def _check_exit(self, channel):
+        status = channel.recv_exit_status()
+        if status != 0:
+            err = channel.makefile_stderr('rb').read().decode('utf-8', errors='replace').strip()
+            raise IOError(err or f"Remote command failed with status {status}")
+
+
+def create_engine(kind, ssh_client, sftp, tuner=None):
+    """Returns the engine for a profile's 'transfer_engine' value ('auto' starts as SFTP)."""
+    if kind == ENGINE_EXEC:
+        return ExecStreamEngine(ssh_client, sftp, tuner=tuner)
+    return SFTPTransferEngine(sftp, tuner=tuner)
+
+
+def probe_fastest(ssh_client, sftp, scratch_dir, size=PROBE_SIZE, tuner=None):
+    """
+    Uploads and downloads a small scratch file in scratch_dir (the user's
+    home folder, never the folder being browsed) with every engine and
+    returns the name of the fastest one. Engines that fail (e.g. no POSIX shell on the
+    server) are skipped; SFTP is returned if nothing could be measured.
+    """
+    candidates = [SFTPTransferEngine(sftp, tuner), ExecStreamEngine(ssh_client, sftp, tuner)]
+    remote_tmp = f"{scratch_dir.rstrip('/')}/.sightssh_probe_{os.getpid()}"
+
+    fd, local_src = tempfile.mkstemp(prefix="sightssh_probe_")
+    local_dst = local_src + ".back"
+    best_name, best_time = ENGINE_SFTP, None
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(os.urandom(size))
+
+        for engine in candidates:
+            try:
+                start = time.monotonic()
+                engine.put(local_src, remote_tmp)
+                engine.get(remote_tmp, local_dst)
+                elapsed = time.monotonic() - start
+                if os.path.getsize(local_dst) != size:
+                    raise IOError("size mismatch")
+            except Exception as e:
+                logging.info(f"Transfer probe: engine '{engine.name}' unavailable: {e}")
+                continue
+            logging.info(f"Transfer probe: engine '{engine.name}' took {elapsed:.3f}s")
+            if best_time is None or elapsed < best_time:
+                best_name, best_time = engine.name, elapsed
+    finally:
+        for path in (local_src, local_dst):
+            try: os.remove(path)
+            except: pass
+        try: sftp.remove(remote_tmp)
+        except: pass
+
+    return best_name
@@ -0,0 +1,111 @@
+import math
+import time
+import threading
+
+REQUEST_SIZE = 32768 # paramiko splits SFTP reads/writes into requests of this size
+MIN_DEPTH = 8
+MAX_DEPTH = 1024
+DEFAULT_DEPTH = 64
+
+MIN_WINDOW = 2 * 1024 * 1024
+MAX_WINDOW = 64 * 1024 * 1024
+DEFAULT_WINDOW = 16 * 1024 * 1024
+
+SAMPLE_INTERVAL = 0.5 # seconds between bandwidth samples during a job
+WARMUP_SECONDS = 3.0 # samples are taken only in the first seconds of each job
+EWMA_WEIGHT = 0.5
+BACKOFF_RATIO = 0.8 # A sample below this share of the best one means the last depth increase hurt
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+class TransferTuner:
+    """
+    Holds the throughput parameters of one host (SFTP read depth and exec
+    channel window) and adapts them from the measured round-trip time and
+    bandwidth, using the bandwidth-delay product.
+
+    Measured bandwidth is capped by the depth in use, so every sample that
+    hits the cap doubles the next depth; the values grow like TCP slow start
+    until the link (not the pipeline) is the limit. Deeper is not always
+    faster (server queues, rate limits): when a sample falls well below the
+    best one seen at a smaller depth, the depth is halved back towards that
+    depth and held there until a sample beats the best again.
+    """
+    def __init__(self, saved=None):
+        saved = saved or {}
+        self.rtt = saved.get("rtt")
+        self.bandwidth = saved.get("bandwidth")
+        self.depth = _clamp(int(saved.get("depth", DEFAULT_DEPTH)), MIN_DEPTH, MAX_DEPTH)
+        self.window = _clamp(int(saved.get("window", DEFAULT_WINDOW)), MIN_WINDOW, MAX_WINDOW)
+        self.best_bandwidth = None # Best raw sample of this session and the depth it was taken at
+        self.best_depth = None
+        self._depth_cap = MAX_DEPTH
+        self._lock = threading.Lock()
+
+    def measure_rtt(self, sftp, samples=3):
+        """Times a few no-op SFTP requests (realpath of '.') and keeps the fastest."""
+        times = []
+        for _ in range(samples):
+            start = time.monotonic()
+            sftp.normalize('.')
+            times.append(time.monotonic() - start)
+        with self._lock:
+            self.rtt = min(times)
+            self._retune()
+        return self.rtt
+
+    def observe(self, bandwidth):
+        """Feeds a bandwidth sample (bytes/second) and recomputes the parameters."""
+        if bandwidth <= 0: return
+        with self._lock:
+            if self.bandwidth:
+                self.bandwidth = EWMA_WEIGHT * bandwidth + (1 - EWMA_WEIGHT) * self.bandwidth
+            else:
+                self.bandwidth = bandwidth
+
+            if self.best_bandwidth is None or bandwidth > self.best_bandwidth:
+                self.best_bandwidth, self.best_depth = bandwidth, self.depth
+                self._depth_cap = MAX_DEPTH
+            elif bandwidth < BACKOFF_RATIO * self.best_bandwidth and self.depth > self.best_depth:
+                self._depth_cap = max(self.best_depth, self.depth // 2)
+            self._retune()
+
+    def _retune(self):
+        if not self.rtt or not self.bandwidth: return
+        bdp = self.bandwidth * self.rtt
+        # Twice the BDP in flight keeps the pipe full and lets the next sample grow.
+        self.depth = _clamp(int(math.ceil(2 * bdp / REQUEST_SIZE)), MIN_DEPTH, self._depth_cap)
+        self.window = _clamp(int(2 * bdp), MIN_WINDOW, MAX_WINDOW)
+
+    def meter(self):
+        """Returns a JobMeter that samples this tuner during the start of one transfer."""
+        return JobMeter(self)
+
+    def to_dict(self):
+        return {
+            "rtt": self.rtt,
+            "bandwidth": self.bandwidth,
+            "depth": self.depth,
+            "window": self.window
+        }
+
+
+class JobMeter:
+    """Tracks one transfer and reports bandwidth samples to the tuner during warm-up."""
+    def __init__(self, tuner):
+        self.tuner = tuner
+        self.start = time.monotonic()
+        self.last_time = self.start
+        self.last_bytes = 0
+
+    def update(self, transferred):
+        now = time.monotonic()
+        if now - self.start > WARMUP_SECONDS: return
+        elapsed = now - self.last_time
+        if elapsed < SAMPLE_INTERVAL: return
+        self.tuner.observe((transferred - self.last_bytes) / elapsed)
+        self.last_time = now
+        self.last_bytes = transferred
@@ -0,0 +1,167 @@
+import wx
+import time
+import threading
+from sightssh.core.i18n import tr
+from sightssh.accessibility.speech import SpeechManager
+from sightssh.core.file_entry import format_size, format_time
+
+SEARCH_DELAY = 200 # ms after the last key before the catalog is queried
+
+
+def format_age(timestamp, now=None):
+    """'just now', '5 min ago', '3 h ago', '2 days ago'; 'never' for None."""
+    if not timestamp: return tr("age_never")
+    seconds = max(0, (now or time.time()) - timestamp)
+    if seconds < 60: return tr("age_now")
+    if seconds < 3600: return tr("age_minutes").format(count=int(seconds // 60))
+    if seconds < 86400: return tr("age_hours").format(count=int(seconds // 3600))
+    return tr("age_days").format(count=int(seconds // 86400))
+
+
+class CatalogListCtrl(wx.ListCtrl):
+    """Virtual list of CatalogHit records: path, size, modified and when the entry was last seen."""
+    def __init__(self, parent):
+        super().__init__(parent, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL)
+        self.all_entries = []
+        self.InsertColumn(0, tr("lbl_path"), width=300)
+        self.InsertColumn(1, tr("lbl_size"), width=90)
+        self.InsertColumn(2, tr("lbl_modified"), width=120)
+        self.InsertColumn(3, tr("lbl_last_seen"), width=100)
+
+    def set_entries(self, entries):
+        self.all_entries = entries
+        self.SetItemCount(len(entries))
+        self.Refresh()
+        if entries: self.Select(0)
+
+    def get_entry(self, idx):
+        if 0 <= idx < len(self.all_entries): return self.all_entries[idx]
+        return None
+
+    def OnGetItemText(self, item, col):
+        hit = self.get_entry(item)
+        if hit is None: return ""
+        if col == 0: return f"[{hit.path}]" if hit.is_dir else hit.path
+        if col == 1: return "" if hit.is_dir or hit.size is None else format_size(hit.size)
+        if col == 2: return format_time(hit.mtime) if hit.mtime else ""
+        return format_age(hit.seen)
+
+
+class CatalogDialog(wx.Dialog):
+    """
+    Searches the local catalog of the server's files as the user types,
+    without touching the server. A query starting with '/' lists catalogued
+    paths beginning with it, and Enter on a path goes straight there.
+    Go To closes the dialog with selected_path set, for the panel to open
+    its folder. refresh() starts a full rescan; refresh_state() returns
+    the number of entries read by a running rescan, or None.
+    """
+    def __init__(self, parent, catalog, refresh, refresh_state):
+        super().__init__(parent, title=tr("dlg_catalog_title"), size=(650, 550),
+                         style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.catalog = catalog
+        self.refresh = refresh
+        self.refresh_state = refresh_state
+        self.speech = SpeechManager()
+        self.selected_path = None
+        self.gen = 0
+        self.search_timer = None
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        row = wx.BoxSizer(wx.HORIZONTAL)
+        row.Add(wx.StaticText(self, label=tr("lbl_catalog_query")), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 10)
+        self.txt_query = wx.TextCtrl(self, style=wx.TE_PROCESS_ENTER, name=tr("lbl_catalog_query"))
+        self.txt_query.SetToolTip(tr("desc_catalog_query"))
+        row.Add(self.txt_query, 1, wx.EXPAND)
+        sizer.Add(row, 0, wx.EXPAND | wx.ALL, 10)
+
+        self.lbl_status = wx.StaticText(self, label="")
+        sizer.Add(self.lbl_status, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+
+        self.results = CatalogListCtrl(self)
+        self.results.SetName(tr("lbl_search_results"))
+        sizer.Add(self.results, 1, wx.EXPAND | wx.ALL, 10)
+
+        bottom = wx.BoxSizer(wx.HORIZONTAL)
+        self.btn_goto = wx.Button(self, label=tr("btn_go_to"))
+        self.btn_refresh = wx.Button(self, label=tr("btn_refresh_catalog"))
+        self.btn_close = wx.Button(self, wx.ID_CANCEL, label=tr("btn_close"))
+        bottom.Add(self.btn_goto, 0, wx.RIGHT, 5)
+        bottom.Add(self.btn_refresh, 0, wx.RIGHT, 5)
+        bottom.Add(self.btn_close, 0)
+        sizer.Add(bottom, 0, wx.ALIGN_RIGHT | wx.ALL, 10)
+        self.SetSizer(sizer)
+
+        self.txt_query.Bind(wx.EVT_TEXT, self.on_text)
+        self.txt_query.Bind(wx.EVT_TEXT_ENTER, self.on_enter)
+        self.results.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_goto)
+        self.btn_goto.Bind(wx.EVT_BUTTON, self.on_goto)
+        self.btn_refresh.Bind(wx.EVT_BUTTON, self.on_refresh)
+        self.update_status()
+        self.CenterOnParent()
+        self.txt_query.SetFocus()
+
+    def update_status(self):
+        running = self.refresh_state()
+        if running is not None:
+            text = tr("msg_catalog_refreshing").format(count=running)
+        else:
+            text = tr("msg_catalog_status").format(count=self.catalog.count, age=format_age(self.catalog.last_scan))
+            if self.catalog.truncated: text += " " + tr("msg_catalog_full")
+        self.lbl_status.SetLabel(text)
+        return text
+
+    def on_text(self, event):
+        # Querying on every key would make fast typists wait on the database
+        if self.search_timer: self.search_timer.Stop()
+        self.search_timer = wx.CallLater(SEARCH_DELAY, self.run_query)
+
+    def run_query(self):
+        query = self.txt_query.GetValue().strip()
+        self.gen += 1
+        gen = self.gen
+
+        def run():
+            try:
+                hits = self.catalog.complete(query) if query.startswith("/") else self.catalog.search(query)
+                error = None
+            except Exception as e:
+                hits, error = [], e
+            wx.CallAfter(self._show, gen, query, hits, error)
+        threading.Thread(target=run, daemon=True).start()
+
+    def _show(self, gen, query, hits, error):
+        try:
+            if gen != self.gen: return
+            self.results.set_entries(hits)
+            if error:
+                msg = tr("err_catalog").format(error=error)
+            elif query:
+                msg = tr("msg_catalog_found").format(count=len(hits))
+            else:
+                msg = self.update_status()
+            self.speech.speak(msg)
+        except RuntimeError: pass
+
+    def on_enter(self, event):
+        query = self.txt_query.GetValue().strip()
+        if query.startswith("/") and len(query) > 1:
+            # A typed path goes straight there, catalogued or not
+            self.selected_path = query.rstrip("/")
+            self.EndModal(wx.ID_OK)
+        elif self.results.all_entries:
+            self.results.SetFocus()
+
+    def on_goto(self, event):
+        hit = self.results.get_entry(self.results.GetFocusedItem())
+        if hit is None: return
+        self.selected_path = hit.path
+        self.EndModal(wx.ID_OK)
+
+    def on_refresh(self, event):
+        self.refresh()
+        self.speech.speak(self.update_status())
+
+    def on_stop(self, event):
+        """Nothing runs on the server while the dialog is open; the background rescan belongs to the panel."""
+        if self.search_timer: self.search_timer.Stop()
@@ -1,4 +1,8 @@
 import wx
+from sightssh.core.i18n import tr
+
+# Profiles saved without a lock password are encrypted with this key
+DEFAULT_PROFILE_KEY = "UNPROTECTED_SIGHTSSH_DEFAULT_KEY"
 
 class PasswordDialog(wx.Dialog):
     def __init__(self, parent, title="Enter Password", message="Please enter password:"):
@@ -24,3 +28,28 @@ class PasswordDialog(wx.Dialog):
 
     def get_password(self):
         return self.password_ctrl.GetValue()
+
+def unlock_profile(parent, config, speech, profile_name):
+    """
+    Returns the profile password for profile_name, asking the user if the
+    profile is protected. Returns None if cancelled or incorrect.
+    """
+    # Try unlocking with default key first (Unprotected)
+    if config.verify_profile_password(profile_name, DEFAULT_PROFILE_KEY):
+        speech.speak(tr("msg_profile_unlocked"))
+        return DEFAULT_PROFILE_KEY
+
+    dlg = wx.PasswordEntryDialog(parent, message=tr("msg_enter_pass_for").format(name=profile_name), caption=tr("title_unlock").format(name=profile_name), value="")
+    if dlg.ShowModal() == wx.ID_OK:
+        pwd = dlg.GetValue()
+        dlg.Destroy()
+        
+        if config.verify_profile_password(profile_name, pwd):
+            speech.speak(tr("msg_password_correct"))
+            return pwd
+        else:
+            speech.speak(tr("msg_incorrect_pass"))
+            wx.MessageBox(tr("msg_incorrect_pass"), tr("err_title"))
+            return None
+    dlg.Destroy()
+    return None
@@ -0,0 +1,211 @@
+import wx
+import threading
+import posixpath
+from sightssh.core.i18n import tr
+from sightssh.accessibility.speech import SpeechManager
+from sightssh.core.file_entry import format_size
+from sightssh.core.remote_ops import OperationCancelled
+from sightssh.core.disk_usage import DiskUsageScan
+
+
+class UsageListCtrl(wx.ListCtrl):
+    """Virtual list of one folder of a UsageTree: name, size, percent of the folder, items below."""
+    def __init__(self, parent):
+        super().__init__(parent, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL)
+        self.tree = None
+        self.folder = 0
+        self.rows = [] # Tree indices; a leading -1 is the parent row
+        self.InsertColumn(0, tr("lbl_name"), width=240)
+        self.InsertColumn(1, tr("lbl_size"), width=100)
+        self.InsertColumn(2, tr("lbl_percent"), width=70)
+        self.InsertColumn(3, tr("lbl_items"), width=80)
+
+    def show(self, tree, folder, focus=None):
+        """Lists folder's children largest first; focus: tree index to select, else the first row."""
+        self.tree, self.folder = tree, folder
+        self.rows = ([-1] if folder != 0 else []) + list(tree.children(folder))
+        self.SetItemCount(len(self.rows))
+        self.Refresh()
+        if not self.rows: return
+        row = self.rows.index(focus) if focus in self.rows else 0
+        self.Select(row)
+        self.Focus(row)
+        self.EnsureVisible(row)
+
+    def get_node(self, idx):
+        """Tree index of a row; -1 for the parent row, None outside the list."""
+        if 0 <= idx < len(self.rows): return self.rows[idx]
+        return None
+
+    def OnGetItemText(self, item, col):
+        node = self.get_node(item)
+        if node is None: return ""
+        if node == -1: return ".." if col == 0 else ""
+        tree = self.tree
+        if col == 0:
+            name = tree.name(node)
+            return f"[{name}]" if tree.is_dir(node) else name
+        if col == 1: return format_size(tree.size(node))
+        if col == 2: return f"{tree.percent(node):.1f}%"
+        return str(tree.items(node)) if tree.is_dir(node) else ""
+
+
+class DiskUsageDialog(wx.Dialog):
+    """
+    Disk usage of a remote folder, ncdu style. One scan reads the sizes of
+    every entry below it; the list then shows a folder's contents by size
+    with each one's share of the folder. Enter opens a folder and Backspace
+    goes up, without further requests. Go To closes the dialog with
+    selected_path set, for the panel to open that folder. The caller calls
+    on_stop() once ShowModal returns.
+    """
+    def __init__(self, parent, ssh_client, root):
+        super().__init__(parent, title=tr("dlg_usage_title"), size=(650, 600),
+                         style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.ssh_client = ssh_client
+        self.speech = SpeechManager()
+        self.selected_path = None
+        self.scan = None
+        self.tree = None
+        self.gen = 0 # Bumped when a scan's results are no longer wanted
+        self.stopping = False
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        grid = wx.FlexGridSizer(cols=2, vgap=5, hgap=10)
+        grid.AddGrowableCol(1)
+        grid.Add(wx.StaticText(self, label=tr("lbl_search_folder")), 0, wx.ALIGN_CENTER_VERTICAL)
+        self.txt_folder = wx.TextCtrl(self, value=root, name=tr("lbl_search_folder"))
+        grid.Add(self.txt_folder, 1, wx.EXPAND)
+        grid.Add((0, 0))
+        self.chk_one_fs = wx.CheckBox(self, label=tr("chk_one_filesystem"))
+        self.chk_one_fs.SetValue(True)
+        grid.Add(self.chk_one_fs)
+        sizer.Add(grid, 0, wx.EXPAND | wx.ALL, 10)
+
+        btns = wx.BoxSizer(wx.HORIZONTAL)
+        self.btn_scan = wx.Button(self, label=tr("btn_analyze"))
+        self.btn_stop = wx.Button(self, label=tr("btn_stop"))
+        self.btn_stop.Disable()
+        btns.Add(self.btn_scan, 0, wx.RIGHT, 5)
+        btns.Add(self.btn_stop, 0)
+        sizer.Add(btns, 0, wx.LEFT | wx.RIGHT, 10)
+
+        self.lbl_status = wx.StaticText(self, label="")
+        sizer.Add(self.lbl_status, 0, wx.ALL | wx.EXPAND, 10)
+
+        self.results = UsageListCtrl(self)
+        self.results.SetName(tr("lbl_usage_results"))
+        sizer.Add(self.results, 1, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+
+        bottom = wx.BoxSizer(wx.HORIZONTAL)
+        self.btn_goto = wx.Button(self, label=tr("btn_go_to"))
+        self.btn_close = wx.Button(self, wx.ID_CANCEL, label=tr("btn_close"))
+        bottom.Add(self.btn_goto, 0, wx.RIGHT, 5)
+        bottom.Add(self.btn_close, 0)
+        sizer.Add(bottom, 0, wx.ALIGN_RIGHT | wx.ALL, 10)
+
+        self.SetSizer(sizer)
+        self.btn_scan.SetDefault()
+
+        self.btn_scan.Bind(wx.EVT_BUTTON, self.on_scan)
+        self.btn_stop.Bind(wx.EVT_BUTTON, self.on_stop)
+        self.btn_goto.Bind(wx.EVT_BUTTON, self.on_goto)
+        self.results.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_open)
+        self.results.Bind(wx.EVT_LIST_KEY_DOWN, self.on_key)
+        self.CenterOnParent()
+        self.btn_scan.SetFocus()
+
+    def on_scan(self, event):
+        root = posixpath.normpath(self.txt_folder.GetValue().strip() or "/")
+        self.on_stop(None)
+        self.gen += 1
+        self.stopping = False
+        self.tree = None
+        self.results.SetItemCount(0)
+        self.scan = DiskUsageScan(self.ssh_client, root, self.chk_one_fs.GetValue())
+        self.lbl_status.SetLabel(tr("msg_usage_scanning"))
+        self.speech.speak(tr("msg_usage_scanning"))
+        self.btn_stop.Enable()
+        threading.Thread(target=self._run, args=(self.scan, self.gen), daemon=True).start()
+
+    def _run(self, scan, gen):
+        error = None
+        try:
+            scan.run(lambda count, size: wx.CallAfter(self._progress, gen, count, size),
+                     lambda: self.gen != gen or self.stopping)
+        except OperationCancelled:
+            pass
+        except Exception as e:
+            error = e
+        wx.CallAfter(self._done, gen, scan, error)
+
+    def _progress(self, gen, count, size):
+        try:
+            if self.gen == gen and self.scan is not None:
+                self.lbl_status.SetLabel(tr("msg_usage_progress").format(count=count, size=format_size(size)))
+        except RuntimeError: pass
+
+    def _done(self, gen, scan, error):
+        try:
+            if self.gen != gen: return
+            self.btn_stop.Disable()
+            self.scan = None
+            tree = scan.tree
+            if error and len(tree) <= 1:
+                msg = tr("err_remote").format(error=error)
+                self.lbl_status.SetLabel(msg)
+                self.speech.speak(msg)
+                return
+            self.tree = tree
+            msg = tr("msg_usage_done" if tree.complete else "msg_usage_partial").format(
+                count=len(tree) - 1, size=format_size(tree.size(0)))
+            self.lbl_status.SetLabel(msg)
+            self.speech.speak(msg)
+            self.open_folder(0)
+            self.results.SetFocus()
+        except RuntimeError: pass
+
+    def on_stop(self, event):
+        """Stops the scan; what was read so far is still shown."""
+        if self.scan is None: return
+        self.stopping = True
+        if event is None: self.gen += 1 # Closing: nothing more to show
+        try:
+            self.btn_stop.Disable()
+            if event is not None: self.speech.speak(tr("msg_usage_stopping"))
+        except RuntimeError: pass
+
+    def open_folder(self, node, focus=None):
+        tree = self.tree
+        self.results.show(tree, node, focus)
+        if node != 0 or focus is not None:
+            self.speech.speak(tr("msg_usage_folder").format(
+                name=tree.name(node) if node else tree.root,
+                size=format_size(tree.size(node)), count=tree.items(node)), interrupt=False)
+
+    def go_up(self):
+        folder = self.results.folder
+        if self.tree is None or folder == 0: return
+        self.open_folder(self.tree.parent(folder), focus=folder)
+
+    def on_open(self, event):
+        node = self.results.get_node(event.GetIndex())
+        if node is None: return
+        if node == -1:
+            self.go_up()
+        elif self.tree.is_dir(node) and self.tree.children(node):
+            self.open_folder(node)
+
+    def on_key(self, event):
+        if event.GetKeyCode() == wx.WXK_BACK:
+            self.go_up()
+        else:
+            event.Skip()
+
+    def on_goto(self, event):
+        if self.tree is None: return
+        node = self.results.get_node(self.results.GetFocusedItem())
+        if node is None or node == -1: node = self.results.folder
+        self.on_stop(None)
+        self.selected_path = self.tree.path(node)
+        self.EndModal(wx.ID_OK)
@@ -0,0 +1,197 @@
+import wx
+import time
+import bisect
+
+from sightssh.core.file_entry import sort_entries
+
+TYPE_AHEAD_TIMEOUT = 1.0 # Seconds between keys before a new search starts
+
+
+class FileListCtrl(wx.ListCtrl):
+    """
+    Virtual report list over FileEntry records. Rows are not stored in the
+    control; OnGetItemText formats a cell when it is drawn or read.
+    all_entries is the whole listing; entries are the rows shown, which is
+    the same list unless a name filter narrows it.
+    """
+    def __init__(self, parent):
+        super().__init__(parent, style=wx.LC_REPORT | wx.LC_VIRTUAL)
+        self.all_entries = []
+        self.entries = []
+        self.name_filter = None # Predicate on names, see make_name_filter
+        self.columns = ["name"]
+        self.id_names = None # IdNameMap for the owner and group columns
+        self.sort_column = "name"
+        self.sort_descending = False
+        self._name_index = None # Sorted (casefolded name, row); built on first type-ahead
+        self._query = ""
+        self._last_key = 0
+
+    def set_columns(self, columns):
+        """columns: list of (key, label) in display order; the first is the name."""
+        self.DeleteAllColumns()
+        self.columns = []
+        for col, (key, label) in enumerate(columns):
+            self.InsertColumn(col, label, width=150 if col == 0 else 100)
+            self.columns.append(key)
+        self._show_sort_indicator()
+        self.Refresh()
+
+    @property
+    def sort_order(self):
+        """(column, descending) for sort_entries."""
+        return self.sort_column, self.sort_descending
+
+    def set_sort(self, column, descending=False):
+        """Re-sorts the rows in memory; focus and selection stay on the same names."""
+        self.sort_column, self.sort_descending = column, descending
+        self._show_sort_indicator()
+        head, rest = self._split_parent(self.all_entries)
+        self.set_entries(head + sort_entries(rest, column, descending, self.id_names), keep_focus=True)
+
+    def ordered(self, entries):
+        """A sorted copy of entries in this pane's order (cheap if they are already in it)."""
+        return sort_entries(list(entries), self.sort_column, self.sort_descending, self.id_names)
+
+    def _show_sort_indicator(self):
+        if not hasattr(self, "ShowSortIndicator"): return # wxPython < 4.1
+        if self.sort_column in self.columns:
+            self.ShowSortIndicator(self.columns.index(self.sort_column), not self.sort_descending)
+        else:
+            self.RemoveSortIndicator()
+
+    @staticmethod
+    def _split_parent(entries):
+        head = [e for e in entries[:1] if e.name == ".."]
+        return head, entries[len(head):]
+
+    def set_entries(self, entries, keep_focus=False):
+        """
+        Shows a new listing. Focus and selection go to the first row, or with
+        keep_focus stay on the same names where they still exist.
+        """
+        self.all_entries = entries
+        self._show(self._filtered(entries), keep_focus)
+
+    def set_filter(self, name_filter):
+        """
+        Narrows the rows to names matching name_filter (None shows all), without
+        touching the listing itself. Returns (rows shown, rows in the listing),
+        not counting the parent row.
+        """
+        self.name_filter = name_filter
+        self._show(self._filtered(self.all_entries), keep_focus=True)
+        return len(self._split_parent(self.entries)[1]), len(self._split_parent(self.all_entries)[1])
+
+    def _filtered(self, entries):
+        if self.name_filter is None: return entries
+        return [e for e in entries if e.name == ".." or self.name_filter(e.name)]
+
+    def _show(self, entries, keep_focus):
+        focused_name, selected_names = None, set()
+        if keep_focus:
+            focused = self.get_entry(self.GetFocusedItem())
+            if focused: focused_name = focused.name
+            selected_names = {self.entries[i].name for i in self.get_selected_indices()}
+        
+        self.clear_selection()
+        self.entries = entries
+        self._name_index = None
+        self.SetItemCount(len(entries))
+        self.Refresh()
+        if not entries: return
+        
+        target = 0
+        if keep_focus:
+            for i, entry in enumerate(entries):
+                if entry.name in selected_names: self.Select(i)
+                if entry.name == focused_name: target = i
+            # Moving focus makes screen readers announce the row again; only do it if the row moved
+            if self.GetFocusedItem() == target: return
+        else:
+            self.Select(0)
+        self.Focus(target)
+
+    def append_entries(self, entries):
+        """Adds rows at the end (streamed listings); focus and selection are left alone."""
+        if not entries: return
+        self._name_index = None
+        self.all_entries.extend(entries)
+        if self.entries is not self.all_entries:
+            self.entries.extend(self._filtered(entries))
+        self.SetItemCount(len(self.entries))
+
+    def merge_entries(self, changes):
+        """
+        Applies {name: FileEntry or None (gone)} to the listing, keeping the
+        parent row first, the rest sorted, and focus and selection by name.
+        """
+        if not changes: return
+        head, rest = self._split_parent(self.all_entries)
+        rest = [e for e in rest if e.name not in changes]
+        rest.extend(e for e in changes.values() if e is not None)
+        # Timsort makes this close to linear for an already sorted list
+        self.set_entries(head + sort_entries(rest, *self.sort_order, self.id_names), keep_focus=True)
+
+    def type_ahead(self, char):
+        """
+        Adds char to the type-ahead query (started afresh after a pause) and
+        returns (row, query) for the best match, or (-1, query). Each key is
+        a binary search over a name index, so large folders cost O(log n).
+        Typing the same letter again cycles through the names starting with it.
+        """
+        now = time.monotonic()
+        if now - self._last_key > TYPE_AHEAD_TIMEOUT: self._query = ""
+        self._last_key = now
+        self._query += char.casefold()
+        query = self._query
+
+        lo, hi = self._prefix_range(query)
+        if lo < hi: return self._name_index[lo][1], query
+        if len(set(query)) == 1:
+            lo, hi = self._prefix_range(query[0])
+            if lo < hi: return self._name_index[lo + (len(query) - 1) % (hi - lo)][1], query
+        return -1, query
+
+    def _prefix_range(self, prefix):
+        if self._name_index is None:
+            self._name_index = sorted((e.name.casefold(), i) for i, e in enumerate(self.entries) if e.name != "..")
+        lo = bisect.bisect_left(self._name_index, (prefix,))
+        hi = bisect.bisect_left(self._name_index, (prefix + "\U0010ffff",), lo)
+        return lo, hi
+
+    def focus_name(self, name):
+        """Selects and focuses the row called name; returns False if it is not shown."""
+        for i, entry in enumerate(self.entries):
+            if entry.name == name:
+                self.clear_selection()
+                self.Select(i)
+                self.Focus(i)
+                return True
+        return False
+
+    def get_selected_indices(self):
+        indices = []
+        idx = self.GetFirstSelected()
+        while idx != -1:
+            indices.append(idx)
+            idx = self.GetNextSelected(idx)
+        return indices
+
+    def clear_selection(self):
+        idx = self.GetFirstSelected()
+        while idx != -1:
+            self.SetItemState(idx, 0, wx.LIST_STATE_SELECTED)
+            idx = self.GetNextSelected(idx)
+
+    def get_entry(self, idx):
+        if 0 <= idx < len(self.entries): return self.entries[idx]
+        return None
+
+    def OnGetItemText(self, item, col):
+        if item >= len(self.entries) or col >= len(self.columns): return ""
+        return self.entries[item].column_text(self.columns[col], self.id_names)
+
+    def GetItemText(self, item, col=0):
+        # Virtual rows have no stored text on every platform; always go through the model.
+        return self.OnGetItemText(item, col)
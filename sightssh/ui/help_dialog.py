@@ -26,6 +26,13 @@ class HelpDialog(wx.Dialog):
             ("Delete", tr("hlp_delete")),
             ("F5", tr("hlp_refresh")),
             ("Backspace", tr("hlp_back_dir")),
+            ("Ctrl + F", tr("hlp_filter")),
+            ("Ctrl + Shift + F", tr("hlp_remote_search")),
+            ("Ctrl + Shift + G", tr("hlp_content_search")),
+            ("Ctrl + Shift + S", tr("hlp_folder_size")),
+            ("Ctrl + Shift + U", tr("hlp_disk_usage")),
+            ("Ctrl + Shift + K", tr("hlp_catalog")),
+            ("F3", tr("hlp_view_file")),
             ("Shift + Enter", tr("hlp_multiline")),
             ("Alt + H", tr("btn_shortcuts"))
         ]
@@ -5,7 +5,7 @@ class PermissionsDialog(wx.Dialog):
     def __init__(self, parent, current_mode, show_recursive=False):
         super().__init__(parent, title=tr("lbl_permissions"), size=(350, 450))
         self.mode = current_mode
-        self.result_mode = current_mode
+        self.result_mode = current_mode & 0o7777 # st_mode also carries the file type bits
         
         sizer = wx.BoxSizer(wx.VERTICAL)
         
@@ -56,9 +56,30 @@ class PermissionsDialog(wx.Dialog):
         
         # Recursive Checkbox
         self.chk_recursive = wx.CheckBox(self, label=tr("chk_recursive"))
+        self.chk_recursive.Bind(wx.EVT_CHECKBOX, self.on_recursive)
+        sizer.Add(self.chk_recursive, 0, wx.ALL, 10)
+        
+        # Files inside folders get the same mode unless the user opts in to a separate one (e.g. 755 -> 644)
+        self.file_mode_edited = False
+        self.chk_file_mode = wx.CheckBox(self, label=tr("chk_file_mode"))
+        self.chk_file_mode.Bind(wx.EVT_CHECKBOX, self.on_file_mode_check)
+        self.chk_file_mode.Disable()
+        sizer.Add(self.chk_file_mode, 0, wx.ALL, 10)
+        
+        file_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.lbl_file_mode = wx.StaticText(self, label=tr("lbl_file_mode"))
+        self.txt_file_mode = wx.TextCtrl(self, value=oct(self.mode & 0o7777)[2:], name=tr("lbl_file_mode"))
+        self.txt_file_mode.Bind(wx.EVT_TEXT, self.on_file_mode_text)
+        self.txt_file_mode.Disable()
+        file_sizer.Add(self.lbl_file_mode, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 10)
+        file_sizer.Add(self.txt_file_mode, 1, wx.ALIGN_CENTER_VERTICAL)
+        sizer.Add(file_sizer, 0, wx.EXPAND | wx.ALL, 10)
+        
         if not show_recursive:
             self.chk_recursive.Hide()
-        sizer.Add(self.chk_recursive, 0, wx.ALL, 10)
+            self.chk_file_mode.Hide()
+            self.lbl_file_mode.Hide()
+            self.txt_file_mode.Hide()
         
         # Buttons
         btns = wx.BoxSizer(wx.HORIZONTAL)
@@ -97,6 +118,7 @@ class PermissionsDialog(wx.Dialog):
         
         self.result_mode = new_mode
         self.txt_octal.ChangeValue(oct(new_mode)[2:])
+        self._sync_file_mode()
 
     def on_text(self, event):
         val = self.txt_octal.GetValue()
@@ -115,12 +137,43 @@ class PermissionsDialog(wx.Dialog):
             update_grp(self.grp_others, 0)
             
             self.result_mode = mode
+            self._sync_file_mode()
         except ValueError:
             pass # Ignore invalid input while typing
 
+    def _separate_file_mode(self):
+        return self.chk_recursive.GetValue() and self.chk_file_mode.GetValue()
+
+    def _sync_file_mode(self):
+        # Follow the main mode until the user types their own file mode;
+        # the opt-in split suggests it without execute bits (755 -> 644)
+        if not self.file_mode_edited:
+            mode = self.result_mode & 0o7666 if self._separate_file_mode() else self.result_mode
+            self.txt_file_mode.ChangeValue(oct(mode)[2:])
+
+    def on_recursive(self, event):
+        self.chk_file_mode.Enable(self.chk_recursive.GetValue())
+        self.txt_file_mode.Enable(self._separate_file_mode())
+        self._sync_file_mode()
+
+    def on_file_mode_check(self, event):
+        self.txt_file_mode.Enable(self._separate_file_mode())
+        self._sync_file_mode()
+
+    def on_file_mode_text(self, event):
+        self.file_mode_edited = True
+
     def GetMode(self):
         return self.result_mode
 
     def IsRecursive(self):
         # Checkbox might be hidden
         return self.chk_recursive.IsShown() and self.chk_recursive.GetValue()
+
+    def GetFileMode(self):
+        """Mode for files inside recursed folders: the main mode unless a separate one was chosen and is valid."""
+        if not self._separate_file_mode(): return self.result_mode
+        try:
+            return int(self.txt_file_mode.GetValue(), 8)
+        except ValueError:
+            return self.result_mode
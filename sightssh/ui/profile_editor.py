@@ -2,6 +2,7 @@ import wx
 from sightssh.core.config_manager import ConfigManager
 from sightssh.accessibility.speech import SpeechManager
 from sightssh.core.i18n import tr
+from sightssh.core.transfer_engine import ENGINE_CHOICES, ENGINE_SFTP
 
 class ProfileEditorPanel(wx.Panel):
     def __init__(self, parent, profile_name=None, existing_data=None, profile_password=None):
@@ -63,6 +64,15 @@ class ProfileEditorPanel(wx.Panel):
         self.txt_secret = wx.TextCtrl(self, style=wx.TE_PASSWORD, value=data['secret'] if data else "")
         form_sizer.Add(self.txt_secret, 1, wx.EXPAND)
 
+        # Transfer Engine
+        form_sizer.Add(wx.StaticText(self, label=tr("lbl_transfer_engine")), 0, wx.ALIGN_CENTER_VERTICAL)
+        engine_labels = [tr("val_engine_sftp"), tr("val_engine_exec"), tr("val_engine_auto")]
+        self.cmb_engine = wx.Choice(self, choices=engine_labels, name=f"{tr('lbl_transfer_engine')}. {tr('desc_transfer_engine')}")
+        curr_engine = data.get('transfer_engine', ENGINE_SFTP) if data else ENGINE_SFTP
+        self.cmb_engine.SetSelection(ENGINE_CHOICES.index(curr_engine) if curr_engine in ENGINE_CHOICES else 0)
+        self.cmb_engine.SetToolTip(tr("desc_transfer_engine"))
+        form_sizer.Add(self.cmb_engine, 1, wx.EXPAND)
+
         # Profile Lock Checkbox
         form_sizer.Add(wx.StaticText(self, label=tr("lbl_security")), 0, wx.ALIGN_CENTER_VERTICAL)
         self.chk_protected = wx.CheckBox(self, label=tr("chk_protect_profile"))
@@ -162,6 +172,7 @@ class ProfileEditorPanel(wx.Panel):
         user = self.txt_user.GetValue().strip()
         auth_type = "password" if self.radio_auth.GetSelection() == 0 else "key"
         secret = self.txt_secret.GetValue()
+        transfer_engine = ENGINE_CHOICES[self.cmb_engine.GetSelection()]
         
         is_protected = self.chk_protected.GetValue()
         prof_pass = self.txt_profile_pass.GetValue()
@@ -202,7 +213,8 @@ class ProfileEditorPanel(wx.Panel):
                 auth_type=auth_type,
                 secret=secret,
                 key_path=secret if auth_type == "key" else "", # Use secret field for path if key selected
-                profile_password=final_prof_pass
+                profile_password=final_prof_pass,
+                transfer_engine=transfer_engine
             )
             self.speech.speak(tr("msg_profile_saved"))
             self.on_cancel(None) # Go back
@@ -3,6 +3,7 @@ from sightssh.core.config_manager import ConfigManager
 
 from sightssh.accessibility.speech import SpeechManager
 from sightssh.core.i18n import tr
+from sightssh.ui.dialogs import unlock_profile
 
 class ProfileListPanel(wx.Panel):
     def __init__(self, parent):
@@ -74,26 +75,7 @@ class ProfileListPanel(wx.Panel):
 
     def prompt_profile_password(self, profile_name):
         """Returns True if password correct or (future) no password needed."""
-        # Try unlocking with default key first (Unprotected)
-        default_key = "UNPROTECTED_SIGHTSSH_DEFAULT_KEY"
-        if self.config.verify_profile_password(profile_name, default_key):
-            self.speech.speak(tr("msg_profile_unlocked"))
-            return default_key
-
-        dlg = wx.PasswordEntryDialog(self, message=tr("msg_enter_pass_for").format(name=profile_name), caption=tr("title_unlock").format(name=profile_name), value="")
-        if dlg.ShowModal() == wx.ID_OK:
-            pwd = dlg.GetValue()
-            dlg.Destroy()
-            
-            if self.config.verify_profile_password(profile_name, pwd):
-                self.speech.speak(tr("msg_password_correct"))
-                return pwd
-            else:
-                self.speech.speak(tr("msg_incorrect_pass"))
-                wx.MessageBox(tr("msg_incorrect_pass"), tr("err_title"))
-                return None
-        dlg.Destroy()
-        return None
+        return unlock_profile(self, self.config, self.speech, profile_name)
 
     def on_connect(self, event):
         name = self.get_selected_profile()
@@ -0,0 +1,290 @@
+import wx
+import threading
+import posixpath
+from sightssh.core.i18n import tr
+from sightssh.accessibility.speech import SpeechManager
+from sightssh.core.remote_ops import OperationCancelled
+from sightssh.core.remote_search import RemoteSearch, SearchCriteria, ContentSearch, parse_size, read_lines
+from sightssh.ui.file_list import FileListCtrl
+
+KIND_CHOICES = ("any", "file", "dir")
+PREVIEW_CONTEXT = 5 # Lines shown above and below a content hit
+PREVIEW_DELAY = 250 # ms the focus must rest on a hit before its preview is fetched
+
+
+class _StreamingSearchDialog(wx.Dialog):
+    """
+    Search form, Search/Stop buttons, status line and a result list that
+    fills while the server is still searching. What differs between the
+    searches is passed in as callables:
+    build_fields() adds the form fields (with add_field);
+    results_class(parent) creates the result list;
+    make_search() returns the search for the current form (an object with
+    run(on_hits, is_cancelled) and .truncated), or None;
+    result_path(idx) returns the path of a result;
+    build_below_results() and on_finish() are optional.
+    They are called in layout order, so the tab order follows the layout.
+    Activating a result closes the dialog with selected_path set, for the
+    panel to open its folder. The caller calls on_stop() once ShowModal
+    returns.
+    """
+    def __init__(self, parent, ssh_client, root, title, build_fields, results_class, make_search, result_path,
+                 build_below_results=None, on_finish=None):
+        super().__init__(parent, title=title, size=(650, 600),
+                         style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.ssh_client = ssh_client
+        self.make_search = make_search
+        self.result_path = result_path
+        self.on_finish = on_finish
+        self.speech = SpeechManager()
+        self.selected_path = None
+        self.search = None
+        self.root = root
+        self.gen = 0 # Bumped to stop the running search
+
+        self.sizer = wx.BoxSizer(wx.VERTICAL)
+        self.grid = wx.FlexGridSizer(cols=2, vgap=5, hgap=10)
+        self.grid.AddGrowableCol(1)
+        self.txt_folder = self.add_field(tr("lbl_search_folder"), wx.TextCtrl(self, value=root, name=tr("lbl_search_folder")))
+        build_fields()
+        self.sizer.Add(self.grid, 0, wx.EXPAND | wx.ALL, 10)
+
+        btns = wx.BoxSizer(wx.HORIZONTAL)
+        self.btn_search = wx.Button(self, label=tr("btn_search"))
+        self.btn_stop = wx.Button(self, label=tr("btn_stop"))
+        self.btn_stop.Disable()
+        btns.Add(self.btn_search, 0, wx.RIGHT, 5)
+        btns.Add(self.btn_stop, 0)
+        self.sizer.Add(btns, 0, wx.LEFT | wx.RIGHT, 10)
+
+        self.lbl_status = wx.StaticText(self, label="")
+        self.sizer.Add(self.lbl_status, 0, wx.ALL | wx.EXPAND, 10)
+
+        self.results = results_class(self)
+        self.results.SetName(tr("lbl_search_results"))
+        self.sizer.Add(self.results, 1, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+        if build_below_results: build_below_results()
+
+        bottom = wx.BoxSizer(wx.HORIZONTAL)
+        self.btn_goto = wx.Button(self, label=tr("btn_go_to"))
+        self.btn_close = wx.Button(self, wx.ID_CANCEL, label=tr("btn_close"))
+        bottom.Add(self.btn_goto, 0, wx.RIGHT, 5)
+        bottom.Add(self.btn_close, 0)
+        self.sizer.Add(bottom, 0, wx.ALIGN_RIGHT | wx.ALL, 10)
+
+        self.SetSizer(self.sizer)
+        self.btn_search.SetDefault()
+
+        self.btn_search.Bind(wx.EVT_BUTTON, self.on_search)
+        self.btn_stop.Bind(wx.EVT_BUTTON, self.on_stop)
+        self.btn_goto.Bind(wx.EVT_BUTTON, self.on_goto)
+        self.results.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_goto)
+        self.CenterOnParent()
+
+    def add_field(self, label, ctrl):
+        self.grid.Add(wx.StaticText(self, label=label), 0, wx.ALIGN_CENTER_VERTICAL)
+        self.grid.Add(ctrl, 1, wx.EXPAND)
+        return ctrl
+
+    def on_search(self, event):
+        self.root = posixpath.normpath(self.txt_folder.GetValue().strip() or "/")
+        search = self.make_search()
+        if search is None: return
+        self.on_stop(None)
+        self.gen += 1
+        self.results.set_entries([])
+        self.lbl_status.SetLabel(tr("msg_searching"))
+        self.speech.speak(tr("msg_searching"))
+        self.btn_stop.Enable()
+        self.search = search
+        threading.Thread(target=self._run, args=(search, self.gen), daemon=True).start()
+
+    def _run(self, search, gen):
+        error = None
+        try:
+            search.run(lambda batch: wx.CallAfter(self._add, gen, batch), lambda: self.gen != gen)
+        except OperationCancelled:
+            pass
+        except Exception as e:
+            error = e
+        wx.CallAfter(self._done, gen, search, error)
+
+    def _add(self, gen, batch):
+        try:
+            if self.gen != gen: return
+            first = not self.results.all_entries
+            self.results.append_entries(batch)
+            self.lbl_status.SetLabel(tr("msg_search_found").format(count=len(self.results.all_entries)))
+            if first: self.speech.speak(tr("msg_search_first_hit"), interrupt=False)
+        except RuntimeError: pass
+
+    def _done(self, gen, search, error):
+        try:
+            if self.gen != gen: return
+            self.btn_stop.Disable()
+            self.search = None
+            count = len(self.results.all_entries)
+            if self.on_finish: self.on_finish()
+            if error:
+                msg = tr("err_remote").format(error=error)
+            elif search.truncated:
+                msg = tr("msg_search_truncated").format(count=count)
+            else:
+                msg = tr("msg_search_done").format(count=count)
+            self.lbl_status.SetLabel(msg)
+            self.speech.speak(msg)
+        except RuntimeError: pass
+
+    def on_stop(self, event):
+        if self.search is None: return
+        self.gen += 1 # The worker sees this through is_cancelled and closes its channel
+        self.search = None
+        try:
+            self.btn_stop.Disable()
+            msg = tr("msg_search_stopped").format(count=len(self.results.all_entries))
+            self.lbl_status.SetLabel(msg)
+            if event is not None: self.speech.speak(msg)
+        except RuntimeError: pass
+
+    def on_goto(self, event):
+        path = self.result_path(self.results.GetFocusedItem())
+        if path is None: return
+        self.on_stop(None)
+        self.selected_path = path
+        self.EndModal(wx.ID_OK)
+
+
+class RemoteSearchDialog(_StreamingSearchDialog):
+    """Finds files under a remote folder by name, size, age and type."""
+    def __init__(self, parent, ssh_client, root):
+        super().__init__(parent, ssh_client, root, tr("dlg_search_title"), self._build_fields, FileListCtrl,
+                         self._make_search, self._result_path, on_finish=self._sort_results)
+        self.results.set_columns([("name", tr("lbl_path")), ("size", tr("lbl_size")), ("modified", tr("lbl_modified"))])
+        self.txt_name.SetFocus()
+
+    def _build_fields(self):
+        self.txt_name = self.add_field(tr("lbl_search_name"), wx.TextCtrl(self, name=tr("lbl_search_name")))
+        self.txt_name.SetToolTip(tr("desc_search_name"))
+        self.txt_min_size = self.add_field(tr("lbl_min_size"), wx.TextCtrl(self, name=tr("lbl_min_size")))
+        self.txt_max_size = self.add_field(tr("lbl_max_size"), wx.TextCtrl(self, name=tr("lbl_max_size")))
+        self.txt_min_size.SetToolTip(tr("desc_size_field"))
+        self.txt_max_size.SetToolTip(tr("desc_size_field"))
+        self.spin_days = self.add_field(tr("lbl_modified_days"), wx.SpinCtrl(self, min=0, max=36500, initial=0, name=tr("lbl_modified_days")))
+        self.cmb_kind = self.add_field(tr("lbl_search_kind"), wx.Choice(self, choices=[tr("opt_kind_any"), tr("opt_kind_file"), tr("opt_kind_dir")], name=tr("lbl_search_kind")))
+        self.cmb_kind.SetSelection(0)
+
+    def _make_search(self):
+        try:
+            min_size = parse_size(self.txt_min_size.GetValue())
+            max_size = parse_size(self.txt_max_size.GetValue())
+        except ValueError as e:
+            wx.MessageBox(tr("err_size_value").format(value=e), tr("err_title"), wx.ICON_WARNING)
+            return None
+        criteria = SearchCriteria(self.txt_name.GetValue().strip(), min_size, max_size,
+                                  self.spin_days.GetValue() or None, KIND_CHOICES[self.cmb_kind.GetSelection()])
+        return RemoteSearch(self.ssh_client, self.root, criteria)
+
+    def _sort_results(self):
+        self.results.set_entries(self.results.ordered(self.results.all_entries), keep_focus=True)
+
+    def _result_path(self, idx):
+        entry = self.results.get_entry(idx)
+        return posixpath.join(self.root, entry.name) if entry else None
+
+
+class HitListCtrl(wx.ListCtrl):
+    """Virtual list of ContentHit records (file, line, text); same interface as FileListCtrl where the dialog needs it."""
+    def __init__(self, parent):
+        super().__init__(parent, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL)
+        self.all_entries = []
+        self.root = "/"
+        self.InsertColumn(0, tr("lbl_file"), width=220)
+        self.InsertColumn(1, tr("lbl_line"), width=60)
+        self.InsertColumn(2, tr("lbl_text"), width=320)
+
+    def set_entries(self, entries):
+        self.all_entries = entries
+        self.SetItemCount(len(entries))
+        self.Refresh()
+
+    def append_entries(self, entries):
+        first = not self.all_entries
+        self.all_entries.extend(entries)
+        self.SetItemCount(len(self.all_entries))
+        if first and self.all_entries: self.Select(0)
+
+    def get_entry(self, idx):
+        if 0 <= idx < len(self.all_entries): return self.all_entries[idx]
+        return None
+
+    def OnGetItemText(self, item, col):
+        hit = self.get_entry(item)
+        if hit is None: return ""
+        if col == 0:
+            prefix = self.root.rstrip("/") + "/"
+            return hit.path[len(prefix):] if hit.path.startswith(prefix) else hit.path
+        if col == 1: return str(hit.line)
+        return hit.text.strip()
+
+
+class ContentSearchDialog(_StreamingSearchDialog):
+    """Finds lines containing a text (or regular expression) in files under a remote folder."""
+    def __init__(self, parent, ssh_client, root):
+        super().__init__(parent, ssh_client, root, tr("dlg_grep_title"), self._build_fields, HitListCtrl,
+                         self._make_search, self._result_path, build_below_results=self._build_preview)
+        self.preview_timer = None
+        self.preview_gen = 0
+        self.results.Bind(wx.EVT_LIST_ITEM_FOCUSED, self.on_hit_focus)
+        self.txt_text.SetFocus()
+
+    def _build_fields(self):
+        self.txt_text = self.add_field(tr("lbl_grep_text"), wx.TextCtrl(self, name=tr("lbl_grep_text")))
+        self.chk_regex = wx.CheckBox(self, label=tr("chk_regex"))
+        self.chk_ignore_case = wx.CheckBox(self, label=tr("chk_ignore_case"))
+        self.chk_ignore_case.SetValue(True)
+        self.grid.Add((0, 0))
+        self.grid.Add(self.chk_regex)
+        self.grid.Add((0, 0))
+        self.grid.Add(self.chk_ignore_case)
+
+    def _build_preview(self):
+        self.sizer.Add(wx.StaticText(self, label=tr("lbl_preview")), 0, wx.LEFT | wx.TOP, 10)
+        self.txt_preview = wx.TextCtrl(self, style=wx.TE_MULTILINE | wx.TE_READONLY | wx.TE_DONTWRAP,
+                                       size=(-1, 150), name=tr("lbl_preview"))
+        self.sizer.Add(self.txt_preview, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+
+    def _make_search(self):
+        text = self.txt_text.GetValue()
+        if not text: return None
+        self.results.root = self.root
+        return ContentSearch(self.ssh_client, self.root, text,
+                             regex=self.chk_regex.GetValue(), ignore_case=self.chk_ignore_case.GetValue())
+
+    def _result_path(self, idx):
+        hit = self.results.get_entry(idx)
+        return hit.path if hit else None
+
+    def on_hit_focus(self, event):
+        # Arrowing through hits should not start a download per row
+        if self.preview_timer: self.preview_timer.Stop()
+        self.preview_timer = wx.CallLater(PREVIEW_DELAY, self.load_preview, event.GetIndex())
+
+    def load_preview(self, idx):
+        hit = self.results.get_entry(idx)
+        if hit is None: return
+        self.preview_gen += 1
+        gen = self.preview_gen
+
+        def run():
+            try:
+                lines = read_lines(self.ssh_client, hit.path, hit.line - PREVIEW_CONTEXT, hit.line + PREVIEW_CONTEXT)
+                text = "\n".join(f"{'>' if n == hit.line else ' '} {n}: {line}" for n, line in lines)
+            except Exception as e:
+                text = tr("err_remote").format(error=e)
+            wx.CallAfter(self._show_preview, gen, text)
+        threading.Thread(target=run, daemon=True).start()
+
+    def _show_preview(self, gen, text):
+        try:
+            if gen == self.preview_gen: self.txt_preview.SetValue(text)
+        except RuntimeError: pass
@@ -64,6 +64,13 @@ class SettingsDialog(wx.Dialog):
         self.chk_confirm.SetValue(self.settings.get("confirm_delete", False))
         self.chk_confirm_disconnect.SetValue(self.settings.get("confirm_disconnect", False))
         self.chk_restore_path.SetValue(self.settings.get("restore_last_path", True))
+        self.chk_server_cmds.SetValue(self.settings.get("allow_server_commands", False))
+        self.chk_trash.SetValue(self.settings.get("delete_to_trash", False))
+        self.chk_revalidate.SetValue(self.settings.get("revalidate_listings", True))
+        self.chk_prefetch.SetValue(self.settings.get("prefetch_listings", True))
+        self.chk_catalog.SetValue(self.settings.get("catalog_enabled", False))
+        self.spin_catalog_hours.SetValue(self.settings.get("catalog_refresh_hours", 24))
+        self.spin_catalog_size.SetValue(self.settings.get("catalog_max_entries", 1000000) // 1000)
         self.chk_ascii.SetValue(self.settings.get("ascii_filter", True))
         
         # Terminal
@@ -154,6 +161,63 @@ class SettingsDialog(wx.Dialog):
         self.chk_restore_path.SetToolTip(tr("desc_restore_path"))
         sizer.Add(self.chk_restore_path, 0, wx.EXPAND | wx.ALL, 10)
         
+        # Server-side commands for bulk operations
+        label_text = f"{tr('lbl_server_commands')}. {tr('desc_server_commands')}"
+        self.chk_server_cmds = wx.CheckBox(panel, label=label_text, name=label_text)
+        self.chk_server_cmds.SetValue(self.settings.get("allow_server_commands", False))
+        self.chk_server_cmds.SetToolTip(tr("desc_server_commands"))
+        sizer.Add(self.chk_server_cmds, 0, wx.EXPAND | wx.ALL, 10)
+        
+        # Remote trash
+        label_text = f"{tr('lbl_delete_to_trash')}. {tr('desc_delete_to_trash')}"
+        self.chk_trash = wx.CheckBox(panel, label=label_text, name=label_text)
+        self.chk_trash.SetValue(self.settings.get("delete_to_trash", False))
+        self.chk_trash.SetToolTip(tr("desc_delete_to_trash"))
+        sizer.Add(self.chk_trash, 0, wx.EXPAND | wx.ALL, 10)
+        
+        # Cached remote listings
+        label_text = f"{tr('lbl_revalidate_listings')}. {tr('desc_revalidate_listings')}"
+        self.chk_revalidate = wx.CheckBox(panel, label=label_text, name=label_text)
+        self.chk_revalidate.SetValue(self.settings.get("revalidate_listings", True))
+        self.chk_revalidate.SetToolTip(tr("desc_revalidate_listings"))
+        sizer.Add(self.chk_revalidate, 0, wx.EXPAND | wx.ALL, 10)
+        
+        label_text = f"{tr('lbl_prefetch_listings')}. {tr('desc_prefetch_listings')}"
+        self.chk_prefetch = wx.CheckBox(panel, label=label_text, name=label_text)
+        self.chk_prefetch.SetValue(self.settings.get("prefetch_listings", True))
+        self.chk_prefetch.SetToolTip(tr("desc_prefetch_listings"))
+        sizer.Add(self.chk_prefetch, 0, wx.EXPAND | wx.ALL, 10)
+        
+        # Offline catalog of remote file names
+        label_text = f"{tr('lbl_catalog')}. {tr('desc_catalog')}"
+        self.chk_catalog = wx.CheckBox(panel, label=label_text, name=label_text)
+        self.chk_catalog.SetValue(self.settings.get("catalog_enabled", False))
+        self.chk_catalog.SetToolTip(tr("desc_catalog"))
+        sizer.Add(self.chk_catalog, 0, wx.EXPAND | wx.ALL, 10)
+        
+        ch_text = tr("lbl_catalog_hours")
+        ch_desc = tr("desc_catalog_hours")
+        ch_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        lbl_ch = wx.StaticText(panel, label=ch_text)
+        lbl_ch.SetToolTip(ch_desc)
+        self.spin_catalog_hours = wx.SpinCtrl(panel, min=0, max=720, initial=self.settings.get("catalog_refresh_hours", 24), name=f"{ch_text}. {ch_desc}")
+        self.spin_catalog_hours.SetToolTip(ch_desc)
+        ch_sizer.Add(lbl_ch, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 10)
+        ch_sizer.Add(self.spin_catalog_hours, 0, wx.ALIGN_CENTER_VERTICAL)
+        sizer.Add(ch_sizer, 0, wx.EXPAND | wx.ALL, 10)
+        
+        # Size limit, in thousands of entries
+        cs_text = tr("lbl_catalog_size")
+        cs_desc = tr("desc_catalog_size")
+        cs_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        lbl_cs = wx.StaticText(panel, label=cs_text)
+        lbl_cs.SetToolTip(cs_desc)
+        self.spin_catalog_size = wx.SpinCtrl(panel, min=10, max=100000, initial=self.settings.get("catalog_max_entries", 1000000) // 1000, name=f"{cs_text}. {cs_desc}")
+        self.spin_catalog_size.SetToolTip(cs_desc)
+        cs_sizer.Add(lbl_cs, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 10)
+        cs_sizer.Add(self.spin_catalog_size, 0, wx.ALIGN_CENTER_VERTICAL)
+        sizer.Add(cs_sizer, 0, wx.EXPAND | wx.ALL, 10)
+        
         # ASCII Filter
         label_text = f"{tr('lbl_ascii_filter')}. {tr('desc_ascii_filter')}"
         self.chk_ascii = wx.CheckBox(panel, label=label_text, name=label_text)
@@ -383,6 +447,13 @@ class SettingsDialog(wx.Dialog):
             new_settings["confirm_delete"] = self.chk_confirm.GetValue()
             new_settings["confirm_disconnect"] = self.chk_confirm_disconnect.GetValue()
             new_settings["restore_last_path"] = self.chk_restore_path.GetValue()
+            new_settings["allow_server_commands"] = self.chk_server_cmds.GetValue()
+            new_settings["delete_to_trash"] = self.chk_trash.GetValue()
+            new_settings["revalidate_listings"] = self.chk_revalidate.GetValue()
+            new_settings["prefetch_listings"] = self.chk_prefetch.GetValue()
+            new_settings["catalog_enabled"] = self.chk_catalog.GetValue()
+            new_settings["catalog_refresh_hours"] = self.spin_catalog_hours.GetValue()
+            new_settings["catalog_max_entries"] = self.spin_catalog_size.GetValue() * 1000
             new_settings["ascii_filter"] = self.chk_ascii.GetValue()
             new_settings["check_updates_on_startup"] = self.chk_updates.GetValue()
             
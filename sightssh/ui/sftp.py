@@ -1,18 +1,48 @@
 import wx
 import os
+import re
+import posixpath
 import threading
 import stat
 import shutil
-import math
-import datetime
 import time
+import logging
 
 from sightssh.accessibility.speech import SpeechManager
 from sightssh.core.i18n import tr
 from sightssh.ui.transfer_dialog import TransferProgressDialog
+from sightssh.ui.file_list import FileListCtrl
+from sightssh.core.file_entry import FileEntry, sort_entries, scan_local, make_name_filter, format_size, SORT_COLUMNS
+from sightssh.core.local_watch import LocalWatcher
+from sightssh.core.remote_watch import RemoteWatcher
+from sightssh.core.id_names import IdNameMap
+from sightssh.core.dir_sizes import DirSizeCache, RemoteSizer, local_dir_sizes
+from sightssh.core.remote_listing import (
+    ListingCache, ListingPrefetcher, fetch_listing, listing_signature, parent_path,
+    LISTING_TTL, LISTING_FIRST_BATCH, LISTING_BATCH
+)
 from sightssh.core.config_manager import ConfigManager
 from sightssh.ui.permissions_dialog import PermissionsDialog
 from sightssh.ui.conflict_dialog import ConflictDialog
+from sightssh.core.transfer_engine import create_engine, probe_fastest, ENGINE_AUTO
+from sightssh.core.transfer_tuning import TransferTuner
+from sightssh.core.remote_ops import RemoteCopier, RemoteDeleter, RemoteChmodder, TreeEnumerator, OperationCancelled
+from sightssh.core.relay import HostRelay
+from sightssh.core.remote_trash import RemoteTrash, trash_dir_for, is_cross_device, PURGE_DELAY
+from sightssh.core.ssh_client import SightSSHClient
+from sightssh.ui.dialogs import unlock_profile
+from sightssh.ui.search_dialog import RemoteSearchDialog, ContentSearchDialog
+from sightssh.ui.disk_usage_dialog import DiskUsageDialog
+from sightssh.ui.catalog_dialog import CatalogDialog
+from sightssh.ui.viewer_dialog import RemoteViewerDialog
+from sightssh.core.remote_catalog import RemoteCatalog, catalog_path, CATALOG_MAX_ENTRIES, CATALOG_REFRESH_HOURS, CATALOG_START_DELAY
+
+WATCH_STAT_LIMIT = 50 # More changed names than this are cheaper to re-list
+
+COLUMN_LABELS = {
+    "name": "lbl_name", "size": "lbl_size", "type": "lbl_type", "modified": "lbl_modified",
+    "permissions": "val_permissions", "owner": "lbl_owner", "group": "lbl_group"
+}
 
 class SFTPPanel(wx.Panel):
     def __init__(self, parent, ssh_client, connection_details):
@@ -23,7 +53,35 @@ class SFTPPanel(wx.Panel):
         self.config = ConfigManager()
         self.settings = self.config.get_settings()
         self.sftp = None
+        self.engine = None
+        self.host_key = f"{self.details.get('host')}:{self.details.get('port')}"
+        self.tuner = TransferTuner(self.config.get_transfer_tuning(self.host_key))
         self.transfer_dlg = None
+        self.trash = None
+        self.listing_cache = ListingCache(ttl=self.settings.get("listing_cache_ttl", LISTING_TTL))
+        self.bg_sftp = None # Channel for background listings; never used by the UI thread
+        self.bg_lock = threading.Lock()
+        self.listing_gen = 0
+        self.local_gen = 0
+        self.local_shown_path = None
+        self.local_watcher = None
+        self.remote_watcher = None
+        self.remote_watch_on = False
+        self.filter_timer = None
+        self.pending_focus = None # Name to focus once the remote listing is shown
+        self.local_sizes = DirSizeCache()
+        self.remote_sizes = DirSizeCache()
+        self.size_gen = {"local": 0, "remote": 0}
+        self.prefetcher = ListingPrefetcher(self.ssh_client, self.listing_cache)
+        self.purge_dlg = None
+        self.purge_timer = None
+        self.catalog = None # RemoteCatalog of this profile, if enabled
+        self.catalog_root = None
+        self.remote_home = None
+        self.catalog_timer = None
+        self.catalog_count = None # Entries read by a running rescan; None when idle
+        self.catalog_scanning = None # Catalog of the running rescan, which closes it if it was closed meanwhile
+        self.catalog_lock = threading.Lock()
         self.local_path = os.path.expanduser("~")
         self.remote_path = "."
         
@@ -59,15 +117,19 @@ class SFTPPanel(wx.Panel):
         # Left (Local) - ListCtrl
         left_sizer = wx.BoxSizer(wx.VERTICAL)
         left_sizer.Add(wx.StaticText(self.left_panel, label=tr("lbl_local_comp")), 0, wx.ALL, 5)
-        self.local_list = wx.ListCtrl(self.left_panel, style=wx.LC_REPORT)
+        self.local_list = FileListCtrl(self.left_panel)
         left_sizer.Add(self.local_list, 1, wx.EXPAND)
+        self.local_filter = self._make_filter_box(self.left_panel, left_sizer, self.local_list)
         self.left_panel.SetSizer(left_sizer)
 
         # Right (Remote) - ListCtrl
         right_sizer = wx.BoxSizer(wx.VERTICAL)
         right_sizer.Add(wx.StaticText(self.right_panel, label=tr("lbl_remote_server")), 0, wx.ALL, 5)
-        self.remote_list = wx.ListCtrl(self.right_panel, style=wx.LC_REPORT)
+        self.remote_list = FileListCtrl(self.right_panel)
+        self.id_names = IdNameMap()
+        self.remote_list.id_names = self.id_names
         right_sizer.Add(self.remote_list, 1, wx.EXPAND)
+        self.remote_filter = self._make_filter_box(self.right_panel, right_sizer, self.remote_list)
         self.right_panel.SetSizer(right_sizer)
 
         self.splitter.SplitVertically(self.left_panel, self.right_panel)
@@ -76,6 +138,9 @@ class SFTPPanel(wx.Panel):
 
         # Init Columns
         self.update_columns()
+        for ctrl, setting in ((self.local_list, "local_sort"), (self.remote_list, "remote_sort")):
+            column, descending = self.settings.get(setting, ["name", False])
+            if column in SORT_COLUMNS: ctrl.set_sort(column, descending)
 
 
         # Events
@@ -90,6 +155,7 @@ class SFTPPanel(wx.Panel):
         self.local_list.Bind(wx.EVT_LIST_ITEM_SELECTED, self.on_local_select)
         self.local_list.Bind(wx.EVT_LIST_ITEM_FOCUSED, self.on_local_focus) 
         self.local_list.Bind(wx.EVT_CHAR, self.on_list_char)
+        self.local_list.Bind(wx.EVT_LIST_COL_CLICK, self.on_col_click)
 
         # Remote List Events
         self.remote_list.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_remote_enter)
@@ -98,6 +164,7 @@ class SFTPPanel(wx.Panel):
         self.remote_list.Bind(wx.EVT_LIST_ITEM_SELECTED, self.on_remote_select)
         self.remote_list.Bind(wx.EVT_LIST_ITEM_FOCUSED, self.on_remote_focus)
         self.remote_list.Bind(wx.EVT_CHAR, self.on_list_char)
+        self.remote_list.Bind(wx.EVT_LIST_COL_CLICK, self.on_col_click)
 
         # Initialize
         wx.CallAfter(self.init_sftp)
@@ -113,6 +180,16 @@ class SFTPPanel(wx.Panel):
         self.ID_R_DELETE = wx.NewIdRef()
         self.ID_R_RENAME = wx.NewIdRef()
         self.ID_R_MKDIR = wx.NewIdRef()
+        self.ID_R_COPY = wx.NewIdRef()
+        self.ID_R_RELAY = wx.NewIdRef()
+        self.ID_R_SEARCH = wx.NewIdRef()
+        self.ID_R_GREP = wx.NewIdRef()
+        self.ID_R_USAGE = wx.NewIdRef()
+        self.ID_R_CATALOG = wx.NewIdRef()
+        self.ID_R_VIEW = wx.NewIdRef()
+        self.ID_R_WATCH = wx.NewIdRef()
+        self.ID_R_UNDO = wx.NewIdRef()
+        self.ID_R_EMPTY_TRASH = wx.NewIdRef()
         self.ID_PERMS = wx.NewIdRef()
         
         # Bind Context Menus ONCE
@@ -126,12 +203,25 @@ class SFTPPanel(wx.Panel):
         self.Bind(wx.EVT_MENU, self.do_remote_delete, id=self.ID_R_DELETE)
         self.Bind(wx.EVT_MENU, self.do_remote_rename, id=self.ID_R_RENAME)
         self.Bind(wx.EVT_MENU, self.do_remote_mkdir, id=self.ID_R_MKDIR)
+        self.Bind(wx.EVT_MENU, self.do_remote_copy, id=self.ID_R_COPY)
+        self.Bind(wx.EVT_MENU, self.do_send_to_host, id=self.ID_R_RELAY)
+        self.Bind(wx.EVT_MENU, self.do_remote_search, id=self.ID_R_SEARCH)
+        self.Bind(wx.EVT_MENU, self.do_content_search, id=self.ID_R_GREP)
+        self.Bind(wx.EVT_MENU, self.do_disk_usage, id=self.ID_R_USAGE)
+        self.Bind(wx.EVT_MENU, self.do_catalog_search, id=self.ID_R_CATALOG)
+        self.Bind(wx.EVT_MENU, self.do_view_file, id=self.ID_R_VIEW)
+        self.Bind(wx.EVT_MENU, self.do_toggle_remote_watch, id=self.ID_R_WATCH)
+        self.Bind(wx.EVT_MENU, self.do_remote_undo, id=self.ID_R_UNDO)
+        self.Bind(wx.EVT_MENU, lambda e: self.start_trash_purge(manual=True), id=self.ID_R_EMPTY_TRASH)
         self.Bind(wx.EVT_MENU, self.do_remote_permissions, id=self.ID_PERMS)
 
     def init_sftp(self):
         try:
             self.sftp = self.ssh_client.open_sftp()
             if not self.sftp: raise Exception(tr("err_sftp_failed"))
+            # The session starts in the home directory; the trash lives below it.
+            home = self.remote_home = self.sftp.normalize('.')
+            self.trash = RemoteTrash(self.ssh_client, self.sftp, trash_dir_for(home, self.details.get("name")))
             try:
                 # Try to Restore, else default to .
                 self.sftp.chdir(self.remote_path)
@@ -141,13 +231,64 @@ class SFTPPanel(wx.Panel):
                 self.sftp.chdir('.')
                 self.remote_path = self.sftp.getcwd()
             
+            # Transfer engine (per profile). 'auto' starts on SFTP and switches after probing.
+            engine_kind = self.details.get("transfer_engine", "sftp")
+            self.engine = create_engine(engine_kind, self.ssh_client, self.sftp, self.tuner)
+            threading.Thread(target=self._probe_engine, args=(home, engine_kind == ENGINE_AUTO), daemon=True).start()
+            
             self.refresh_lists()
+            self.load_id_names()
             self.local_list.SetFocus()
             self.speech.speak(tr("msg_sftp_ready_speech"))
+            
+            # Empty what an earlier session left in the trash
+            if self.settings.get("delete_to_trash", False) and self.trash.has_contents():
+                self.schedule_trash_purge()
+            self.open_catalog(home)
         except Exception as e:
             wx.MessageBox(tr("err_sftp_gen_error").format(error=e), tr("err_title"))
             self.on_back_term(None)
 
+    def load_id_names(self):
+        """(Re)reads the server's user and group names in the background, then redraws the owner columns."""
+        def run():
+            try:
+                if (self.id_names.load(self.ssh_client) or
+                        self.run_background_sftp(self.id_names.load_files)):
+                    wx.CallAfter(self._id_names_loaded)
+            except Exception as e:
+                logging.debug(f"Loading user and group names failed: {e}")
+        threading.Thread(target=run, daemon=True).start()
+
+    def _id_names_loaded(self):
+        try:
+            ctrl = self.remote_list
+            if ctrl.sort_column in ("owner", "group"): ctrl.set_sort(*ctrl.sort_order) # Now in name order
+            else: ctrl.Refresh()
+        except RuntimeError: pass
+
+    def _probe_engine(self, home, pick_engine):
+        """
+        Background, on a separate SFTP channel: measures the link RTT for the
+        transfer tuner and, for 'auto' profiles, keeps the fastest engine.
+        """
+        probe_sftp = None
+        try:
+            probe_sftp = self.ssh_client.open_sftp()
+            if not probe_sftp: return
+            rtt = self.tuner.measure_rtt(probe_sftp)
+            logging.info(f"Transfer tuning: RTT {rtt * 1000:.1f} ms, depth {self.tuner.depth}, window {self.tuner.window}")
+            if not pick_engine: return
+            best = probe_fastest(self.ssh_client, probe_sftp, home, tuner=self.tuner)
+            logging.info(f"Transfer engine selected by probe: {best}")
+            self.engine = create_engine(best, self.ssh_client, self.sftp, self.tuner)
+        except Exception as e:
+            logging.warning(f"Transfer engine probe failed: {e}")
+        finally:
+            if probe_sftp:
+                try: probe_sftp.close()
+                except: pass
+
     def refresh_lists(self):
         try:
              if not self: return
@@ -155,7 +296,7 @@ class SFTPPanel(wx.Panel):
              self.settings = self.config.get_settings()
              self.update_columns() # Update column visibility
              self.refresh_local()
-             self.refresh_remote()
+             self.refresh_remote(use_cache=False)
         except RuntimeError: pass
         
     def update_columns(self):
@@ -163,168 +304,375 @@ class SFTPPanel(wx.Panel):
         verbosity = self.settings.get("verbosity", [])
         if not verbosity: verbosity = []
         
-        # Local
-        self.local_list.DeleteAllColumns()
-        self.local_list.InsertColumn(0, tr("lbl_name"), width=150)
-        self.local_indices = [] # Stores which data index goes to which column (starting from col 1)
-        
-        # Local Map: (key, label, data_index)
-        # Data Indicies: 0=Name, 1=Size, 2=Type, 3=Modified
-        local_defs = [("size", "lbl_size", 1), ("type", "lbl_type", 2), ("modified", "lbl_modified", 3)]
-        
-        col_idx = 1
-        for key, lbl, dat_idx in local_defs:
-            if key in verbosity:
-                self.local_list.InsertColumn(col_idx, tr(lbl), width=100)
-                self.local_indices.append(dat_idx)
-                col_idx += 1
-                
-        # Remote
-        self.remote_list.DeleteAllColumns()
-        self.remote_list.InsertColumn(0, tr("lbl_name"), width=150)
-        self.remote_indices = []
-        
-        # Remote Data Indices: 0=Name, 1=Size, 2=Type, 3=Modified, 4=Perms, 5=Owner, 6=Group
+        # Column keys are looked up by FileEntry.column_text
+        local_defs = [("size", "lbl_size"), ("type", "lbl_type"), ("modified", "lbl_modified")]
         remote_defs = [
-            ("size", "lbl_size", 1), 
-            ("type", "lbl_type", 2), 
-            ("modified", "lbl_modified", 3),
-            ("permissions", "val_permissions", 4),
-            ("owner", "lbl_owner", 5),
-            ("group", "lbl_group", 6)
+            ("size", "lbl_size"), 
+            ("type", "lbl_type"), 
+            ("modified", "lbl_modified"),
+            ("permissions", "val_permissions"),
+            ("owner", "lbl_owner"),
+            ("group", "lbl_group")
         ]
         
-        col_idx = 1
-        for key, lbl, dat_idx in remote_defs:
-            if key in verbosity:
-                # Special handling if needed? No.
-                self.remote_list.InsertColumn(col_idx, tr(lbl), width=100)
-                self.remote_indices.append(dat_idx)
-                col_idx += 1
-
-    def _populate_list(self, ctrl, items, indices):
-        # items is list of tuples: (name, size, type, modified, [perms, owner, group])
-        # indices is list of data_indices to map to columns 1, 2, 3...
-        ctrl.DeleteAllItems()
-        for i, data in enumerate(items):
-            # First item is Name (always index 0)
-            list_idx = ctrl.InsertItem(i, data[0])
-            
-            # Set other columns based on indices
-            for col_pos, data_pos in enumerate(indices, 1):
-                if data_pos < len(data):
-                    ctrl.SetItem(list_idx, col_pos, str(data[data_pos]))
-                    
-        if ctrl.GetItemCount() > 0:
-            ctrl.SetItemState(0, wx.LIST_STATE_SELECTED | wx.LIST_STATE_FOCUSED, 
-                              wx.LIST_STATE_SELECTED | wx.LIST_STATE_FOCUSED)
-            ctrl.EnsureVisible(0)
-
-    def _format_size(self, size):
-        if size == 0: return "0 B"
-        size_name = ("B", "KB", "MB", "GB", "TB")
-        i = int(math.floor(math.log(size, 1024)))
-        p = math.pow(1024, i)
-        s = round(size / p, 2)
-        return "%s %s" % (s, size_name[i])
-
-    def _format_time(self, timestamp):
-        return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
-
-    def _format_perms(self, mode):
-        return stat.filemode(mode)
+        name_col = [("name", tr("lbl_name"))]
+        self.local_list.set_columns(name_col + [(key, tr(lbl)) for key, lbl in local_defs if key in verbosity])
+        self.remote_list.set_columns(name_col + [(key, tr(lbl)) for key, lbl in remote_defs if key in verbosity])
 
     def refresh_local(self):
+        """
+        Lists local_path on a worker. Entries stream into the pane for a new
+        folder; reloading the folder already shown keeps its rows until done.
+        """
         try:
             if not self: return
+            self.local_gen += 1 # Stops a scan of the folder we are leaving
+            self.stop_local_watch()
+            path = self.local_path
+            stream = path != self.local_shown_path or not self.local_list.all_entries
+            self.local_shown_path = path
+            if stream:
+                self._clear_filter(self.local_filter, self.local_list)
+                self.local_list.set_entries([FileEntry.parent()])
             show_hidden = self.settings.get("show_hidden", True)
-            items = os.listdir(self.local_path)
-            
-            data_list = []
-            
-            # Add Parent Dir first
-            data_list.append(("[..]", "", "DIR", ""))
+            threading.Thread(target=self._scan_local, args=(path, self.local_gen, stream, show_hidden, self.local_list.sort_order), daemon=True).start()
+        except RuntimeError: pass
 
-            # Separate dirs and files
-            dirs = []
-            files = []
+    def _scan_local(self, path, gen, stream, show_hidden, sort_order):
+        entries, batch = [], []
+        last_push = time.monotonic()
+        try:
+            for entry in scan_local(path, show_hidden):
+                if self.local_gen != gen: return
+                entries.append(entry)
+                if not stream: continue
+                batch.append(entry)
+                now = time.monotonic()
+                if len(batch) >= (LISTING_FIRST_BATCH if len(entries) == len(batch) else LISTING_BATCH) or now - last_push >= 0.25:
+                    wx.CallAfter(self._append_local, gen, batch)
+                    batch, last_push = [], now
+        except Exception as e:
+            wx.CallAfter(self._local_failed, gen, e)
+            return
+        sort_entries(entries, *sort_order)
+        wx.CallAfter(self._local_done, gen, entries)
 
-            for name in items:
-                if not show_hidden and name.startswith(".") and name not in [".", ".."]: continue
-                
-                full_path = os.path.join(self.local_path, name)
+    def _append_local(self, gen, batch):
+        try:
+            if self.local_gen == gen: self.local_list.append_entries(batch)
+        except RuntimeError: pass
+
+    def _local_done(self, gen, entries):
+        try:
+            if self.local_gen == gen:
+                path = self.local_shown_path
+                self.local_sizes.apply(path, entries, os.path.join)
+                self.local_list.set_entries([FileEntry.parent()] + self.local_list.ordered(entries), keep_focus=True)
+                if self.settings.get("local_dir_sizes", False): self.calc_dir_sizes(self.local_list)
+                self.local_watcher = LocalWatcher(path, lambda names: wx.CallAfter(self._apply_local_changes, gen, path, names)).start()
+        except RuntimeError: pass
+
+    def _apply_local_changes(self, gen, path, names):
+        """Applies watcher events to the local pane without listing the folder again."""
+        try:
+            if self.local_gen != gen: return
+            if names is None:
+                self.refresh_local()
+                return
+            show_hidden = self.settings.get("show_hidden", True)
+            changes = {}
+            for name in names:
+                if not show_hidden and name.startswith("."): continue
                 try:
-                    stats = os.stat(full_path)
-                    sz = self._format_size(stats.st_size)
-                    tm = self._format_time(stats.st_mtime)
-                    
-                    if os.path.isdir(full_path):
-                        dirs.append((f"[{name}]", "", "DIR", tm))
-                    else:
-                        files.append((name, sz, "FILE", tm))
-                except:
-                     files.append((name, "", "", ""))
-            
-            # Sort by name
-            dirs.sort(key=lambda x: x[0])
-            files.sort(key=lambda x: x[0])
-            
-            self._populate_list(self.local_list, data_list + dirs + files, self.local_indices)
-        except Exception as e:
-            if isinstance(e, RuntimeError): return
-            self.speech.speak(tr("err_local").format(error=e))
+                    changes[name] = FileEntry.from_stat(name, os.stat(os.path.join(path, name)))
+                except FileNotFoundError:
+                    changes[name] = None # Deleted or renamed away
+                except OSError:
+                    changes[name] = FileEntry(name, False)
+            self.local_list.merge_entries(changes)
+        except RuntimeError: pass
+
+    def stop_local_watch(self):
+        if self.local_watcher:
+            self.local_watcher.stop()
+            self.local_watcher = None
 
-    def refresh_remote(self):
+    def _local_failed(self, gen, error):
+        try:
+            if self.local_gen == gen: self.speech.speak(tr("err_local").format(error=error))
+        except RuntimeError: pass
+
+    def refresh_remote(self, use_cache=True):
         try:
             if not self: return
             if not self.sftp: return
-            show_hidden = self.settings.get("show_hidden", True)
-            attrs = self.sftp.listdir_attr(self.remote_path)
-            
-            data_list = []
-            data_list.append(("[..]", "", "DIR", "", "", "", ""))
-            
-            dirs = []
-            files = []
-
-            
-            for attr in attrs:
-                name = attr.filename
-                if name in ('.', '..'): continue
-                if not show_hidden and name.startswith('.'): continue
-                
-                sz = self._format_size(attr.st_size)
-                tm = self._format_time(attr.st_mtime)
-                perms = self._format_perms(attr.st_mode)
-                
-                # Default to ID
-                uid = str(attr.st_uid)
-                gid = str(attr.st_gid)
-                
-                # Try to parse longname for Owner/Group
-                # Format: -rw-r--r-- 1 owner group size ...
-                if attr.longname:
-                    try:
-                        parts = attr.longname.split()
-                        # parts[0]=perms, parts[1]=links, parts[2]=owner, parts[3]=group
-                        if len(parts) > 3:
-                            uid = parts[2]
-                            gid = parts[3]
-                    except: pass
-                
-                if stat.S_ISDIR(attr.st_mode):
-                    dirs.append((f"[{name}]", "", "DIR", tm, perms, uid, gid))
-                else:
-                    files.append((name, sz, "FILE", tm, perms, uid, gid))
-            
-            dirs.sort(key=lambda x: x[0])
-            files.sort(key=lambda x: x[0])
-            
-            self._populate_list(self.remote_list, data_list + dirs + files, self.remote_indices)
+            self.show_remote_dir(self.remote_path, use_cache)
         except Exception as e:
             if isinstance(e, RuntimeError): return
             self.speech.speak(tr("err_remote").format(error=e))
 
+    def show_remote_dir(self, path, use_cache=True, focus_name=None):
+        """
+        Makes `path` (absolute) the current remote folder and lists it.
+        A cached listing shows at once and, if enabled, is checked against the
+        server in the background. Otherwise the folder is read on a worker and
+        entries appear in batches as they arrive; reloading the folder already
+        shown keeps the old rows until the new listing is complete.
+        focus_name: entry to select once the listing is shown.
+        """
+        self.pending_focus = focus_name
+        path = posixpath.normpath(path)
+        if path.startswith("//"): path = path[1:]
+        self.listing_gen += 1 # Makes any listing still streaming stale
+        previous = self.remote_path
+        if path != previous: self._clear_filter(self.remote_filter, self.remote_list)
+        
+        entries = None
+        if use_cache:
+            entries = self.listing_cache.get(path)
+            if entries is None:
+                entries = self.prefetcher.take(path)
+                if entries is not None: self.listing_cache.put(path, entries)
+        if entries is not None:
+            self.remote_path = path
+            self._display_remote(entries)
+            self._auto_remote_sizes()
+            if self.settings.get("revalidate_listings", True):
+                threading.Thread(target=self._revalidate_remote, args=(path, entries), daemon=True).start()
+            self._watch_remote_dir()
+            return
+        
+        stream = path != previous or not self.remote_list.all_entries
+        self.remote_path = path
+        if stream:
+            self._display_remote([])
+        threading.Thread(target=self._stream_remote, args=(path, self.listing_gen, stream, previous, self.remote_list.sort_order), daemon=True).start()
+        self._watch_remote_dir()
+
+    def _display_remote(self, entries, keep_focus=False):
+        show_hidden = self.settings.get("show_hidden", True)
+        if not show_hidden:
+            entries = [e for e in entries if not e.name.startswith('.')]
+        self.remote_sizes.apply(self.remote_path, entries, posixpath.join)
+        self.remote_list.set_entries([FileEntry.parent()] + self.remote_list.ordered(entries), keep_focus=keep_focus)
+        if self.pending_focus and entries:
+            self.remote_list.focus_name(self.pending_focus)
+            self.pending_focus = None
+
+    def _stream_remote(self, path, gen, stream, previous, sort_order):
+        """Worker: reads a folder with listdir_iter and pushes batches to the pane."""
+        entries, batch = [], []
+        version = self.listing_cache.version
+        started = last_push = time.monotonic()
+        try:
+            with self.bg_lock:
+                if self.bg_sftp is None:
+                    self.bg_sftp = self.ssh_client.open_sftp()
+                for attr in self.bg_sftp.listdir_iter(path):
+                    if self.listing_gen != gen:
+                        # Abandoned: the channel still has read-aheads in flight, so start a fresh one next time
+                        self.close_background_sftp()
+                        return
+                    if attr.filename in ('.', '..'): continue
+                    entry = FileEntry.from_sftp(attr)
+                    entries.append(entry)
+                    if not stream: continue
+                    batch.append(entry)
+                    now = time.monotonic()
+                    # Push the first screenful quickly, then in larger batches
+                    if len(batch) >= (LISTING_FIRST_BATCH if len(entries) == len(batch) else LISTING_BATCH) or now - last_push >= 0.25:
+                        wx.CallAfter(self._append_remote, gen, batch)
+                        batch, last_push = [], now
+        except Exception as e:
+            wx.CallAfter(self._listing_failed, gen, path, previous, e)
+            return
+        
+        # Sorted here in the pane's order, so the UI thread only confirms it
+        sort_entries(entries, *sort_order, self.id_names)
+        self.listing_cache.put(path, entries, version)
+        self.catalog_folder(path, entries)
+        wx.CallAfter(self._listing_done, gen, entries, time.monotonic() - started)
+
+    def _append_remote(self, gen, batch):
+        try:
+            if self.listing_gen != gen: return
+            if not self.settings.get("show_hidden", True):
+                batch = [e for e in batch if not e.name.startswith('.')]
+            self.remote_list.append_entries(batch)
+        except RuntimeError: pass
+
+    def _listing_done(self, gen, entries, elapsed):
+        try:
+            if self.listing_gen != gen: return
+            # Sorted once, keeping the row the user may already have moved to
+            self._display_remote(entries, keep_focus=True)
+            self._auto_remote_sizes()
+            if elapsed > 1.0:
+                self.speech.speak(tr("msg_listing_done").format(count=len(entries)), interrupt=False)
+        except RuntimeError: pass
+
+    def _listing_failed(self, gen, path, previous, error):
+        try:
+            if self.listing_gen != gen: return
+            if path == previous:
+                self.speech.speak(tr("err_remote").format(error=error))
+                return
+            self.play_beep("error")
+            wx.MessageBox(str(error), tr("err_title"))
+            self.show_remote_dir(previous)
+        except RuntimeError: pass
+
+    def _revalidate_remote(self, path, cached):
+        version = self.listing_cache.version
+        try:
+            fresh = self.run_background_sftp(lambda sftp: fetch_listing(sftp, path))
+        except Exception as e:
+            logging.debug(f"Revalidating {path} failed: {e}")
+            return
+        if listing_signature(fresh) == listing_signature(cached): return
+        self.listing_cache.put(path, fresh, version)
+        self.catalog_folder(path, fresh)
+
+        def apply():
+            try:
+                if self.remote_path == path: self._display_remote(fresh, keep_focus=True)
+            except RuntimeError: pass
+        wx.CallAfter(apply)
+
+    def run_background_sftp(self, fn):
+        """Runs fn(sftp) on the shared background channel, one caller at a time."""
+        with self.bg_lock:
+            if self.bg_sftp is None:
+                self.bg_sftp = self.ssh_client.open_sftp()
+            return fn(self.bg_sftp)
+
+    def remote_changed(self, *paths):
+        """
+        Called after our own operations: drops cached listings of the changed
+        paths (and everything below them) and of their folders, then reloads.
+        """
+        for path in paths:
+            self.invalidate_listing(path, recursive=True)
+            self.invalidate_listing(parent_path(path))
+        self.invalidate_listing(self.remote_path)
+        self.refresh_remote()
+
+    def do_remote_search(self, event):
+        self._run_search_dialog(RemoteSearchDialog(self, self.ssh_client, self.remote_path))
+
+    def do_content_search(self, event):
+        self._run_search_dialog(ContentSearchDialog(self, self.ssh_client, self.remote_path))
+
+    def do_disk_usage(self, event):
+        self._run_search_dialog(DiskUsageDialog(self, self.ssh_client, self.remote_path))
+
+    def do_view_file(self, event):
+        """Opens the focused remote file in the viewer, which reads only the parts shown."""
+        entry = self.remote_list.get_entry(self.remote_list.GetFocusedItem())
+        if entry is None or entry.is_dir: return
+        dlg = RemoteViewerDialog(self, self.ssh_client, posixpath.join(self.remote_path, entry.name), self.settings)
+        try:
+            dlg.ShowModal()
+        finally:
+            dlg.stop()
+            dlg.Destroy()
+        self.remote_list.SetFocus()
+
+    def do_catalog_search(self, event):
+        if not self.catalog:
+            wx.MessageBox(tr("msg_catalog_disabled"), tr("app_title"), wx.ICON_INFORMATION)
+            return
+        self._run_search_dialog(CatalogDialog(self, self.catalog, lambda: self.start_catalog_refresh(manual=True),
+                                              lambda: self.catalog_count))
+
+    def _run_search_dialog(self, dlg):
+        """Shows a search or disk usage dialog; Go To opens the result's folder with it selected."""
+        try:
+            ok = dlg.ShowModal() == wx.ID_OK
+            dlg.on_stop(None)
+            path = dlg.selected_path
+        finally:
+            dlg.Destroy()
+        if ok and path:
+            self.show_remote_dir(parent_path(path), focus_name=posixpath.basename(path))
+            self.remote_list.SetFocus()
+
+    def do_toggle_remote_watch(self, event):
+        self.remote_watch_on = not self.remote_watch_on
+        if self.remote_watch_on:
+            self._watch_remote_dir()
+            self.speech.speak(tr("msg_watch_on"))
+        else:
+            self.stop_remote_watch()
+            self.speech.speak(tr("msg_watch_off"))
+
+    def _watch_remote_dir(self):
+        """Keeps the remote watch, when switched on, on the folder being shown."""
+        if not self.remote_watch_on: return
+        if self.remote_watcher and self.remote_watcher.path == self.remote_path: return
+        self.stop_remote_watch()
+        path = self.remote_path
+        self.remote_watcher = RemoteWatcher(self.ssh_client, path,
+                                            lambda names: wx.CallAfter(self._apply_remote_changes, path, names)).start()
+
+    def stop_remote_watch(self):
+        if self.remote_watcher:
+            self.remote_watcher.stop()
+            self.remote_watcher = None
+
+    def _apply_remote_changes(self, path, names):
+        """Applies watch events: stats only the changed names, or re-lists if there are many."""
+        try:
+            if path != self.remote_path: return
+            self.invalidate_listing(path)
+            if names is None or len(names) > WATCH_STAT_LIMIT:
+                self.refresh_remote(use_cache=False)
+                return
+        except RuntimeError: return
+
+        def stat_names(sftp):
+            changes = {}
+            for name in names:
+                try:
+                    attr = sftp.lstat(posixpath.join(path, name))
+                    attr.filename = name
+                    changes[name] = FileEntry.from_sftp(attr)
+                except FileNotFoundError:
+                    changes[name] = None
+                except IOError: pass
+            return changes
+
+        def run():
+            try:
+                changes = self.run_background_sftp(stat_names)
+            except Exception as e:
+                logging.debug(f"Watch update for {path} failed: {e}")
+                return
+            wx.CallAfter(self._merge_remote, path, changes)
+        threading.Thread(target=run, daemon=True).start()
+
+    def _merge_remote(self, path, changes):
+        try:
+            if path != self.remote_path: return
+            if not self.settings.get("show_hidden", True):
+                changes = {name: e for name, e in changes.items() if not name.startswith('.')}
+            self.remote_list.merge_entries(changes)
+        except RuntimeError: pass
+
+    def invalidate_listing(self, path, recursive=False):
+        self.listing_cache.invalidate(path, recursive)
+        self.prefetcher.cache.invalidate(path, recursive)
+
+    def prefetch_around(self, idx):
+        """Reads ahead the focused folder and the folders next to it."""
+        if not self.settings.get("prefetch_listings", True): return
+        paths = []
+        for i in (idx, idx + 1, idx - 1):
+            entry = self.remote_list.get_entry(i)
+            if entry and entry.is_dir and entry.name != "..":
+                paths.append(posixpath.join(self.remote_path, entry.name))
+        if paths: self.prefetcher.request(paths)
+
     def play_beep(self, pitch="start"):
         import winsound
         try:
@@ -334,76 +682,217 @@ class SFTPPanel(wx.Panel):
         except: pass
 
     def on_list_char(self, event):
-        key = event.GetKeyCode()
-        if key < 32 or key > 126:
+        key = event.GetUnicodeKey()
+        if key == wx.WXK_NONE or key < 32 or event.HasModifiers():
             event.Skip()
             return
-            
-        char = chr(key).lower()
-        obj = event.GetEventObject()
-        
-        count = obj.GetItemCount()
-        start = -1
-        idx = obj.GetFirstSelected()
-        if idx != -1: start = idx
-        
-        found = -1
-        
-        for i in range(start + 1, count):
-            text = self.strip_brackets(obj.GetItemText(i)).lower()
-            if text.startswith(char):
-                found = i
-                break
         
+        obj = event.GetEventObject()
+        found, query = obj.type_ahead(chr(key))
         if found == -1:
-             for i in range(0, start + 1):
-                text = self.strip_brackets(obj.GetItemText(i)).lower()
-                if text.startswith(char):
-                    found = i
-                    break
+            self.speech.speak(tr("msg_no_match").format(query=query))
+            return
         
-        if found != -1:
-            sel = obj.GetFirstSelected()
-            while sel != -1:
-                obj.SetItemState(sel, 0, wx.LIST_STATE_SELECTED | wx.LIST_STATE_FOCUSED)
-                sel = obj.GetNextSelected(sel)
-            
-            obj.SetItemState(found, wx.LIST_STATE_SELECTED | wx.LIST_STATE_FOCUSED, 
-                              wx.LIST_STATE_SELECTED | wx.LIST_STATE_FOCUSED)
-            obj.EnsureVisible(found)
+        obj.clear_selection()
+        obj.Select(found)
+        if obj.GetFocusedItem() == found:
+            # No focus event to read the row; say it here
+            self.speech.speak(self.strip_brackets(obj.GetItemText(found)))
+        obj.Focus(found)
+
+    # Filter boxes
+
+    def _make_filter_box(self, parent, sizer, ctrl):
+        row = wx.BoxSizer(wx.HORIZONTAL)
+        row.Add(wx.StaticText(parent, label=tr("lbl_filter")), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        box = wx.TextCtrl(parent, name=tr("lbl_filter"))
+        box.SetToolTip(tr("desc_filter"))
+        row.Add(box, 1)
+        sizer.Add(row, 0, wx.EXPAND | wx.ALL, 5)
+        box.Bind(wx.EVT_TEXT, lambda e: self.on_filter_text(box, ctrl))
+        box.Bind(wx.EVT_KEY_DOWN, lambda e: self.on_filter_key(e, box, ctrl))
+        return box
+
+    def on_filter_text(self, box, ctrl):
+        """Narrows the pane on every keystroke; the count is spoken once typing pauses."""
+        try:
+            name_filter = make_name_filter(box.GetValue())
+        except re.error:
+            self._announce_filter(tr("err_filter_pattern")) # Keep the last valid view while a regex is typed
+            return
+        shown, total = ctrl.set_filter(name_filter)
+        if name_filter is None:
+            self._announce_filter(tr("msg_filter_cleared"))
+        else:
+            self._announce_filter(tr("msg_filter_count").format(count=shown, total=total))
+
+    def _announce_filter(self, text):
+        if self.filter_timer: self.filter_timer.Stop()
+        self.filter_timer = wx.CallLater(400, self.speech.speak, text)
+
+    def on_filter_key(self, event, box, ctrl):
+        key = event.GetKeyCode()
+        if key == wx.WXK_ESCAPE:
+            box.SetValue("") # Clears the filter through EVT_TEXT
+            ctrl.SetFocus()
+        elif key in (wx.WXK_RETURN, wx.WXK_NUMPAD_ENTER, wx.WXK_DOWN):
+            ctrl.SetFocus()
+        else:
+            event.Skip()
+
+    def _clear_filter(self, box, ctrl):
+        """Drops the filter silently when the pane moves to another folder."""
+        if box.GetValue(): box.ChangeValue("")
+        ctrl.name_filter = None
+
+    def on_col_click(self, event):
+        ctrl = event.GetEventObject()
+        col = event.GetColumn()
+        if not 0 <= col < len(ctrl.columns): return
+        column = ctrl.columns[col]
+        # Clicking the sorted column again flips the direction
+        self.sort_pane(ctrl, column, column == ctrl.sort_column and not ctrl.sort_descending)
+
+    def sort_pane(self, ctrl, column, descending):
+        """Re-sorts a pane in memory and remembers the order for next time."""
+        ctrl.set_sort(column, descending)
+        setting = "local_sort" if ctrl is self.local_list else "remote_sort"
+        try:
+            settings = self.config.get_settings()
+            settings[setting] = [column, descending]
+            self.config.save_settings(settings)
+            self.settings[setting] = [column, descending]
+        except Exception as e:
+            logging.warning(f"Saving the sort order failed: {e}")
+        msg = "msg_sorted_desc" if descending else "msg_sorted"
+        self.speech.speak(tr(msg).format(column=tr(COLUMN_LABELS[column])))
+
+    def _append_sort_menu(self, menu, ctrl):
+        """'Sort By' submenu over the pane's visible columns, for keyboard users."""
+        sub = wx.Menu()
+        for column in ctrl.columns:
+            item = sub.AppendRadioItem(wx.ID_ANY, tr(COLUMN_LABELS[column]))
+            item.Check(column == ctrl.sort_column)
+            menu.Bind(wx.EVT_MENU, lambda e, c=column: self.sort_pane(ctrl, c, ctrl.sort_descending), item)
+        sub.AppendSeparator()
+        item = sub.AppendCheckItem(wx.ID_ANY, tr("ctx_sort_descending"))
+        item.Check(ctrl.sort_descending)
+        menu.Bind(wx.EVT_MENU, lambda e: self.sort_pane(ctrl, ctrl.sort_column, not ctrl.sort_descending), item)
+        menu.AppendSubMenu(sub, tr("ctx_sort_by"))
+
+    def _append_size_menu(self, menu, ctrl):
+        """Folder size items: the selected folders now, or every folder whenever one is listed."""
+        item = menu.Append(wx.ID_ANY, tr("ctx_calc_size"))
+        menu.Bind(wx.EVT_MENU, lambda e: self.calc_dir_sizes(ctrl, selected_only=True), item)
+        setting = self._size_setting(ctrl)
+        item = menu.AppendCheckItem(wx.ID_ANY, tr("ctx_all_folder_sizes"))
+        item.Check(self.settings.get(setting, False))
+        menu.Bind(wx.EVT_MENU, lambda e: self.toggle_all_sizes(ctrl), item)
+
+    def _size_setting(self, ctrl):
+        return "local_dir_sizes" if ctrl is self.local_list else "remote_dir_sizes"
+
+    def toggle_all_sizes(self, ctrl):
+        setting = self._size_setting(ctrl)
+        on = not self.settings.get(setting, False)
+        try:
+            settings = self.config.get_settings()
+            settings[setting] = on
+            self.config.save_settings(settings)
+        except Exception as e:
+            logging.warning(f"Saving the folder size mode failed: {e}")
+        self.settings[setting] = on
+        if on:
+            self.calc_dir_sizes(ctrl)
+        else:
+            self.size_gen["local" if ctrl is self.local_list else "remote"] += 1
+            self.speech.speak(tr("msg_all_sizes_off"))
+
+    def _auto_remote_sizes(self):
+        if self.settings.get("remote_dir_sizes", False): self.calc_dir_sizes(self.remote_list)
+
+    def calc_dir_sizes(self, ctrl, selected_only=False):
+        """
+        Totals folders of a pane in the background (the selected ones, or all
+        shown folders without a known size) and fills in their size column.
+        Results are cached against each folder's mtime.
+        """
+        is_remote = ctrl is self.remote_list
+        if is_remote and not self.sftp: return
+        if selected_only:
+            entries = [ctrl.get_entry(i) for i in ctrl.get_selected_indices()]
+            entries = [e for e in entries if e and e.is_dir and e.name != ".."]
+            if not entries:
+                self.speech.speak(tr("msg_no_folders_selected"))
+                return
+        else:
+            entries = [e for e in ctrl.all_entries if e.is_dir and e.name != ".." and e.dir_size is None]
+            if not entries: return
+        pane = "remote" if is_remote else "local"
+        self.size_gen[pane] += 1
+        gen = self.size_gen[pane]
+        folder = self.remote_path if is_remote else self.local_path
+        join = posixpath.join if is_remote else os.path.join
+        targets = {join(folder, e.name): e for e in entries}
+        announce = selected_only and len(entries) == 1
+        if selected_only: self.speech.speak(tr("msg_calculating_sizes").format(count=len(entries)))
+
+        def is_cancelled():
+            current = self.remote_path if is_remote else self.local_path
+            return self.size_gen[pane] != gen or current != folder
+
+        def on_size(path, size):
+            wx.CallAfter(self._dir_size_ready, ctrl, targets[path], path, size, announce)
+
+        def run():
+            try:
+                if is_remote:
+                    sizer = RemoteSizer(self.ssh_client)
+                    sizer.sizes(list(targets), on_size, is_cancelled)
+                    for path, error in sizer.errors[:5]:
+                        logging.debug(f"Folder size: {path}: {error}")
+                else:
+                    local_dir_sizes(list(targets), on_size, is_cancelled)
+            except OperationCancelled:
+                return
+            except Exception as e:
+                wx.CallAfter(self.speech.speak, tr("err_remote" if is_remote else "err_local").format(error=e))
+                return
+            wx.CallAfter(self._dir_sizes_done, ctrl, gen, pane, selected_only and not announce)
+        threading.Thread(target=run, daemon=True).start()
+
+    def _dir_size_ready(self, ctrl, entry, path, size, announce):
+        try:
+            entry.dir_size = size
+            (self.remote_sizes if ctrl is self.remote_list else self.local_sizes).put(path, entry.mtime, size)
+            ctrl.Refresh()
+            if announce:
+                self.speech.speak(tr("msg_folder_size").format(name=entry.name, size=entry.column_text("size")))
+        except RuntimeError: pass
+
+    def _dir_sizes_done(self, ctrl, gen, pane, announce):
+        try:
+            if self.size_gen[pane] != gen: return
+            # Rows were sorted before the sizes were known
+            if ctrl.sort_column == "size": ctrl.set_sort(*ctrl.sort_order)
+            if announce: self.speech.speak(tr("msg_sizes_done"))
+        except RuntimeError: pass
 
     def update_settings(self):
         """Called by MainFrame when settings are changed."""
+        old = self.settings
         self.settings = self.config.get_settings()
+        self.apply_catalog_settings(old)
         self.refresh_lists()
 
     # EVENTS AND AUDIO
     def _read_item(self, ctrl, event, is_remote=False):
         idx = event.GetIndex()
-        # Name always read (Column 0)
-        text = self.strip_brackets(ctrl.GetItemText(idx))
-        
-        verbosity = self.settings.get("verbosity", [])
-        if not verbosity: verbosity = []
-        
-        speech_parts = [text]
-        col_idx = 1 # Start checking from column 1
-        
-        # Must match exact order in update_columns
-        if not is_remote:
-             # Local: size, type, modified
-             defs = ["size", "type", "modified"]
-        else:
-             # Remote: size, type, modified, permissions, owner, group
-             defs = ["size", "type", "modified", "permissions", "owner", "group"]
-             
-        for key in defs:
-             if key in verbosity:
-                 # Because we rebuild columns in this exact order, 
-                 # the visual column index increments sequentially.
-                 val = ctrl.GetItemText(idx, col_idx)
-                 if val: speech_parts.append(val)
-                 col_idx += 1
+        # Name always read (Column 0), then the visible columns in order
+        speech_parts = [self.strip_brackets(ctrl.GetItemText(idx))]
+        for col in range(1, len(ctrl.columns)):
+            val = ctrl.GetItemText(idx, col)
+            if val: speech_parts.append(val)
                  
         self.speech.speak(", ".join(speech_parts))
 
@@ -412,19 +901,18 @@ class SFTPPanel(wx.Panel):
         
     def on_remote_focus(self, event):
         self._read_item(self.remote_list, event, is_remote=True)
+        self.prefetch_around(event.GetIndex())
 
     def on_local_select(self, event):
         if wx.GetKeyState(wx.WXK_CONTROL):
-             item = event.GetItem()
-             text = self.strip_brackets(item.GetText())
+             text = self.strip_brackets(event.GetEventObject().GetItemText(event.GetIndex()))
              self.speech.speak(tr("msg_selected").format(text=text))
         elif wx.GetKeyState(wx.WXK_SHIFT):
              self.speech.speak(tr("msg_selection_extended"))
 
     def on_remote_select(self, event):
         if wx.GetKeyState(wx.WXK_CONTROL):
-             item = event.GetItem()
-             text = self.strip_brackets(item.GetText())
+             text = self.strip_brackets(event.GetEventObject().GetItemText(event.GetIndex()))
              self.speech.speak(tr("msg_selected").format(text=text))
         elif wx.GetKeyState(wx.WXK_SHIFT):
              self.speech.speak(tr("msg_selection_extended"))
@@ -434,6 +922,7 @@ class SFTPPanel(wx.Panel):
         items = self.get_selected_items(self.local_list)
         if not items: return
         
+        upload_dir = self.remote_path
         self.transfer_dlg = TransferProgressDialog(self, tr("msg_uploading"))
         dlg = self.transfer_dlg
         dlg.Show()
@@ -456,7 +945,7 @@ class SFTPPanel(wx.Panel):
                         self.sftp.mkdir(remote_dir)
                         
                     for name in os.listdir(local_dir):
-                        if dlg.is_cancelled: raise Exception(tr("err_cancelled"))
+                        if dlg.is_cancelled: raise OperationCancelled()
                         l_path = os.path.join(local_dir, name)
                         r_path = remote_dir + "/" + name
                         
@@ -472,7 +961,7 @@ class SFTPPanel(wx.Panel):
                                     action = batch_action
                                 else:
                                     res_act, res_all = self.resolve_conflict(name)
-                                    if res_act == 'cancel': raise Exception("Cancelled")
+                                    if res_act == 'cancel': raise OperationCancelled()
                                     if res_all: batch_action = res_act
                                     action = res_act
                             except IOError: pass # Does not exist
@@ -480,16 +969,16 @@ class SFTPPanel(wx.Panel):
                             if action == 'skip': continue
                             if action == 'rename':
                                 new_name = self.prompt_rename(name)
-                                if not new_name: raise Exception("Cancelled")
+                                if not new_name: raise OperationCancelled()
                                 r_path = remote_dir + "/" + new_name
                                 
                             dlg.set_filename(name)
-                            self.sftp.put(l_path, r_path, callback=progress_cb)
+                            self.engine.put(l_path, r_path, callback=progress_cb)
                             count += 1 # Internal count for recursion? Main loop counts too.
                             
                 def progress_cb(cur, tot):
                     dlg.update_progress(cur, tot)
-                    if dlg.is_cancelled: raise Exception("Cancelled")
+                    if dlg.is_cancelled: raise OperationCancelled()
 
                 for item in items:
                     if dlg.is_cancelled: break
@@ -511,7 +1000,7 @@ class SFTPPanel(wx.Panel):
                                     action = batch_action
                                 else:
                                     res_act, res_all = self.resolve_conflict(name)
-                                    if res_act == 'cancel': raise Exception("Cancelled")
+                                    if res_act == 'cancel': raise OperationCancelled()
                                     if res_all: batch_action = res_act
                                     action = res_act
                             except IOError: pass
@@ -519,20 +1008,21 @@ class SFTPPanel(wx.Panel):
                             if action == 'skip': continue
                             if action == 'rename':
                                 new_name = self.prompt_rename(name)
-                                if not new_name: raise Exception("Cancelled")
+                                if not new_name: raise OperationCancelled()
                                 remote_path = self.remote_path + "/" + new_name
 
                             dlg.set_filename(name)
-                            self.sftp.put(local_path, remote_path, callback=progress_cb)
+                            self.engine.put(local_path, remote_path, callback=progress_cb)
                             count += 1
+                    except OperationCancelled:
+                        break
                     except Exception as e:
                         last_error = str(e)
-                        if "Cancelled" in str(e): break
 
                 wx.CallAfter(dlg.Destroy)
                 if count > 0:
                     self.play_beep("end")
-                    wx.CallAfter(self.refresh_remote)
+                    wx.CallAfter(self.remote_changed, upload_dir)
                     wx.CallAfter(self.speech.speak, tr("msg_uploaded").format(count=count))
                 elif last_error:
                     wx.CallAfter(wx.MessageBox, tr("err_upload").format(error=last_error), tr("app_title"), wx.ICON_ERROR)
@@ -560,20 +1050,52 @@ class SFTPPanel(wx.Panel):
                 self.play_beep("start")
                 count = 0
                 
+                seen_dirs = set() # Real paths of the folders listed so far, so links cannot loop
+                
                 def _r_download(remote_dir, local_dir):
-                    nonlocal batch_action, count
-                    if not os.path.exists(local_dir): os.makedirs(local_dir)
-                    for attr in self.sftp.listdir_attr(remote_dir):
-                        if dlg.is_cancelled: raise Exception("Cancelled")
-                        name = attr.filename
-                        if name in ('.', '..'): continue
-                        
-                        r_path = remote_dir + "/" + name
-                        l_path = os.path.join(local_dir, name)
+                    nonlocal batch_action, count, last_error
+                    real_dir = self.sftp.normalize(remote_dir)
+                    if real_dir in seen_dirs: return
+                    seen_dirs.add(real_dir)
+                    # The whole tree is listed first (one 'find' where possible), then downloaded
+                    lister = TreeEnumerator(self.ssh_client)
+                    try:
+                        below = lister.scan([remote_dir], is_cancelled=lambda: dlg.is_cancelled)
+                    except OperationCancelled:
+                        raise
+                    if lister.errors:
+                        path, error = lister.errors[0]
+                        last_error = f"{path}: {error}"
+                    below.sort(key=lambda e: e.name) # Folders before their contents
+                    # Links are listed as links: they are downloaded as what they point to.
+                    # Links to folders are downloaded like folders, each real folder once.
+                    linked_dirs = []
+                    for entry in below:
+                        if not stat.S_ISLNK(entry.mode or 0): continue
+                        try:
+                            target = self.sftp.stat(entry.name)
+                        except Exception as e:
+                            last_error = f"{entry.name}: {e}" # Dangling link
+                            continue
+                        entry.mode, entry.size = target.st_mode, target.st_size
+                        if stat.S_ISDIR(target.st_mode): linked_dirs.append(entry.name)
+                    # Pipes, sockets, devices and dangling links cannot be downloaded
+                    downloadable = lambda e: stat.S_ISREG(e.mode or 0)
+                    files = [e for e in below if downloadable(e)]
+                    dlg.set_status(tr("msg_download_plan").format(count=len(files), size=format_size(sum(e.size or 0 for e in files))))
+
+                    os.makedirs(local_dir, exist_ok=True)
+                    prefix = remote_dir.rstrip("/") + "/"
+                    for entry in below:
+                        if dlg.is_cancelled: raise OperationCancelled()
+                        r_path = entry.name
+                        relative = r_path[len(prefix):]
+                        name = posixpath.basename(relative)
+                        l_path = os.path.join(local_dir, *relative.split("/"))
                         
-                        if stat.S_ISDIR(attr.st_mode):
-                            _r_download(r_path, l_path)
-                        else:
+                        if entry.is_dir:
+                            os.makedirs(l_path, exist_ok=True)
+                        elif downloadable(entry):
                             # Conflict Check
                             action = "overwrite"
                             if os.path.exists(l_path):
@@ -581,23 +1103,28 @@ class SFTPPanel(wx.Panel):
                                     action = batch_action
                                 else:
                                     res_act, res_all = self.resolve_conflict(name)
-                                    if res_act == 'cancel': raise Exception("Cancelled")
+                                    if res_act == 'cancel': raise OperationCancelled()
                                     if res_all: batch_action = res_act
                                     action = res_act
                             
                             if action == 'skip': continue
                             if action == 'rename':
                                 new_name = self.prompt_rename(name)
-                                if not new_name: raise Exception("Cancelled")
-                                l_path = os.path.join(local_dir, new_name)
+                                if not new_name: raise OperationCancelled()
+                                l_path = os.path.join(os.path.dirname(l_path), new_name)
 
                             dlg.set_filename(name)
-                            self.sftp.get(r_path, l_path, callback=progress_cb)
+                            self.engine.get(r_path, l_path, callback=progress_cb)
                             count += 1
 
+                    for r_path in linked_dirs:
+                        if dlg.is_cancelled: raise OperationCancelled()
+                        relative = r_path[len(prefix):]
+                        _r_download(r_path, os.path.join(local_dir, *relative.split("/")))
+
                 def progress_cb(cur, tot):
                      dlg.update_progress(cur, tot)
-                     if dlg.is_cancelled: raise Exception("Cancelled")
+                     if dlg.is_cancelled: raise OperationCancelled()
 
                 for item in items:
                     if dlg.is_cancelled: break
@@ -626,22 +1153,23 @@ class SFTPPanel(wx.Panel):
                                     action = batch_action
                                 else:
                                     res_act, res_all = self.resolve_conflict(name)
-                                    if res_act == 'cancel': raise Exception("Cancelled")
+                                    if res_act == 'cancel': raise OperationCancelled()
                                     if res_all: batch_action = res_act
                                     action = res_act
 
                             if action == 'skip': continue
                             if action == 'rename':
                                 new_name = self.prompt_rename(name)
-                                if not new_name: raise Exception("Cancelled")
+                                if not new_name: raise OperationCancelled()
                                 local_path = os.path.join(self.local_path, new_name)
 
                             dlg.set_filename(name)
-                            self.sftp.get(remote_path, local_path, callback=progress_cb)
+                            self.engine.get(remote_path, local_path, callback=progress_cb)
                             count += 1
+                    except OperationCancelled:
+                        break
                     except Exception as e:
                         last_error = str(e)
-                        if "Cancelled" in str(e): break
                 
                 wx.CallAfter(dlg.Destroy)
                 if count > 0:
@@ -685,9 +1213,7 @@ class SFTPPanel(wx.Panel):
         
         if item == "[..]":
             try:
-                self.sftp.chdir("..")
-                self.remote_path = self.sftp.getcwd()
-                self.refresh_remote()
+                self.show_remote_dir(parent_path(self.remote_path))
                 self.speech.speak(tr("msg_up_dir"))
             except Exception as e:
                 self.play_beep("error")
@@ -695,9 +1221,7 @@ class SFTPPanel(wx.Panel):
         elif item.startswith("[") and item.endswith("]"):
             dirname = item[1:-1]
             try:
-                self.sftp.chdir(dirname)
-                self.remote_path = self.sftp.getcwd()
-                self.refresh_remote()
+                self.show_remote_dir(self.remote_path + "/" + dirname)
                 self.speech.speak(tr("msg_entered").format(name=dirname))
             except Exception as e:
                 self.play_beep("error")
@@ -716,6 +1240,10 @@ class SFTPPanel(wx.Panel):
             self.do_local_rename(None)
         elif key == wx.WXK_F5:
             self.on_refresh(None)
+        elif key == ord('S') and wx.GetKeyState(wx.WXK_CONTROL) and wx.GetKeyState(wx.WXK_SHIFT):
+            self.calc_dir_sizes(self.local_list, selected_only=True)
+        elif key == ord('F') and wx.GetKeyState(wx.WXK_CONTROL):
+            self.local_filter.SetFocus()
         else:
             event.Skip()
 
@@ -723,16 +1251,30 @@ class SFTPPanel(wx.Panel):
         key = event.GetKeyCode()
         if key == wx.WXK_BACK:
             try:
-                self.sftp.chdir("..")
-                self.remote_path = self.sftp.getcwd()
-                self.refresh_remote()
+                self.show_remote_dir(parent_path(self.remote_path))
             except: pass
         elif key == wx.WXK_DELETE:
             self.do_remote_delete(None)
+        elif key == ord('Z') and wx.GetKeyState(wx.WXK_CONTROL):
+            self.do_remote_undo(None)
         elif key == wx.WXK_F2:
             self.do_remote_rename(None)
+        elif key == wx.WXK_F3:
+            self.do_view_file(None)
         elif key == wx.WXK_F5:
             self.on_refresh(None)
+        elif key == ord('F') and wx.GetKeyState(wx.WXK_CONTROL) and wx.GetKeyState(wx.WXK_SHIFT):
+            self.do_remote_search(None)
+        elif key == ord('G') and wx.GetKeyState(wx.WXK_CONTROL) and wx.GetKeyState(wx.WXK_SHIFT):
+            self.do_content_search(None)
+        elif key == ord('U') and wx.GetKeyState(wx.WXK_CONTROL) and wx.GetKeyState(wx.WXK_SHIFT):
+            self.do_disk_usage(None)
+        elif key == ord('K') and wx.GetKeyState(wx.WXK_CONTROL) and wx.GetKeyState(wx.WXK_SHIFT):
+            self.do_catalog_search(None)
+        elif key == ord('S') and wx.GetKeyState(wx.WXK_CONTROL) and wx.GetKeyState(wx.WXK_SHIFT):
+            self.calc_dir_sizes(self.remote_list, selected_only=True)
+        elif key == ord('F') and wx.GetKeyState(wx.WXK_CONTROL):
+            self.remote_filter.SetFocus()
         else:
             event.Skip()
 
@@ -755,6 +1297,9 @@ class SFTPPanel(wx.Panel):
         menu.Append(self.ID_L_DELETE, tr("ctx_delete"))
         menu.Append(self.ID_L_RENAME, tr("ctx_rename"))
         menu.Append(self.ID_L_MKDIR, tr("ctx_mkdir"))
+        menu.AppendSeparator()
+        self._append_sort_menu(menu, self.local_list)
+        self._append_size_menu(menu, self.local_list)
         
         self.PopupMenu(menu)
 
@@ -780,11 +1325,26 @@ class SFTPPanel(wx.Panel):
     def on_remote_menu(self, event):
         menu = wx.Menu()
         menu.Append(self.ID_DOWNLOAD, tr("ctx_download"))
+        menu.Append(self.ID_R_VIEW, tr("ctx_view_file"))
         menu.Append(self.ID_R_DELETE, tr("ctx_delete"))
         menu.Append(self.ID_R_RENAME, tr("ctx_rename"))
         menu.Append(self.ID_R_MKDIR, tr("ctx_mkdir"))
+        menu.Append(self.ID_R_COPY, tr("ctx_duplicate"))
+        menu.Append(self.ID_R_RELAY, tr("ctx_send_to_host"))
+        menu.Append(self.ID_R_SEARCH, tr("ctx_find_files"))
+        menu.Append(self.ID_R_GREP, tr("ctx_search_contents"))
+        menu.Append(self.ID_R_USAGE, tr("ctx_disk_usage"))
+        if self.catalog:
+            menu.Append(self.ID_R_CATALOG, tr("ctx_search_catalog"))
+        menu.AppendCheckItem(self.ID_R_WATCH, tr("ctx_watch_folder")).Check(self.remote_watch_on)
+        if self.trash and self.trash.can_undo():
+            menu.Append(self.ID_R_UNDO, tr("ctx_undo_delete"))
+        if self.settings.get("delete_to_trash", False):
+            menu.Append(self.ID_R_EMPTY_TRASH, tr("ctx_empty_trash"))
         menu.AppendSeparator()
         menu.Append(self.ID_PERMS, tr("val_permissions"))
+        self._append_sort_menu(menu, self.remote_list)
+        self._append_size_menu(menu, self.remote_list)
         
         self.PopupMenu(menu)
 
@@ -817,30 +1377,21 @@ class SFTPPanel(wx.Panel):
             new_mode = dlg.GetMode()
             recursive = dlg.IsRecursive()
             
+            if recursive:
+                self._chmod_recursive(items, new_mode, dlg.GetFileMode())
+                dlg.Destroy()
+                return
+            
             error_msg = ""
             count = 0
             
-            def _r_chmod(sftp, remote_path, mode):
-                try:
-                    sftp.chmod(remote_path, mode)
-                    if stat.S_ISDIR(sftp.stat(remote_path).st_mode):
-                         for attr in sftp.listdir_attr(remote_path):
-                             name = attr.filename
-                             if name in ('.', '..'): continue
-                             _r_chmod(sftp, remote_path + "/" + name, mode)
-                except Exception as e:
-                    raise e
-
             # Apply Logic
             # Note: chmod takes integer mode
             for item in items:
                  name = self.strip_brackets(item)
                  path = self.remote_path + "/" + name
                  try:
-                     if recursive and item.startswith("["):
-                         _r_chmod(self.sftp, path, new_mode)
-                     else:
-                         self.sftp.chmod(path, new_mode)
+                     self.sftp.chmod(path, new_mode)
                      count += 1
                  except Exception as e:
                      error_msg += f"{name}: {e}\n"
@@ -850,10 +1401,53 @@ class SFTPPanel(wx.Panel):
             
             if count > 0:
                 self.speech.speak(tr("msg_perm_updated"))
-                self.refresh_remote()
+                self.remote_changed(*[self.remote_path + "/" + self.strip_brackets(i) for i in items])
                 
         dlg.Destroy()
 
+    def _chmod_recursive(self, items, mode, file_mode):
+        """Applies permissions to whole trees in the background (see RemoteChmodder)."""
+        targets = [(self.remote_path + "/" + self.strip_brackets(i), i.startswith("[")) for i in items]
+        use_exec = self.settings.get("allow_server_commands", False)
+        
+        self.transfer_dlg = TransferProgressDialog(self, tr("val_permissions"))
+        dlg = self.transfer_dlg
+        dlg.Show()
+
+        def run_chmod():
+            chmodder = RemoteChmodder(self.ssh_client, use_exec=use_exec)
+            last_update = [0.0]
+
+            def progress(count):
+                now = time.monotonic()
+                if now - last_update[0] >= 0.5:
+                    last_update[0] = now
+                    if chmodder.total is None:
+                        dlg.set_status(tr("msg_chmod_count").format(count=count))
+                    else:
+                        dlg.set_status(tr("msg_chmod_progress").format(count=count, total=chmodder.total))
+
+            cancelled = False
+            try:
+                chmodder.chmod(targets, mode, file_mode, progress=progress, is_cancelled=lambda: dlg.is_cancelled)
+            except OperationCancelled:
+                cancelled = True
+            except Exception as e:
+                chmodder.errors.append(("", e))
+
+            wx.CallAfter(dlg.Destroy)
+            wx.CallAfter(self.remote_changed, *[path for path, _ in targets])
+            if chmodder.errors:
+                lines = [f"{path}: {e}" for path, e in chmodder.errors[:20]]
+                if len(chmodder.errors) > 20: lines.append("...")
+                wx.CallAfter(wx.MessageBox, tr("err_multi_errors").format(errors="\n".join(lines)), tr("err_title"))
+            elif cancelled:
+                wx.CallAfter(self.speech.speak, tr("err_cancelled"))
+            else:
+                wx.CallAfter(self.speech.speak, tr("msg_perm_updated"))
+
+        threading.Thread(target=run_chmod, daemon=True).start()
+
     def do_remote_rename(self, event):
         items = self.get_selected_items(self.remote_list)
         if not items: return
@@ -869,10 +1463,162 @@ class SFTPPanel(wx.Panel):
             new_name = dlg.GetValue()
             try:
                 self.sftp.rename(self.remote_path + "/" + old_name, self.remote_path + "/" + new_name)
-                self.refresh_remote()
+                self.remote_changed(self.remote_path + "/" + old_name, self.remote_path + "/" + new_name)
                 self.speech.speak(tr("msg_renamed"))
             except Exception as e: wx.MessageBox(tr("err_remote").format(error=e), tr("err_title"))
 
+    def do_remote_copy(self, event):
+        """Duplicates the selected remote items on the server (no data through the client)."""
+        items = [i for i in self.get_selected_items(self.remote_list) if i != "[..]"]
+        if not items: return
+
+        # One item: ask for the new name/path. Several: ask for a target directory.
+        if len(items) == 1:
+            name = self.strip_brackets(items[0])
+            dlg = wx.TextEntryDialog(self, tr("dlg_duplicate_msg"), tr("ctx_duplicate"), f"{tr('prefix_copy')}{name}")
+        else:
+            dlg = wx.TextEntryDialog(self, tr("dlg_duplicate_dir_msg"), tr("ctx_duplicate"), self.remote_path)
+        if dlg.ShowModal() != wx.ID_OK:
+            dlg.Destroy()
+            return
+        target = dlg.GetValue().strip()
+        dlg.Destroy()
+        if not target: return
+        if not target.startswith("/"):
+            target = self.remote_path + "/" + target
+
+        if len(items) == 1:
+            jobs = [(self.remote_path + "/" + self.strip_brackets(items[0]), target)]
+        else:
+            jobs = [(self.remote_path + "/" + self.strip_brackets(i), target + "/" + self.strip_brackets(i)) for i in items]
+
+        self.transfer_dlg = TransferProgressDialog(self, tr("msg_copying_remote"))
+        dlg = self.transfer_dlg
+        dlg.Show()
+
+        def run_copy():
+            copy_sftp = None
+            count = 0
+            error_msg = ""
+            try:
+                # Own channel: the copy blocks on long server-side requests.
+                copy_sftp = self.ssh_client.open_sftp()
+                copier = RemoteCopier(self.ssh_client, copy_sftp)
+                for src, dst in jobs:
+                    if dlg.is_cancelled: break
+                    dlg.set_filename(os.path.basename(src))
+                    try:
+                        copier.copy(src, dst, progress=dlg.update_progress, is_cancelled=lambda: dlg.is_cancelled)
+                        count += 1
+                    except OperationCancelled:
+                        break
+                    except Exception as e:
+                        error_msg += f"{os.path.basename(src)}: {e}\n"
+            except Exception as e:
+                error_msg += f"{e}\n"
+            finally:
+                if copy_sftp:
+                    try: copy_sftp.close()
+                    except: pass
+
+            wx.CallAfter(dlg.Destroy)
+            if count > 0:
+                wx.CallAfter(self.remote_changed, *[dst for _, dst in jobs])
+                wx.CallAfter(self.speech.speak, tr("msg_copied_remote").format(count=count))
+            if error_msg:
+                wx.CallAfter(wx.MessageBox, tr("err_remote").format(error=error_msg), tr("err_title"), wx.ICON_ERROR)
+            elif count == 0:
+                wx.CallAfter(self.speech.speak, tr("err_transfer_cancelled"))
+
+        threading.Thread(target=run_copy, daemon=True).start()
+
+    def do_send_to_host(self, event):
+        """Streams the selected remote items directly to another profile's server."""
+        items = [i for i in self.get_selected_items(self.remote_list) if i != "[..]"]
+        if not items: return
+
+        names = list(self.config.get_profiles().keys())
+        if not names: return
+        dlg = wx.SingleChoiceDialog(self, tr("dlg_relay_msg"), tr("ctx_send_to_host"), names)
+        if dlg.ShowModal() != wx.ID_OK:
+            dlg.Destroy()
+            return
+        profile_name = dlg.GetStringSelection()
+        dlg.Destroy()
+
+        pwd = unlock_profile(self, self.config, self.speech, profile_name)
+        if not pwd: return
+        try:
+            target_details = self.config.get_profile_details(profile_name, pwd)
+        except Exception as e:
+            wx.MessageBox(tr("err_load_profile").format(error=e), tr("err_title"))
+            return
+
+        dlg = wx.TextEntryDialog(self, tr("dlg_relay_dir_msg").format(name=profile_name), tr("ctx_send_to_host"), target_details.get("last_remote_path") or ".")
+        if dlg.ShowModal() != wx.ID_OK:
+            dlg.Destroy()
+            return
+        target_dir = dlg.GetValue().strip() or "."
+        dlg.Destroy()
+
+        self.transfer_dlg = TransferProgressDialog(self, tr("msg_relaying").format(name=profile_name))
+        dlg = self.transfer_dlg
+        dlg.Show()
+
+        def run_relay():
+            target_client = SightSSHClient()
+            src_sftp = dst_sftp = None
+            count = 0
+            error_msg = ""
+            try:
+                self.play_beep("start")
+                target_client.connect(
+                    host=target_details['host'],
+                    port=target_details['port'],
+                    username=target_details['username'],
+                    password=target_details.get('secret') if target_details['auth_type'] == 'password' else None,
+                    key_filename=target_details.get('key_path') if target_details['auth_type'] == 'key' else None,
+                    passphrase=target_details.get('secret') if target_details['auth_type'] == 'key' else None,
+                    keep_alive=self.settings.get("keep_alive", 30),
+                    timeout=self.settings.get("connection_timeout", 10)
+                )
+                # Dedicated channels on both hosts so the panel's own session stays usable.
+                src_sftp = self.ssh_client.open_sftp()
+                dst_sftp = target_client.open_sftp()
+                dst_dir = dst_sftp.normalize(target_dir)
+                relay = HostRelay(src_sftp, dst_sftp)
+
+                for item in items:
+                    if dlg.is_cancelled: break
+                    name = self.strip_brackets(item)
+                    try:
+                        count += relay.copy_tree(self.remote_path + "/" + name, dst_dir + "/" + name,
+                                                 on_file=dlg.set_filename, callback=dlg.update_progress,
+                                                 is_cancelled=lambda: dlg.is_cancelled)
+                    except OperationCancelled:
+                        break
+                    except Exception as e:
+                        error_msg += f"{name}: {e}\n"
+            except Exception as e:
+                error_msg += f"{e}\n"
+            finally:
+                for session in (src_sftp, dst_sftp):
+                    if session:
+                        try: session.close()
+                        except: pass
+                target_client.disconnect()
+
+            wx.CallAfter(dlg.Destroy)
+            if count > 0:
+                self.play_beep("end")
+                wx.CallAfter(self.speech.speak, tr("msg_relayed").format(count=count, name=profile_name))
+            if error_msg:
+                wx.CallAfter(wx.MessageBox, tr("err_remote").format(error=error_msg), tr("err_title"), wx.ICON_ERROR)
+            elif count == 0:
+                wx.CallAfter(self.speech.speak, tr("err_transfer_cancelled"))
+
+        threading.Thread(target=run_relay, daemon=True).start()
+
     def do_local_delete(self, event):
         items = self.get_selected_items(self.local_list)
         if not items: return
@@ -905,7 +1651,7 @@ class SFTPPanel(wx.Panel):
              self.speech.speak(tr("msg_deleted_count").format(count=success_count))
 
     def do_remote_delete(self, event):
-        items = self.get_selected_items(self.remote_list)
+        items = [i for i in self.get_selected_items(self.remote_list) if i != "[..]"]
         if not items: return
         
         # Check setting
@@ -913,43 +1659,263 @@ class SFTPPanel(wx.Panel):
         if confirm:
             if wx.MessageBox(tr("msg_confirm_del_items").format(count=len(items)), tr("app_title"), wx.YES_NO) != wx.YES: return
             
-        success_count = 0
-        error_msg = ""
+        targets = [(self.remote_path + "/" + self.strip_brackets(i), i.startswith("[")) for i in items]
+        
+        if self.settings.get("delete_to_trash", False) and self.trash:
+            try:
+                failed = self.trash.move([path for path, _ in targets])
+            except Exception as e:
+                failed = [(path, e) for path, _ in targets]
+            moved = len(targets) - len(failed)
+            if moved:
+                self.remote_changed(self.trash.trash_dir, *[path for path, _ in targets])
+                self.speech.speak(tr("msg_trashed_count").format(count=moved))
+                self.schedule_trash_purge()
+            if not failed: return
+            # Only items on another filesystem than the trash may be deleted for real, and only if confirmed
+            other_fs = set(path for path, e in failed if is_cross_device(e))
+            errors = [(path, e) for path, e in failed if path not in other_fs]
+            if errors:
+                error_msg = "".join(f"{path}: {e}\n" for path, e in errors)
+                wx.MessageBox(tr("err_trash_move").format(errors=error_msg), tr("err_title"))
+            if not other_fs: return
+            logging.info(f"Trash move crosses filesystems for {len(other_fs)} items")
+            if wx.MessageBox(tr("msg_confirm_delete_permanently").format(count=len(other_fs)),
+                             tr("app_title"), wx.YES_NO | wx.ICON_WARNING) != wx.YES: return
+            targets = [t for t in targets if t[0] in other_fs]
+        # Directories can be removed with one 'rm -rf' on the server if the user allows it.
+        use_exec = self.settings.get("allow_server_commands", False) and any(is_dir for _, is_dir in targets)
+        
+        self.transfer_dlg = TransferProgressDialog(self, tr("msg_deleting"))
+        dlg = self.transfer_dlg
+        dlg.Show()
 
-        def _r_remote_delete(sftp, remote_path):
-             # Recursively delete a remote directory
-             try:
-                 attrs = sftp.listdir_attr(remote_path)
-                 for attr in attrs:
-                     name = attr.filename
-                     if name in ('.', '..'): continue
-                     r_path = remote_path + "/" + name
-                     if stat.S_ISDIR(attr.st_mode):
-                         _r_remote_delete(sftp, r_path)
-                     else:
-                         sftp.remove(r_path)
-                 sftp.rmdir(remote_path)
-             except Exception as e:
-                 raise e
+        def run_delete():
+            deleter = RemoteDeleter(self.ssh_client, use_exec=use_exec)
+            last_update = [0.0]
 
-        for item in items:
-            if item == "[..]": continue
-            name = self.strip_brackets(item)
-            path = self.remote_path + "/" + name
+            def progress(count):
+                now = time.monotonic()
+                if now - last_update[0] >= 0.5:
+                    last_update[0] = now
+                    if deleter.total is None:
+                        dlg.set_status(tr("msg_deleting_count").format(count=count))
+                    else:
+                        dlg.set_status(tr("msg_deleting_progress").format(count=count, total=deleter.total))
+
+            cancelled = False
             try:
-                if item.startswith("["): # Directory
-                     _r_remote_delete(self.sftp, path)
-                else:
-                     self.sftp.remove(path)
-                success_count += 1
+                deleter.delete(targets, progress=progress, is_cancelled=lambda: dlg.is_cancelled)
+            except OperationCancelled:
+                cancelled = True
             except Exception as e:
-                 error_msg += f"{name}: {str(e)}\n"
-        
+                deleter.errors.append(("", e))
+
+            # A selected item counts as deleted if nothing at or below it failed.
+            failed = [path for path, _ in deleter.errors]
+            success_count = sum(1 for path, _ in targets
+                                if not any(f == path or f.startswith(path + "/") or f == "" for f in failed))
+
+            wx.CallAfter(dlg.Destroy)
+            wx.CallAfter(self.remote_changed, *[path for path, _ in targets])
+            if deleter.errors:
+                lines = [f"{path}: {e}" for path, e in deleter.errors[:20]]
+                if len(deleter.errors) > 20: lines.append("...")
+                wx.CallAfter(wx.MessageBox, tr("err_remote").format(error="\n".join(lines)), tr("app_title"))
+            elif cancelled:
+                wx.CallAfter(self.speech.speak, tr("err_cancelled"))
+            else:
+                wx.CallAfter(self.speech.speak, tr("msg_deleted_count").format(count=success_count))
+
+        threading.Thread(target=run_delete, daemon=True).start()
+
+    def do_remote_undo(self, event):
+        """Restores the last delete from the remote trash."""
+        if not self.trash or not self.trash.can_undo():
+            self.speech.speak(tr("msg_nothing_to_undo"))
+            return
+        restored, errors = self.trash.undo()
+        # Restored items may belong to any folder
+        self.listing_cache.clear()
+        self.prefetcher.cache.clear()
         self.refresh_remote()
-        if error_msg:
-             wx.MessageBox(tr("err_remote").format(error=error_msg), tr("app_title"))
+        if errors:
+            error_msg = "".join(f"{path}: {e}\n" for path, e in errors)
+            wx.MessageBox(tr("err_multi_errors").format(errors=error_msg), tr("err_title"))
+        if restored:
+            self.speech.speak(tr("msg_restored_count").format(count=restored))
+
+    def schedule_trash_purge(self):
+        """(Re)starts the countdown to emptying the trash; undo stays possible until it fires."""
+        if self.purge_timer:
+            self.purge_timer.Start(PURGE_DELAY * 1000)
         else:
-             self.speech.speak(tr("msg_deleted_count").format(count=success_count))
+            self.purge_timer = wx.CallLater(PURGE_DELAY * 1000, self.start_trash_purge)
+
+    def start_trash_purge(self, manual=False):
+        if not self.trash or self.purge_dlg: return
+        if self.transfer_dlg and self.transfer_dlg.IsShown() and not manual:
+            # Don't compete with a running transfer; try again later
+            self.schedule_trash_purge()
+            return
+        
+        dlg = TransferProgressDialog(self, tr("msg_emptying_trash"))
+        self.purge_dlg = dlg
+        if manual:
+            dlg.Show()
+        else:
+            # Automatic purge: keep focus where the user is working
+            dlg.ShowWithoutActivating()
+            self.speech.speak(tr("msg_emptying_trash"), interrupt=False)
+
+        def run_purge():
+            deleter = None
+            cancelled = False
+            try:
+                deleter = self.trash.purge(
+                    progress=lambda count: dlg.set_status(tr("msg_deleting_count").format(count=count)),
+                    is_cancelled=lambda: dlg.is_cancelled)
+            except OperationCancelled:
+                cancelled = True # Leftovers are purged next time
+            except Exception as e:
+                logging.warning(f"Trash purge failed: {e}")
+
+            def finish():
+                if deleter and deleter.errors:
+                    logging.warning(f"Trash purge: {len(deleter.errors)} entries could not be deleted: {deleter.errors[0][1]}")
+                try:
+                    self.purge_dlg = None
+                    self.invalidate_listing(self.trash.trash_dir, recursive=True)
+                    dlg.Destroy()
+                    if not cancelled:
+                        self.speech.speak(tr("msg_trash_emptied"), interrupt=False)
+                except RuntimeError: pass # Panel already closed
+            wx.CallAfter(finish)
+
+        threading.Thread(target=run_purge, daemon=True).start()
+
+    def close_background_sftp(self):
+        if self.bg_sftp:
+            try: self.bg_sftp.close()
+            except: pass
+            self.bg_sftp = None
+
+    def stop_trash_purge(self):
+        if self.purge_timer:
+            self.purge_timer.Stop()
+            self.purge_timer = None
+        if self.purge_dlg:
+            self.purge_dlg.on_cancel(None)
+
+    def open_catalog(self, home):
+        """Opens this profile's catalog if enabled and schedules its next full rescan."""
+        if not self.settings.get("catalog_enabled", False): return
+        try:
+            self.catalog = RemoteCatalog(catalog_path(self.config.config_dir, self.details),
+                                         self.settings.get("catalog_max_entries", CATALOG_MAX_ENTRIES))
+        except Exception as e:
+            logging.warning(f"Could not open the file catalog: {e}")
+            return
+        self.catalog_root = self.settings.get("catalog_root") or home
+        self.schedule_catalog_refresh()
+
+    def apply_catalog_settings(self, old):
+        """Opens, closes or reschedules the catalog after the settings changed."""
+        if self.remote_home is None: return # Not connected yet; init_sftp opens it
+        enabled = self.settings.get("catalog_enabled", False)
+        if enabled != old.get("catalog_enabled", False):
+            if enabled: self.open_catalog(self.remote_home)
+            else: self.stop_catalog()
+            return
+        if not self.catalog: return
+        self.catalog.max_entries = self.settings.get("catalog_max_entries", CATALOG_MAX_ENTRIES)
+        self.catalog_root = self.settings.get("catalog_root") or self.remote_home
+        if old.get("catalog_root") != self.settings.get("catalog_root"):
+            self.schedule_catalog_refresh(due=True) # Nothing of the new root may be catalogued yet
+        elif old.get("catalog_refresh_hours") != self.settings.get("catalog_refresh_hours"):
+            self.schedule_catalog_refresh()
+
+    def schedule_catalog_refresh(self, due=False):
+        """
+        Starts the countdown to the next full rescan: soon if the catalog is
+        out of date (or due), else when it will be.
+        """
+        if self.catalog_timer:
+            self.catalog_timer.Stop()
+            self.catalog_timer = None
+        if not self.catalog: return
+        hours = self.settings.get("catalog_refresh_hours", CATALOG_REFRESH_HOURS)
+        if due or self.catalog.needs_refresh(hours):
+            delay = CATALOG_START_DELAY
+        elif hours > 0:
+            delay = max(CATALOG_START_DELAY, self.catalog.last_scan + hours * 3600 - time.time())
+        else:
+            return
+        self.catalog_timer = wx.CallLater(int(delay * 1000), self.start_catalog_refresh)
+
+    def start_catalog_refresh(self, manual=False):
+        """Rescans the catalog root in the background; browsing keeps working meanwhile."""
+        if not self.catalog or self.catalog_count is not None: return
+        if self.transfer_dlg and self.transfer_dlg.IsShown() and not manual:
+            # Don't compete with a running transfer; try again later
+            self.catalog_timer = wx.CallLater(CATALOG_START_DELAY * 1000, self.start_catalog_refresh)
+            return
+        catalog, root = self.catalog, self.catalog_root
+        self.catalog_count = 0
+        self.catalog_scanning = catalog
+
+        def set_count(count):
+            self.catalog_count = count
+
+        def run_refresh():
+            error = None
+            try:
+                # Stops once this catalog is closed (panel closed or catalog turned off)
+                catalog.refresh(self.ssh_client, root, set_count, lambda: self.catalog is not catalog)
+            except OperationCancelled:
+                pass
+            except Exception as e:
+                error = e
+                logging.warning(f"Catalog rescan of {root} failed: {e}")
+            with self.catalog_lock:
+                self.catalog_count = None
+                self.catalog_scanning = None
+                closed = self.catalog is not catalog
+                if closed:
+                    catalog.close() # Closed while we were scanning
+                    if self.catalog is None: return
+
+            def finish():
+                try:
+                    # Also schedules a catalog opened, or a root chosen, while this rescan ran
+                    self.schedule_catalog_refresh(due=root != self.catalog_root)
+                    if manual and not closed:
+                        msg = tr("err_catalog").format(error=error) if error else \
+                            tr("msg_catalog_updated").format(count=catalog.count)
+                        self.speech.speak(msg, interrupt=False)
+                except RuntimeError: pass # Panel already closed
+            wx.CallAfter(finish)
+
+        threading.Thread(target=run_refresh, daemon=True).start()
+
+    def catalog_folder(self, path, entries):
+        """Worker: records a fresh listing of path in the catalog, if one is open."""
+        catalog = self.catalog
+        if catalog is None or not path.startswith("/"): return
+        try:
+            catalog.update_folder(path, entries)
+        except Exception as e:
+            logging.debug(f"Catalog update of {path} failed: {e}")
+
+    def stop_catalog(self):
+        """Stops a running rescan and closes the catalog (the rescan closes it itself once it has stopped)."""
+        if self.catalog_timer:
+            self.catalog_timer.Stop()
+            self.catalog_timer = None
+        catalog, self.catalog = self.catalog, None
+        if catalog is None: return
+        with self.catalog_lock:
+            if catalog is not self.catalog_scanning: catalog.close()
 
     def do_local_mkdir(self, event):
          dlg = wx.TextEntryDialog(self, tr("dlg_rename_msg"), tr("ctx_mkdir"))
@@ -964,7 +1930,7 @@ class SFTPPanel(wx.Panel):
          if dlg.ShowModal() == wx.ID_OK:
              try:
                  self.sftp.mkdir(self.remote_path + "/" + dlg.GetValue())
-                 self.refresh_remote()
+                 self.remote_changed(self.remote_path + "/" + dlg.GetValue())
              except Exception as e: wx.MessageBox(str(e), tr("err_title"), wx.ICON_ERROR)
 
     def save_session_paths(self):
@@ -972,9 +1938,24 @@ class SFTPPanel(wx.Panel):
              profile_name = self.details.get("name")
              if profile_name:
                  self.config.update_profile_paths(profile_name, self.local_path, self.remote_path)
+        self.save_transfer_tuning()
+
+    def save_transfer_tuning(self):
+        """Remembers the tuned transfer parameters for this host."""
+        try:
+            if self.tuner.rtt:
+                self.config.save_transfer_tuning(self.host_key, self.tuner.to_dict())
+        except Exception as e:
+            logging.warning(f"Could not save transfer tuning: {e}")
 
     def on_back_term(self, event):
          self.save_session_paths()
+         self.stop_trash_purge()
+         self.stop_catalog()
+         self.prefetcher.stop()
+         self.stop_local_watch()
+         self.stop_remote_watch()
+         self.close_background_sftp()
          if self.sftp:
              try: self.sftp.close()
              except: pass
@@ -986,6 +1967,11 @@ class SFTPPanel(wx.Panel):
                 return
                 
         self.save_session_paths()
+        self.stop_trash_purge()
+        self.stop_catalog()
+        self.prefetcher.stop()
+        self.stop_local_watch()
+        self.stop_remote_watch()
         if self.transfer_dlg:
             self.transfer_dlg.on_cancel(None)
         if self.ssh_client: self.ssh_client.disconnect()
@@ -995,6 +1981,7 @@ class SFTPPanel(wx.Panel):
 
     def on_refresh(self, event):
         self.refresh_lists()
+        self.load_id_names()
         self.speech.speak(tr("msg_lists_refreshed"))
 
     def can_close(self):
@@ -1052,9 +2039,16 @@ class SFTPPanel(wx.Panel):
 
     def cleanup(self):
         """Cleanup resources before destruction."""
+        self.save_transfer_tuning()
         try:
             if self.transfer_dlg:
                 self.transfer_dlg.on_cancel(None)
+            self.stop_trash_purge()
+            self.stop_catalog()
+            self.prefetcher.stop()
+            self.stop_local_watch()
+            self.stop_remote_watch()
+            self.close_background_sftp()
         except: pass
         
         try:
@@ -50,6 +50,10 @@ class TransferProgressDialog(wx.Dialog):
         # Optional: Announce filename change? Maybe too verbose.
         # Let's keep it simple for now as requested.
 
+    def set_status(self, text):
+        """Sets a free-form status line (e.g. for operations without a byte total)."""
+        wx.CallAfter(self.lbl_file.SetLabel, text)
+
     def check_cancel(self):
         if self.is_cancelled:
             raise Exception(tr("err_transfer_cancelled"))
@@ -0,0 +1,292 @@
+import wx
+import queue
+import threading
+import posixpath
+from sightssh.core.i18n import tr
+from sightssh.accessibility.speech import SpeechManager
+from sightssh.core.file_entry import format_size
+from sightssh.core.remote_ops import OperationCancelled
+from sightssh.core.remote_pager import RemotePager
+
+WINDOW_LINES = 600 # Lines held in the text box at once
+FETCH_LINES = 200 # Lines read per step while scrolling
+EDGE_LINES = 60 # The next step is read once the caret is this close to the top or bottom
+CONTEXT_LINES = 20 # Lines shown above the target of a jump
+
+
+class RemoteViewerDialog(wx.Dialog):
+    """
+    Read-only view of a remote file of any size. The text box holds a
+    window of WINDOW_LINES lines; moving near its top or bottom reads the
+    next lines in the background and slides the window, so only the pages
+    around the view are ever read (see RemotePager). Ctrl+Home and Ctrl+End
+    go to the start and end of the file, Ctrl+G to a line number or a
+    percentage. The viewer has its own SFTP session, used only by its
+    worker thread; the caller calls stop() once ShowModal returns.
+    """
+    def __init__(self, parent, ssh_client, path, settings=None):
+        super().__init__(parent, title=tr("dlg_viewer_title").format(name=posixpath.basename(path)), size=(800, 600),
+                         style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER | wx.MAXIMIZE_BOX)
+        self.ssh_client = ssh_client
+        self.path = path
+        self.speech = SpeechManager()
+        self.pager = None
+        self.sftp = None
+        self.jobs = queue.Queue() # Callables run in order by the worker; None ends it
+        self.gen = 0 # Bumped to cancel a running jump
+        self.closing = False
+        self.pending = 0 # Jobs queued or running; scrolling steps wait for none
+        self.lines = []
+        self.first_line = None # 0-based line number of self.lines[0], if counted
+        self.total_lines = None
+        self.size = 0
+
+        settings = settings or {}
+        font = wx.Font(settings.get("font_size", 12), wx.FONTFAMILY_TELETYPE, wx.FONTSTYLE_NORMAL,
+                       wx.FONTWEIGHT_NORMAL, faceName=settings.get("font_face", "Consolas"))
+        if not font.IsOk(): font = wx.Font(12, wx.FONTFAMILY_TELETYPE, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        self.lbl_status = wx.StaticText(self, label=tr("msg_viewer_opening"))
+        sizer.Add(self.lbl_status, 0, wx.EXPAND | wx.ALL, 10)
+
+        self.txt = wx.TextCtrl(self, style=wx.TE_MULTILINE | wx.TE_READONLY | wx.TE_RICH2 | wx.TE_DONTWRAP,
+                               name=posixpath.basename(path))
+        self.txt.SetFont(font)
+        sizer.Add(self.txt, 1, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+
+        bottom = wx.BoxSizer(wx.HORIZONTAL)
+        self.btn_goto = wx.Button(self, label=tr("btn_viewer_goto"))
+        self.btn_stop = wx.Button(self, label=tr("btn_stop"))
+        self.btn_stop.Disable()
+        self.btn_close = wx.Button(self, wx.ID_CANCEL, label=tr("btn_close"))
+        bottom.Add(self.btn_goto, 0, wx.RIGHT, 5)
+        bottom.Add(self.btn_stop, 0, wx.RIGHT, 5)
+        bottom.Add(self.btn_close, 0)
+        sizer.Add(bottom, 0, wx.ALIGN_RIGHT | wx.ALL, 10)
+        self.SetSizer(sizer)
+
+        self.txt.Bind(wx.EVT_KEY_DOWN, self.on_key)
+        self.txt.Bind(wx.EVT_KEY_UP, self.on_caret_moved)
+        self.txt.Bind(wx.EVT_LEFT_UP, self.on_caret_moved)
+        self.btn_goto.Bind(wx.EVT_BUTTON, self.on_goto)
+        self.btn_stop.Bind(wx.EVT_BUTTON, self.on_stop)
+        self.CenterOnParent()
+        self.txt.SetFocus()
+
+        threading.Thread(target=self._serve, daemon=True).start()
+        self._queue_jump(lambda: 0)
+
+    # Worker
+
+    def _serve(self):
+        """Worker: runs jobs one at a time; the pager and its session are only used from here."""
+        while True:
+            job = self.jobs.get()
+            if job is None: break
+            try:
+                if self.pager is None:
+                    self.sftp = self.ssh_client.open_sftp()
+                    self.pager = RemotePager(self.sftp, self.path)
+                job()
+            except OperationCancelled:
+                pass
+            except Exception as e:
+                wx.CallAfter(self._failed, e)
+                if self.pager is None: break # Could not open the file; nothing more can work
+            finally:
+                wx.CallAfter(self._job_done)
+        try:
+            if self.pager: self.pager.close()
+            if self.sftp: self.sftp.close()
+        except Exception: pass
+
+    def _total(self):
+        return self.pager.line_count if self.pager.indexed >= self.pager.size else None
+
+    def _queue_jump(self, target, slow=False):
+        """
+        Shows the lines around an offset: target() runs on the worker and
+        returns it (a line start). slow: it may read much of the file, so
+        Stop is offered meanwhile.
+        """
+        self.gen += 1
+        gen = self.gen
+
+        def job():
+            if self.gen != gen: return
+            offset = target()
+            pager = self.pager
+            before = pager.lines_before(offset, CONTEXT_LINES)
+            after = pager.lines(offset, FETCH_LINES)
+            lines = before + after
+            first = pager.line_number(lines[0].offset) if lines else 0
+            wx.CallAfter(self._show, gen, lines, first, len(before), self._total(), pager.size)
+        if slow: self.btn_stop.Enable()
+        self.pending += 1
+        self.jobs.put(job)
+
+    def _queue_step(self, forward):
+        """Reads the next FETCH_LINES lines below or above the window."""
+        if self.pending or not self.lines: return
+        gen = self.gen
+        edge = self.lines[-1].end if forward else self.lines[0].offset
+
+        def job():
+            if self.gen != gen: return
+            pager = self.pager
+            if forward:
+                if edge >= pager.size: pager.refresh_size() # Maybe the file has grown (a log)
+                new = pager.lines(edge, FETCH_LINES)
+            else:
+                new = pager.lines_before(edge, FETCH_LINES)
+            number = pager.line_number(new[0].offset) if new else None
+            wx.CallAfter(self._step, gen, new, number, forward, self._total(), pager.size)
+        self.pending += 1
+        self.jobs.put(job)
+
+    def stop(self):
+        """Ends the worker, which closes the file and its session."""
+        self.closing = True
+        self.gen += 1
+        self.jobs.put(None)
+
+    # UI
+
+    def _caret_row(self):
+        _, col, row = self.txt.PositionToXY(self.txt.GetInsertionPoint())
+        return max(0, min(row, len(self.lines) - 1)), col
+
+    def _set_text(self, row, col=0):
+        self.txt.ChangeValue("\n".join(line.text for line in self.lines))
+        pos = self.txt.XYToPosition(col, row)
+        if pos < 0: pos = self.txt.XYToPosition(0, row)
+        self.txt.SetInsertionPoint(max(0, pos))
+        self.txt.ShowPosition(max(0, pos))
+
+    def _show(self, gen, lines, first, row, total, size):
+        try:
+            if gen != self.gen: return
+            self.lines, self.first_line, self.total_lines, self.size = lines, first, total, size
+            self._set_text(row)
+            self.speech.speak(self.update_status() if lines else tr("msg_viewer_empty"))
+        except RuntimeError: pass
+
+    def _step(self, gen, new, number, forward, total, size):
+        try:
+            if gen != self.gen: return
+            self.total_lines, self.size = total, size
+            if not new:
+                if forward and self._caret_row()[0] == len(self.lines) - 1:
+                    self.speech.speak(tr("msg_viewer_end"))
+                return
+            row, col = self._caret_row()
+            if forward:
+                if self.first_line is None and number is not None:
+                    self.first_line = number - sum(line.newline for line in self.lines)
+                lines = self.lines + new
+                drop = max(0, len(lines) - WINDOW_LINES)
+                if self.first_line is not None: self.first_line += sum(line.newline for line in lines[:drop])
+                self.lines = lines[drop:]
+                row -= drop
+            else:
+                if number is not None:
+                    self.first_line = number
+                elif self.first_line is not None:
+                    self.first_line -= sum(line.newline for line in new)
+                self.lines = (new + self.lines)[:WINDOW_LINES]
+                row += len(new)
+            self._set_text(row, col)
+            self.update_status()
+        except RuntimeError: pass
+
+    def _progress(self, gen, done, size):
+        try:
+            if gen == self.gen:
+                self.lbl_status.SetLabel(tr("msg_viewer_counting").format(percent=done * 100 // max(1, size)))
+        except RuntimeError: pass
+
+    def _job_done(self):
+        try:
+            self.pending -= 1
+            if not self.pending: self.btn_stop.Disable()
+        except RuntimeError: pass
+
+    def _failed(self, error):
+        try:
+            msg = tr("err_remote").format(error=error)
+            self.lbl_status.SetLabel(msg)
+            self.speech.speak(msg)
+        except RuntimeError: pass
+
+    def update_status(self):
+        """Shows and returns where the caret is: line number if counted, percentage, file size."""
+        if not self.lines: return self.lbl_status.GetLabel()
+        row, _ = self._caret_row()
+        line = self.lines[row]
+        percent = line.offset * 100 // max(1, self.size)
+        if self.first_line is None:
+            text = tr("msg_viewer_status_uncounted").format(percent=percent, size=format_size(self.size))
+        else:
+            number = self.first_line + sum(l.newline for l in self.lines[:row]) + 1
+            total = self.total_lines if self.total_lines is not None else "?"
+            text = tr("msg_viewer_status").format(line=number, total=total, percent=percent, size=format_size(self.size))
+        self.lbl_status.SetLabel(text)
+        return text
+
+    def on_caret_moved(self, event):
+        event.Skip()
+        if not self.lines: return
+        row, _ = self._caret_row()
+        if row >= len(self.lines) - EDGE_LINES:
+            # At the very bottom, also look again for lines written since
+            if self.lines[-1].end < self.size or row == len(self.lines) - 1: self._queue_step(True)
+        elif row < EDGE_LINES and self.lines[0].offset > 0:
+            self._queue_step(False)
+        self.update_status()
+
+    def on_key(self, event):
+        key = event.GetKeyCode()
+        ctrl = event.ControlDown()
+        if ctrl and key == wx.WXK_HOME:
+            self._queue_jump(lambda: 0)
+        elif ctrl and key == wx.WXK_END:
+            self._queue_jump(self._end_offset)
+        elif ctrl and key == ord('G'):
+            self.on_goto(None)
+        else:
+            event.Skip()
+
+    def _end_offset(self):
+        # Lines before the end fill the view; the caret lands on the last one
+        self.pager.refresh_size()
+        return self.pager.line_start(self.pager.size - 1)
+
+    def on_goto(self, event):
+        dlg = wx.TextEntryDialog(self, tr("msg_viewer_goto"), tr("btn_viewer_goto"))
+        try:
+            if dlg.ShowModal() != wx.ID_OK: return
+            value = dlg.GetValue().strip()
+        finally:
+            dlg.Destroy()
+        try:
+            if value.endswith("%"):
+                percent = min(100.0, max(0.0, float(value[:-1])))
+                self._queue_jump(lambda: self.pager.line_start(int(self.pager.size * percent / 100)))
+            else:
+                line = int(value)
+                gen = self.gen + 1 # The jump queued below
+                self.lbl_status.SetLabel(tr("msg_viewer_counting").format(percent=0))
+                self._queue_jump(lambda: self.pager.line_offset(
+                    line - 1, lambda done, size: wx.CallAfter(self._progress, gen, done, size),
+                    lambda: self.gen != gen or self.closing), slow=True)
+        except ValueError:
+            self.speech.speak(tr("err_viewer_goto"))
+        self.txt.SetFocus()
+
+    def on_stop(self, event):
+        """Cancels a running jump; the lines shown stay."""
+        self.gen += 1
+        self.btn_stop.Disable()
+        self.txt.SetFocus()
+        self.speech.speak(self.update_status())
@@ -0,0 +1,138 @@
+import unittest
+import os
+import tempfile
+import shutil
+from sightssh.core.file_entry import FileEntry, sort_entries, list_local, make_name_filter
+from sightssh.core.remote_listing import ListingCache, parent_path
+from sightssh.core.id_names import IdNameMap, parse_id_table
+from sightssh.core.dir_sizes import DirSizeCache, local_dir_sizes
+
+class TestFileEntry(unittest.TestCase):
+    def test_columns(self):
+        entry = FileEntry("a.txt", False, 2048, 0, 0o100644, 1000, 50)
+        names = IdNameMap()
+        names.users, names.groups = {1000: "alice"}, {50: "staff"}
+        self.assertEqual(entry.column_text("name"), "a.txt")
+        self.assertEqual(entry.column_text("size"), "2.0 KB")
+        self.assertEqual(entry.column_text("type"), "FILE")
+        self.assertEqual(entry.column_text("permissions"), "-rw-r--r--")
+        self.assertEqual(entry.column_text("owner", names), "alice")
+        self.assertEqual(entry.column_text("group", names), "staff")
+        self.assertEqual(entry.column_text("owner"), "1000")
+
+    def test_id_tables(self):
+        text = "root:x:0:0:root:/root:/bin/bash\n# comment\nalice:x:1000:1000::/home/alice:/bin/sh\nbroken\n"
+        self.assertEqual(parse_id_table(text), {0: "root", 1000: "alice"})
+        self.assertEqual(IdNameMap().user(42), "42")
+
+    def test_dirs_and_parent(self):
+        self.assertEqual(FileEntry.parent().display_name, "[..]")
+        self.assertEqual(FileEntry.parent().column_text("type"), "DIR")
+        folder = FileEntry("src", True, 4096, 0, 0o40755, 0, 0)
+        self.assertEqual(folder.display_name, "[src]")
+        self.assertEqual(folder.column_text("size"), "")
+        self.assertEqual(folder.column_text("owner"), "0")
+
+    def test_sort_dirs_first(self):
+        entries = [FileEntry("b", False), FileEntry("z", True), FileEntry("a", False), FileEntry("c", True)]
+        self.assertEqual([e.display_name for e in sort_entries(entries)], ["[c]", "[z]", "a", "b"])
+
+    def test_natural_and_column_sort(self):
+        entries = [FileEntry("file10", False, 5, 3), FileEntry("File2", False, 50, 1),
+                   FileEntry("file1", False, 500, 2), FileEntry("dir", True, 4096, 9)]
+        self.assertEqual([e.name for e in sort_entries(entries)], ["dir", "file1", "File2", "file10"])
+        self.assertEqual([e.name for e in sort_entries(entries, "size", True)], ["dir", "file1", "File2", "file10"])
+        self.assertEqual([e.name for e in sort_entries(entries, "modified")], ["dir", "File2", "file1", "file10"])
+
+    def test_sort_by_shown_owner_and_type(self):
+        entries = [FileEntry("a.txt", False, uid=1, gid=2), FileEntry("b.bin", False, uid=2, gid=1),
+                   FileEntry("c", False, uid=10, gid=3)]
+        names = IdNameMap()
+        names.users, names.groups = {1: "zoe", 2: "adam"}, {1: "wheel", 2: "staff"}
+        self.assertEqual([e.name for e in sort_entries(entries, "owner")], ["a.txt", "b.bin", "c"])
+        self.assertEqual([e.name for e in sort_entries(entries, "owner", id_names=names)], ["c", "b.bin", "a.txt"]) # 10 < adam < zoe
+        self.assertEqual([e.name for e in sort_entries(entries, "group", id_names=names)], ["c", "a.txt", "b.bin"])
+        self.assertEqual([e.name for e in sort_entries(entries, "type", True)], ["c", "b.bin", "a.txt"]) # All FILE: name order, reversed
+
+    def test_name_filter(self):
+        names = ["app.log", "App.LOG.1", "config.yaml", "logs"]
+        match = lambda pattern: [n for n in names if make_name_filter(pattern)(n)]
+        self.assertIsNone(make_name_filter(""))
+        self.assertEqual(match("log"), ["app.log", "App.LOG.1", "logs"])
+        self.assertEqual(match("*.log"), ["app.log"])
+        self.assertEqual(match(r"re:\.log(\.\d+)?$"), ["app.log", "App.LOG.1"])
+
+    def test_list_local(self):
+        path = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(path, "sub"))
+            open(os.path.join(path, "file"), "w").close()
+            open(os.path.join(path, ".hidden"), "w").close()
+            self.assertEqual([e.display_name for e in list_local(path, show_hidden=False)], ["[sub]", "file"])
+            self.assertEqual(len(list_local(path)), 3)
+        finally:
+            shutil.rmtree(path)
+
+class TestListingCache(unittest.TestCase):
+    def test_invalidate_tree(self):
+        cache = ListingCache()
+        for path in ["/srv", "/srv/www", "/srv/www/img", "/srv/wwwdata"]:
+            cache.put(path, [FileEntry("x", False)])
+        cache.invalidate("/srv/www", recursive=True)
+        self.assertIn("/srv", cache)
+        self.assertNotIn("/srv/www/img", cache)
+        self.assertIn("/srv/wwwdata", cache)
+
+    def test_lru_limit(self):
+        cache = ListingCache(max_entries=4)
+        cache.put("/a", [FileEntry("1", False)] * 2)
+        cache.put("/b", [FileEntry("1", False)] * 2)
+        cache.get("/a") # /b is now the least recently used
+        cache.put("/c", [FileEntry("1", False)] * 2)
+        self.assertIn("/a", cache)
+        self.assertNotIn("/b", cache)
+
+    def test_ttl(self):
+        cache = ListingCache(ttl=-1)
+        cache.put("/a", [])
+        self.assertIsNone(cache.get("/a"))
+
+    def test_parent_path(self):
+        self.assertEqual(parent_path("/srv/www"), "/srv")
+        self.assertEqual(parent_path("/srv"), "/")
+        self.assertEqual(parent_path("/"), "/")
+
+class TestDirSizes(unittest.TestCase):
+    def test_cache_checks_mtime(self):
+        cache = DirSizeCache(max_entries=2)
+        cache.put("/a/x", 100, 5120)
+        entries = [FileEntry("x", True, 4096, 100), FileEntry("y", True, 4096, 100)]
+        cache.apply("/a", entries, os.path.join)
+        self.assertEqual([e.dir_size for e in entries], [5120, None])
+        self.assertEqual(entries[0].column_text("size"), "5.0 KB")
+        self.assertIsNone(cache.get("/a/x", 101))
+        cache.put("/b", 1, 1)
+        cache.put("/c", 1, 1)
+        self.assertIsNone(cache.get("/a/x", 100))
+
+    def test_sort_by_folder_size(self):
+        small, big, unknown = FileEntry("s", True), FileEntry("b", True), FileEntry("u", True)
+        small.dir_size, big.dir_size = 10, 1000
+        ordered = sort_entries([small, FileEntry("f", False, 5), unknown, big], "size", descending=True)
+        self.assertEqual([e.name for e in ordered], ["b", "s", "u", "f"])
+
+    def test_local_sizes(self):
+        root = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(root, "d", "e"))
+            with open(os.path.join(root, "d", "a"), "wb") as f: f.write(b"x" * 300)
+            with open(os.path.join(root, "d", "e", "b"), "wb") as f: f.write(b"x" * 700)
+            found = {}
+            local_dir_sizes([os.path.join(root, "d"), os.path.join(root, "missing")], found.__setitem__)
+            dirs = sum(os.lstat(p).st_size for p in (os.path.join(root, "d"), os.path.join(root, "d", "e")))
+            self.assertEqual(found, {os.path.join(root, "d"): 1000 + dirs})
+        finally:
+            shutil.rmtree(root)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+from sightssh.core.local_watch import LocalWatcher, _inotify_libc
+from sightssh.core.remote_watch import RemoteWatcher
+
+class WatchCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.batches = []
+
+    def tearDown(self):
+        self.watcher.stop()
+        shutil.rmtree(self.path)
+
+    def wait_for(self, names, timeout=5):
+        deadline = time.monotonic() + timeout
+        seen = set()
+        while time.monotonic() < deadline:
+            for batch in self.batches:
+                if batch is not None: seen |= batch
+            if names <= seen: return seen
+            time.sleep(0.05)
+        return seen
+
+    def exercise(self):
+        open(os.path.join(self.path, "old"), "w").close()
+        self.assertIn("old", self.wait_for({"old"}))
+        os.rename(os.path.join(self.path, "old"), os.path.join(self.path, "new"))
+        with open(os.path.join(self.path, "data"), "w") as f: f.write("x")
+        self.assertTrue({"old", "new", "data"} <= self.wait_for({"old", "new", "data"}))
+
+class TestPollingWatcher(WatchCase):
+    def test_events(self):
+        self.watcher = LocalWatcher(self.path, self.batches.append, poll_interval=0.1)
+        self.watcher.run = self.watcher._run_polling # Force the fallback
+        self.watcher.start()
+        time.sleep(0.2)
+        self.exercise()
+
+@unittest.skipUnless(sys.platform.startswith("linux") and _inotify_libc(), "inotify not available")
+class TestInotifyWatcher(WatchCase):
+    def test_events_are_debounced(self):
+        self.watcher = LocalWatcher(self.path, self.batches.append, debounce=0.2).start()
+        time.sleep(0.2)
+        for i in range(50):
+            open(os.path.join(self.path, f"f{i}"), "w").close()
+        seen = self.wait_for({f"f{i}" for i in range(50)})
+        self.assertEqual(len(seen), 50)
+        self.assertLess(len(self.batches), 5)
+        self.exercise()
+
+class TestRemoteWatchParse(unittest.TestCase):
+    def test_inotifywait_lines(self):
+        batches = []
+        watcher = RemoteWatcher(None, "/srv", batches.append)
+        watcher._parse("CREATE/new file")
+        watcher._parse("MOVED_FROM/old")
+        watcher._flush()
+        self.assertEqual(batches, [{"new file", "old"}])
+        watcher._parse("DELETE_SELF/")
+        watcher._flush()
+        self.assertEqual(batches[-1], None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+import os
+import shutil
+import tempfile
+import unittest
+from paramiko import SFTPAttributes
+from sightssh.core.file_entry import FileEntry
+from sightssh.core.remote_catalog import RemoteCatalog
+from sightssh.core.disk_usage import UsageTree, DiskUsageScan
+from sightssh.core.remote_ops import TreeEnumerator, parse_tree_record, TREE_BATCH
+from sightssh.core.remote_search import (
+    RemoteSearch, SearchCriteria, ContentSearch, parse_size, stream_records, EXCERPT_CHARS
+)
+
+def attr(name, mode, size=0, mtime=0):
+    a = SFTPAttributes()
+    a.filename, a.st_mode, a.st_size, a.st_mtime = name, mode, size, mtime
+    return a
+
+class ChunkChannel:
+    """Exec channel stand-in that returns its output in small chunks."""
+    def __init__(self, data, status=0, chunk=7):
+        self.chunks = [data[i:i + chunk] for i in range(0, len(data), chunk)]
+        self.status = status
+        self.closed = False
+
+    def settimeout(self, timeout): pass
+    def recv_stderr_ready(self): return False
+    def recv_exit_status(self): return self.status
+    def close(self): self.closed = True
+    def recv(self, size): return self.chunks.pop(0) if self.chunks else b""
+
+class FakeClient:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def open_exec(self, command, window_size=None):
+        self.command = command
+        return self.channel
+
+class TestSearchCriteria(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertIsNone(parse_size(" "))
+        self.assertEqual(parse_size("1500"), 1500)
+        self.assertEqual(parse_size("10K"), 10240)
+        self.assertEqual(parse_size("2.5 MB"), int(2.5 * 1024 ** 2))
+        with self.assertRaises(ValueError): parse_size("ten")
+
+    def test_find_expression(self):
+        crit = SearchCriteria("conf", min_size=10, max_size=20, modified_days=2, kind="file")
+        self.assertEqual(crit.find_expression(), "-type f -iname '*conf*' -size +9c -size -21c -mmin -2880")
+
+    def test_matches(self):
+        crit = SearchCriteria("*.LOG", min_size=5)
+        self.assertTrue(crit.matches("app.log", attr("app.log", 0o100644, 5)))
+        self.assertFalse(crit.matches("app.log", attr("app.log", 0o100644, 4)))
+        self.assertFalse(crit.matches("app.txt", attr("app.txt", 0o100644, 50)))
+        self.assertFalse(SearchCriteria(kind="dir").matches("x", attr("x", 0o100644)))
+
+    def test_parse_find_record(self):
+        search = RemoteSearch(None, "/srv/", SearchCriteria())
+        entry = search._parse("d 4096 1700000000.5 /srv/a b/c")
+        self.assertEqual((entry.name, entry.is_dir, entry.size, entry.mtime), ("a b/c", True, 4096, 1700000000))
+        self.assertIsNone(search._parse("garbage"))
+
+class TestStreaming(unittest.TestCase):
+    def test_records_split_across_chunks(self):
+        records = []
+        channel = ChunkChannel(b"first\0second record\0" + b"x" * 50 + b"\0tail")
+        status, _ = stream_records(channel, b"\0", records.append, lambda: False, limit=20)
+        self.assertEqual(status, 0)
+        self.assertEqual(records, [b"first", b"second record", b"x" * 20, b"tail"])
+        self.assertTrue(channel.closed)
+
+    def test_content_search(self):
+        output = (b"/srv/a.conf\x002:Listen 80\n/srv/b c.txt\x0010:key: value\n"
+                  b"/srv/long\x001:" + b"y" * 1000 + b"\n")
+        client = FakeClient(ChunkChannel(output))
+        search = ContentSearch(client, "/srv", "it's")
+        hits = []
+        self.assertEqual(search.run(hits.extend), 3)
+        self.assertIn("-F -i -e 'it'\"'\"'s' -- /srv", client.command)
+        self.assertEqual([(h.path, h.line) for h in hits], [("/srv/a.conf", 2), ("/srv/b c.txt", 10), ("/srv/long", 1)])
+        self.assertEqual(hits[1].text, "key: value")
+        self.assertEqual(len(hits[2].text), EXCERPT_CHARS + 1)
+
+    def test_content_search_error(self):
+        with self.assertRaises(IOError):
+            ContentSearch(FakeClient(ChunkChannel(b"", status=2)), "/srv", "x").run(lambda batch: None)
+
+class TestDiskUsage(unittest.TestCase):
+    def test_tree_out_of_order(self):
+        # The SFTP walk may report entries before their folders
+        tree = UsageTree("/srv/")
+        tree.add(b"a/b/big", False, 700)
+        tree.add(b"a", True, 10)
+        tree.add(b"small", False, 100)
+        tree.add(b"a/b", True, 20)
+        tree.add(b"", True, 5)
+        tree.rollup()
+        self.assertEqual((tree.size(0), tree.items(0)), (835, 4))
+        a, small = tree.children(0)
+        self.assertEqual((tree.name(a), tree.size(a), tree.items(a)), ("a", 730, 2))
+        self.assertAlmostEqual(tree.percent(small), 100 * 100 / 835)
+        big = tree.children(tree.children(a)[0])[0]
+        self.assertEqual(tree.path(big), "/srv/a/b/big")
+        self.assertFalse(tree.is_dir(big))
+
+    def test_scan_with_find(self):
+        output = b"d 4096 \0f 10 x\0d 4096 sub\0f 5000 sub/y z\0garbage\0"
+        client = FakeClient(ChunkChannel(output, status=1))
+        tree = DiskUsageScan(client, "/").run()
+        self.assertIn("find / -xdev -printf", client.command)
+        self.assertTrue(tree.complete)
+        self.assertEqual([tree.name(i) for i in tree.children(0)], ["sub", "x"])
+        self.assertEqual(tree.size(0), 4096 * 2 + 5010)
+        self.assertEqual(tree.path(tree.children(tree.children(0)[0])[0]), "/sub/y z")
+
+class TestTreeEnumerator(unittest.TestCase):
+    def test_parse_record(self):
+        entry = parse_tree_record("l 11 1700000000.25 777 /srv/a b/link")
+        self.assertEqual((entry.name, entry.is_dir, entry.size, entry.mtime, entry.mode),
+                         ("/srv/a b/link", False, 11, 1700000000, 0o120777))
+        self.assertTrue(parse_tree_record("d 4096 1 755 /srv/d").is_dir)
+        self.assertIsNone(parse_tree_record("f x 1 644 /srv/f"))
+
+    def test_scan_with_find(self):
+        client = FakeClient(ChunkChannel(b"d 4096 1.0 755 /a/d\0f 3 2.0 640 /a/d/f\0"))
+        entries = TreeEnumerator(client).scan(["/a", "/b c"])
+        self.assertIn("find /a '/b c' -mindepth 1 -printf", client.command)
+        self.assertEqual([(e.name, e.mode) for e in entries], [("/a/d", 0o40755), ("/a/d/f", 0o100640)])
+
+    def test_find_failing_partway_delivers_once(self):
+        names = ["f%04d" % i for i in range(TREE_BATCH + 1)]
+        records = b"".join(b"f 1 1.0 644 /a/%s\0" % n.encode() for n in names)
+        client = WalkClient(ChunkChannel(records, status=2, chunk=4096), {"/a": [attr(n, 0o100644) for n in names]})
+        delivered = []
+        lister = TreeEnumerator(client, workers=1)
+        lister.scan(["/a"], on_batch=delivered.extend)
+        self.assertEqual(lister.method, "sftp")
+        self.assertEqual(sorted(e.name for e in delivered), ["/a/" + n for n in names])
+        self.assertEqual(lister.done, len(names))
+
+class WalkClient(FakeClient):
+    """Exec goes to the channel, SFTP listings come from a {folder: [attr]} map."""
+    def __init__(self, channel, folders):
+        super().__init__(channel)
+        self.folders = folders
+
+    def open_sftp(self):
+        client = self
+        class _SFTP:
+            def listdir_attr(self, path): return client.folders[path]
+            def close(self): pass
+        return _SFTP()
+
+class TestRemoteCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.catalog = RemoteCatalog(os.path.join(self.tmp, "catalogs", "test.sqlite"))
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.tmp)
+
+    def test_search_and_complete(self):
+        self.catalog.add_entries([FileEntry("/srv/app", True), FileEntry("/srv/app/Report_2024.txt", False, 10),
+                                  FileEntry("/srv/app/notes.md", False, 5)])
+        self.assertEqual([h.path for h in self.catalog.search("report")], ["/srv/app/Report_2024.txt"])
+        self.assertEqual([h.name for h in self.catalog.search("_2")], ["Report_2024.txt"]) # Shorter than a trigram
+        self.assertEqual([h.path for h in self.catalog.search("app")], ["/srv/app"])
+        self.assertEqual([h.path for h in self.catalog.complete("/srv/app/")],
+                         ["/srv/app/Report_2024.txt", "/srv/app/notes.md"])
+
+    def test_update_folder_drops_gone_subtrees(self):
+        self.catalog.add_entries([FileEntry("/srv/old", True), FileEntry("/srv/old/deep.txt", False),
+                                  FileEntry("/srv/older", True), FileEntry("/srv/keep", False)])
+        self.catalog.update_folder("/srv", [FileEntry("keep", False, 7), FileEntry("older", True), FileEntry("new", False)])
+        self.assertEqual([h.path for h in self.catalog.complete("/srv/")], ["/srv/keep", "/srv/new", "/srv/older"])
+        self.assertEqual(self.catalog.lookup("/srv/keep").size, 7)
+        self.assertEqual(self.catalog.count, 3)
+
+    def test_refresh_prunes_unseen_and_caps_size(self):
+        self.catalog.add_entries([FileEntry("/srv/gone", False), FileEntry("/elsewhere", False)], seen=1)
+        client = FakeClient(ChunkChannel(b"d 4096 1.0 755 /srv/d\0f 3 2.0 640 /srv/d/f\0"))
+        self.catalog.refresh(client, "/srv")
+        self.assertIn("-xdev", client.command)
+        self.assertEqual([h.path for h in self.catalog.complete("/")], ["/elsewhere", "/srv/d", "/srv/d/f"])
+        self.assertIsNotNone(self.catalog.last_scan)
+        self.assertFalse(self.catalog.needs_refresh(24))
+        self.assertEqual(self.catalog.count, 3)
+
+        self.catalog.max_entries = 3
+        self.catalog.add_entries([FileEntry("/srv/extra", False)])
+        self.assertTrue(self.catalog.truncated)
+        self.assertIsNone(self.catalog.lookup("/srv/extra"))
+
+    def test_batch_never_exceeds_max_entries(self):
+        self.catalog.max_entries = 4
+        self.catalog.add_entries([FileEntry("/a", False), FileEntry("/b", False)])
+        # Rows already there take no room: /a is updated, /c and /d fill the catalog, /e is left out
+        self.catalog.add_entries([FileEntry("/a", False, 9), FileEntry("/c", False), FileEntry("/d", False), FileEntry("/e", False)])
+        self.assertEqual(self.catalog.count, 4)
+        self.assertEqual([h.path for h in self.catalog.complete("/")], ["/a", "/b", "/c", "/d"])
+        self.assertEqual(self.catalog.lookup("/a").size, 9)
+        self.assertTrue(self.catalog.truncated)
@@ -0,0 +1,425 @@
+import unittest
+import io
+import os
+import errno
+import select
+import socket
+import shutil
+import tempfile
+import subprocess
+from sightssh.core.transfer_engine import (
+    ExecStreamEngine, SFTPTransferEngine, create_engine, ENGINE_EXEC, ENGINE_AUTO
+)
+from sightssh.core.relay import HostRelay
+from sightssh.core.remote_ops import OperationCancelled, RemoteChmodder
+from sightssh.core.remote_trash import is_cross_device
+from sightssh.core.sftp_pipeline import SFTPPipeline
+from sightssh.core.remote_pager import RemotePager, MAX_LINE
+from sightssh.core.transfer_tuning import TransferTuner, MIN_DEPTH, MAX_DEPTH, REQUEST_SIZE
+
+class FakeChannel:
+    def __init__(self, data=b"", status=0):
+        self.data = data
+        self.sent = b""
+        self.status = status
+        self.closed = False
+
+    def sendall(self, data): self.sent += data
+    def shutdown_write(self): pass
+    def recv_exit_status(self): return self.status
+    def close(self): self.closed = True
+
+    def recv(self, size):
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+    def makefile_stderr(self, mode):
+        import io
+        return io.BytesIO(b"denied")
+
+class FakeClient:
+    def __init__(self, channel):
+        self.channel = channel
+        self.commands = []
+
+    def open_exec(self, command, window_size=None):
+        self.commands.append(command)
+        return self.channel
+
+class LocalChannel:
+    """Runs a command on this machine behind the Channel calls stream_records makes."""
+    def __init__(self, command):
+        self.proc = subprocess.Popen(["/bin/sh", "-c", command], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.timeout = None
+        self.stderr_done = False
+
+    def settimeout(self, timeout): self.timeout = timeout
+    def recv_exit_status(self): return self.proc.wait()
+
+    def recv(self, size):
+        if not select.select([self.proc.stdout], [], [], self.timeout)[0]: raise socket.timeout()
+        return os.read(self.proc.stdout.fileno(), size)
+
+    def recv_stderr_ready(self):
+        return not self.stderr_done and bool(select.select([self.proc.stderr], [], [], 0)[0])
+
+    def recv_stderr(self, size):
+        data = os.read(self.proc.stderr.fileno(), size)
+        if not data: self.stderr_done = True
+        return data
+
+    def close(self):
+        if self.proc.poll() is None: self.proc.kill()
+        self.proc.wait()
+        self.proc.stdout.close()
+        self.proc.stderr.close()
+
+class LocalClient:
+    def open_exec(self, command, window_size=None): return LocalChannel(command)
+
+class FakeSFTP:
+    def __init__(self, size):
+        self.size = size
+
+    def stat(self, path):
+        return type('attr', (object,), {'st_size': self.size})()
+
+class TestExecStreamEngine(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_put_streams_file(self):
+        with open(self.path, 'wb') as f: f.write(b"x" * 1000)
+        channel = FakeChannel()
+        client = FakeClient(channel)
+        progress = []
+        ExecStreamEngine(client, None, chunk_size=300).put(self.path, "/tmp/it's", callback=lambda c, t: progress.append((c, t)))
+        self.assertEqual(channel.sent, b"x" * 1000)
+        self.assertEqual(client.commands[0], "cat > '/tmp/it'\"'\"'s'")
+        self.assertEqual(progress[-1], (1000, 1000))
+        self.assertTrue(channel.closed)
+
+    def test_get_failure_raises(self):
+        channel = FakeChannel(data=b"", status=1)
+        engine = ExecStreamEngine(FakeClient(channel), FakeSFTP(0))
+        with self.assertRaises(IOError):
+            engine.get("/root/secret", self.path)
+
+    def test_get_writes_stream(self):
+        channel = FakeChannel(data=b"abc" * 100)
+        ExecStreamEngine(FakeClient(channel), FakeSFTP(300), chunk_size=64).get("/data", self.path)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b"abc" * 100)
+
+    def test_create_engine(self):
+        self.assertIsInstance(create_engine(ENGINE_EXEC, None, None), ExecStreamEngine)
+        self.assertIsInstance(create_engine(ENGINE_AUTO, None, None), SFTPTransferEngine)
+
+class MemFile:
+    def __init__(self, store, path, mode):
+        self.store, self.path = store, path
+        self.buf = io.BytesIO(store.get(path, b"") if 'r' in mode else b"")
+        self.writing = 'w' in mode
+
+    def __enter__(self): return self
+    def __exit__(self, *a):
+        if self.writing: self.store[self.path] = self.buf.getvalue()
+
+    def stat(self): return type('attr', (object,), {'st_size': len(self.store[self.path])})()
+    def set_pipelined(self, flag): pass
+    def read(self, size): return self.buf.read(size)
+    def write(self, data): self.buf.write(data)
+    def close(self): pass
+
+    def readv(self, chunks, max_concurrent_prefetch_requests=None):
+        data = self.buf.getvalue()
+        for offset, size in chunks:
+            yield data[offset:offset + size]
+
+class MemSFTP:
+    def __init__(self, files=None):
+        self.files = files or {}
+        self.opened = []
+
+    def open(self, path, mode):
+        self.opened.append(MemFile(self.files, path, mode))
+        return self.opened[-1]
+    def stat(self, path): return type('attr', (object,), {'st_mode': 0o100644, 'st_size': len(self.files[path])})()
+    def chmod(self, path, mode): pass
+    def remove(self, path): del self.files[path]
+
+class ReadFile(MemFile):
+    def __init__(self, sftp, store, path, mode):
+        super().__init__(store, path, mode)
+        self.sftp, self.handle = sftp, path
+
+class ReadSFTP(MemSFTP):
+    """Answers read requests in order; every `short_every`-th reply is cut in half."""
+    def __init__(self, files, short_every=0):
+        super().__init__(files)
+        self.short_every = short_every
+        self.queue = []
+        self.in_flight = [] # Requests in flight as each reply goes out
+        self.max_in_flight = 0
+        self.short_reads = 0
+        self.num = 0
+
+    def open(self, path, mode): return ReadFile(self, self.files, path, mode)
+
+    def _async_request(self, sink, cmd, handle, offset, length):
+        self.num += 1
+        self.queue.append((sink, self.num, handle, offset, length))
+        self.max_in_flight = max(self.max_in_flight, len(self.queue))
+        return self.num
+
+    def _read_response(self):
+        from paramiko.message import Message
+        from paramiko.sftp import CMD_DATA
+        self.in_flight.append(len(self.queue))
+        sink, num, handle, offset, length = self.queue.pop(0)
+        if self.short_every and num % self.short_every == 0 and length > 1:
+            length //= 2
+            self.short_reads += 1
+        msg = Message()
+        msg.add_string(self.files[handle][offset:offset + length])
+        msg.rewind()
+        sink._async_response(CMD_DATA, msg, num)
+
+class WriteSFTP(ReadSFTP):
+    """Applies write requests in order when their reply is read."""
+    def __init__(self):
+        super().__init__({})
+        self.buffers = {}
+
+    def open(self, path, mode):
+        self.buffers[path] = bytearray()
+        return ReadFile(self, self.files, path, mode)
+
+    def stat(self, path):
+        self.files[path] = bytes(self.buffers[path])
+        return super().stat(path)
+
+    def _read_response(self):
+        from paramiko.message import Message
+        from paramiko.sftp import CMD_STATUS, SFTP_OK
+        self.in_flight.append(len(self.queue))
+        sink, num, handle, offset, data = self.queue.pop(0)
+        self.buffers[handle][offset:offset + len(data)] = data
+        msg = Message()
+        msg.add_int(SFTP_OK)
+        msg.add_string("")
+        msg.rewind()
+        sink._async_response(CMD_STATUS, msg, num)
+
+    def _convert_status(self, msg):
+        if msg.get_int() != 0: raise IOError("write failed")
+
+class TestSFTPTransferEngine(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_get_keeps_tuned_depth_in_flight(self):
+        payload = os.urandom(REQUEST_SIZE * 40 + 123) # Not a whole number of requests
+        sftp = ReadSFTP({"/a": payload}, short_every=7)
+        progress = []
+        SFTPTransferEngine(sftp, TransferTuner({"depth": 16})).get("/a", self.path, callback=lambda c, t: progress.append(c))
+        self.assertEqual(sftp.max_in_flight, 16)
+        self.assertGreater(sftp.short_reads, 0)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), payload)
+        self.assertEqual(progress[-1], len(payload))
+
+    def test_get_follows_depth_changes(self):
+        sftp = ReadSFTP({"/a": os.urandom(REQUEST_SIZE * 40)})
+        tuner = TransferTuner({"depth": 16})
+        def _cb(cur, tot):
+            if cur >= REQUEST_SIZE * 10: tuner.depth = 4
+        SFTPTransferEngine(sftp, tuner).get("/a", self.path, callback=_cb)
+        self.assertEqual(sftp.in_flight[:3], [16, 16, 16])
+        self.assertEqual(max(sftp.in_flight[30:]), 4) # Shrinks as replies come in
+        self.assertEqual(sftp.in_flight[-4:], [4, 3, 2, 1])
+
+    def test_put_keeps_tuned_depth_in_flight(self):
+        payload = os.urandom(REQUEST_SIZE * 40 + 123)
+        with open(self.path, 'wb') as f:
+            f.write(payload)
+        sftp = WriteSFTP()
+        tuner = TransferTuner({"depth": 16})
+        def _cb(cur, tot):
+            if cur >= REQUEST_SIZE * 30: tuner.depth = 8
+        SFTPTransferEngine(sftp, tuner).put(self.path, "/a", callback=_cb)
+        self.assertEqual(sftp.files["/a"], payload)
+        self.assertEqual(sftp.in_flight[:14], [16] * 14)
+        self.assertEqual(max(sftp.in_flight), 16)
+        self.assertEqual(sftp.in_flight[-8:], [8, 7, 6, 5, 4, 3, 2, 1])
+
+class TestRemotePager(unittest.TestCase):
+    def make(self, data, cache_pages=4):
+        return RemotePager(MemSFTP({"/log": data}), "/log", page_size=1024, cache_pages=cache_pages)
+
+    def test_lines_both_ways(self):
+        data = b"".join(b"line %d\r\n" % i for i in range(1000)) + b"x" * (MAX_LINE + 10)
+        pager = self.make(data)
+        lines = pager.lines(0, 3)
+        self.assertEqual([l.text for l in lines], ["line 0", "line 1", "line 2"])
+        tail = pager.lines_before(pager.size, 3)
+        self.assertEqual([l.text for l in tail], ["line 999", "x" * MAX_LINE, "x" * 10]) # Long lines come in pieces
+        self.assertEqual([l.newline for l in tail], [True, False, False])
+        middle = pager.line_start(data.index(b"line 500") + 3)
+        self.assertEqual(pager.lines(middle, 1)[0].text, "line 500")
+        self.assertEqual(pager.lines_before(middle, 1)[0].text, "line 499")
+
+    def test_line_index_and_cache(self):
+        data = b"".join(b"%d\n" % i for i in range(20000))
+        pager = self.make(data)
+        self.assertIsNone(pager.line_number(len(data) // 2)) # Not counted yet
+        offset = pager.line_offset(12344)
+        self.assertEqual(pager.lines(offset, 1)[0].text, "12344")
+        self.assertEqual(pager.line_number(offset), 12344)
+        pager.index_to()
+        self.assertEqual(pager.line_count, 20000)
+        self.assertLessEqual(len(pager.cache), 4)
+
+    def test_growing_file(self):
+        files = {"/log": b"a\nb\n"}
+        pager = RemotePager(MemSFTP(files), "/log", page_size=1024)
+        pager.index_to()
+        files["/log"] += b"c\n"
+        pager._file.buf = io.BytesIO(files["/log"])
+        self.assertTrue(pager.refresh_size())
+        self.assertEqual([l.text for l in pager.lines(4, 5)], ["c"])
+        pager.index_to()
+        self.assertEqual(pager.line_count, 3)
+
+class TestHostRelay(unittest.TestCase):
+    def test_copy_file_between_sessions(self):
+        payload = os.urandom(200000)
+        src, dst = ReadSFTP({"/a": payload}, short_every=5), MemSFTP()
+        progress = []
+        HostRelay(src, dst, chunk_size=1000, max_buffers=4).copy_file("/a", "/b", callback=lambda c, t: progress.append((c, t)))
+        self.assertEqual(dst.files["/b"], payload)
+        self.assertEqual(src.max_in_flight, 4) # Reads in flight are bounded like the queue
+        self.assertEqual(progress[-1], (200000, 200000))
+
+    def test_cancel(self):
+        src, dst = ReadSFTP({"/a": b"x" * 100000}), MemSFTP()
+        with self.assertRaises(OperationCancelled):
+            HostRelay(src, dst, chunk_size=10, max_buffers=2).copy_file("/a", "/b", is_cancelled=lambda: True)
+        self.assertNotIn("/b", dst.files) # The partial file is removed
+
+class PipeSFTP:
+    """Answers requests out of order, failing paths that start with 'bad'."""
+    def __init__(self):
+        self.queue = []
+        self.max_in_flight = 0
+        self.num = 0
+
+    def _adjust_cwd(self, path): return path
+
+    def _async_request(self, sink, cmd, path, *args):
+        self.num += 1
+        self.queue.append((sink, self.num, path))
+        self.max_in_flight = max(self.max_in_flight, len(self.queue))
+        return self.num
+
+    def _read_response(self):
+        from paramiko.sftp import CMD_STATUS
+        sink, num, path = self.queue.pop()
+        sink._async_response(CMD_STATUS, path, num)
+
+    def _convert_status(self, path):
+        if path.startswith("bad"): raise IOError("denied")
+
+class TestSFTPPipeline(unittest.TestCase):
+    def test_window_and_errors(self):
+        sftp = PipeSFTP()
+        done = []
+        pipe = SFTPPipeline(sftp, window=3, on_done=lambda tag, err: done.append(tag))
+        for name in ["a", "bad1", "b", "c", "bad2"]:
+            pipe.submit(1, name)
+        pipe.drain()
+        self.assertEqual(sftp.max_in_flight, 3)
+        self.assertEqual(sorted(done), ["a", "b", "bad1", "bad2", "c"])
+        self.assertEqual(sorted(tag for tag, _ in pipe.errors), ["bad1", "bad2"])
+
+class TestTransferTuner(unittest.TestCase):
+    def test_depth_follows_bdp(self):
+        tuner = TransferTuner({"rtt": 0.1})
+        tuner.observe(10 * 1024 * 1024) # 10 MB/s * 100 ms = 1 MB in flight
+        self.assertEqual(tuner.depth, 2 * 1024 * 1024 // REQUEST_SIZE)
+
+    def test_limits(self):
+        tuner = TransferTuner({"rtt": 0.001})
+        tuner.observe(1000)
+        self.assertEqual(tuner.depth, MIN_DEPTH)
+        tuner = TransferTuner({"rtt": 2.0})
+        tuner.observe(10 ** 9)
+        self.assertEqual(tuner.depth, MAX_DEPTH)
+
+    def test_grows_then_backs_off(self):
+        mb = 1024 * 1024
+        tuner = TransferTuner({"rtt": 0.1, "depth": MIN_DEPTH})
+        depths = []
+        for sample in [4 * mb, 8 * mb, 2 * mb, 6 * mb, 9 * mb]:
+            tuner.observe(sample)
+            depths.append(tuner.depth)
+        # 8 MB/s was measured at depth 26: the drop halves 39 back to 26, and the
+        # depth stays there until a sample beats 8 MB/s.
+        self.assertEqual(depths, [26, 39, 26, 26, 45])
+
+    def test_saved_roundtrip(self):
+        tuner = TransferTuner({"rtt": 0.05})
+        tuner.observe(4 * 1024 * 1024)
+        again = TransferTuner(tuner.to_dict())
+        self.assertEqual(again.depth, tuner.depth)
+        self.assertEqual(again.window, tuner.window)
+
+class TestRemoteChmodder(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, "a", "b"))
+        for name in ("a/f", "a/b/g"):
+            open(os.path.join(self.root, name), "w").close()
+
+    def tearDown(self):
+        for dirpath, dirnames, _ in os.walk(self.root):
+            for d in dirnames: os.chmod(os.path.join(dirpath, d), 0o755)
+        shutil.rmtree(self.root)
+
+    def mode(self, name):
+        return os.stat(os.path.join(self.root, name)).st_mode & 0o7777
+
+    @unittest.skipIf(os.geteuid() == 0, "root can list any folder")
+    def test_exec_changes_unlistable_folders(self):
+        os.chmod(os.path.join(self.root, "a", "b"), 0)
+        os.chmod(os.path.join(self.root, "a"), 0)
+        chmodder = RemoteChmodder(LocalClient(), use_exec=True)
+        chmodder._chmod_exec([self.root], 0o750, 0o640)
+        self.assertEqual(chmodder.errors, [])
+        self.assertEqual(chmodder.done, 4)
+        self.assertEqual([self.mode(n) for n in ("a", "a/b", "a/f", "a/b/g")], [0o750, 0o750, 0o640, 0o640])
+
+    def test_exec_cancel(self):
+        chmodder = RemoteChmodder(LocalClient(), use_exec=True)
+        chmodder._start(None, lambda: True)
+        with self.assertRaises(OperationCancelled):
+            chmodder._chmod_exec([self.root], 0o750, 0o640)
+
+class TestRemoteTrash(unittest.TestCase):
+    def test_only_other_filesystems_fall_back(self):
+        self.assertTrue(is_cross_device(OSError(errno.EXDEV, "Invalid cross-device link")))
+        self.assertTrue(is_cross_device(IOError("Failure"))) # SSH_FX_FAILURE
+        self.assertFalse(is_cross_device(IOError(errno.EACCES, "Permission denied")))
+        self.assertFalse(is_cross_device(IOError(errno.ENOENT, "No such file")))
+        self.assertFalse(is_cross_device(EOFError()))
+
+if __name__ == '__main__':
+    unittest.main()